@@ -1,4 +1,5 @@
-from utils.mongo_loader import connect_mongo
+from utils.monitoring_config import find_existing_monitoring
+from utils.bulk_monitoring import validate_bulk_endpoints, pack_monitoring_requests, format_bulk_report
 
 REQUIRED_CONFIG_FIELDS = {
     "HTTP": ["url", "interval", "httpTimeLimit"],
@@ -8,6 +9,22 @@ REQUIRED_CONFIG_FIELDS = {
     "Network": ["url", "interval"]
 }
 
+def review_bulk_monitor_arguments(state):
+    args = state.get("monitor_args", {})
+    valid, rejected = validate_bulk_endpoints(
+        args.get("endpoints", []), args.get("testType"), args.get("monitoringCriticality"), args.get("configurations")
+    )
+    if not valid:
+        return {"result": "❌ None of the endpoints can be monitored.\n\n" + format_bulk_report(valid, rejected)}
+
+    return {
+        "result": (
+            f"✅ {len(valid)} endpoint(s) validated and will be sent in {len(pack_monitoring_requests(valid))} monitoring request(s)"
+            + (f"; {len(rejected)} rejected and will be skipped" if rejected else "")
+            + ".\n\n" + format_bulk_report(valid, rejected)
+        )
+    }
+
 def review_monitor_arguments(state):
     args = state.get("monitor_args", {})
     test_type = args.get("testType")
@@ -20,19 +37,22 @@ def review_monitor_arguments(state):
 
     required_fields = REQUIRED_CONFIG_FIELDS.get(test_type, [])
     merged_config = config
+    update = {}
 
-    # For update, fetch existing config and merge
+    # For update, fetch existing config once per flow and merge; Execute reuses it from the state
     if operation_type == "update_monitor" and endpoint_sysId:
-        print("Fetching existing configuration for update operation...")
-        db = connect_mongo()
-        collection = db["assetsMonitoringConfiguration"]
-        existing = collection.find_one({"data.cmdbId": endpoint_sysId})
+        existing = state.get("existing_monitoring")
+        if existing is None:
+            print("Fetching existing configuration for update operation...")
+            existing = find_existing_monitoring(endpoint_sysId)
+            update["existing_monitoring"] = existing
         if not existing:
             return {
+                **update,
                 "result": f"❌ No existing monitoring configuration found for endpoint `{endpoint_sysId}`. Please create a new monitor instead."
             }
 
-        existing_config = existing.get("data", {}).get("thousandEyesConfiguration", {})
+        existing_config = existing.get("thousandEyesConfiguration", {})
         merged_config = {**existing_config, **config}
 
     # Check for missing required fields
@@ -40,6 +60,7 @@ def review_monitor_arguments(state):
 
     if missing:
         return {
+            **update,
             "result": (
                 f"❌ Missing required fields for `{test_type}` test: {', '.join(missing)}.\n"
                 f"Please provide them before proceeding."
@@ -47,5 +68,6 @@ def review_monitor_arguments(state):
         }
 
     return {
+        **update,
         "result": f"✅ Monitoring request is end-to-end validated and all required fields for `{test_type}` test are present."
     }
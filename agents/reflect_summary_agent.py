@@ -1,17 +1,16 @@
-import json
 from dotenv import load_dotenv
 import os
+from utils.llm_cache import chat_completion_text
+from utils.context_manager import history_for_agent
 
 load_dotenv()
 app_key = os.getenv("APP_KEY")
+REFLECT_TOKEN_BUDGET = int(os.getenv("REFLECT_TOKEN_BUDGET", "3000"))
 
 def reflect_and_summarize(openai_client, chat_history):
-    messages = [{"role": "system", "content": "Reflect and summarize the user's request for monitor creation."}]
-    messages += chat_history[-10:]
-    
-    response = openai_client.chat.completions.create(
-        model="gpt-4o-mini",
-        messages=messages,
-        user=json.dumps({"appkey": app_key})
+    # chat_history is the main prompt; its system prompt is swapped for this one, the rolling summary is kept
+    messages = history_for_agent(
+        chat_history, "Reflect and summarize the user's request for monitor creation.", REFLECT_TOKEN_BUDGET, "reflect"
     )
-    return response.choices[0].message.content
+
+    return chat_completion_text(openai_client, messages=messages, app_key=app_key)
@@ -2,19 +2,24 @@ from dotenv import load_dotenv
 import os
 import streamlit as st
 import json
+import uuid
 from openai import AzureOpenAI
-from tools.tool_schema import functions
-from tools.tool_functions import (
-    fetch_ba_level_information, fetch_endpoint_information,
-    compare_endpoint_charges, fetch_agent_information, fetch_newly_monitored_endpoint_configuration,
-    fetch_unmonitored_endpoints,update_monitor,delete_monitor, fetch_user_assets, create_monitor
-)
-from langgraph_flow import build_monitor_flow  
-import requests
+from tools.tool_schema import tools
+from tools.dispatcher import tool_map, STREAMING_TOOLS, parse_tool_calls, run_tool, run_read_only_tools
+from tools.fast_router import fast_route
+from tools.schema_selector import select_tools
+from langgraph_flow import build_monitor_flow, new_monitor_thread, release_monitor_thread
+from utils.more_client import get_more_client
+from utils.llm_streaming import ChatStream
+from utils.mongo_indexes import ensure_indexes, check_query_plans
+from utils.cache_invalidation import start_cache_watcher
+from utils.bulk_monitoring import parse_monitor_csv, TEST_TYPES
+from utils.request_tracker import get_request_tracker
+from utils.instrumentation import start_turn, end_turn, timed, record_tokens, start_metrics_server, stage_summary
+from utils.context_manager import ConversationContext, count_tokens
 
 # Load environment variables
 load_dotenv()
-more_api_key = os.getenv("MORE_API_KEY")
 
 # Optional: only if you're using LangSmith
 os.environ["LANGCHAIN_TRACING_V2"] = os.getenv("LANGCHAIN_TRACING_V2", "true")
@@ -23,12 +28,20 @@ os.environ["LANGCHAIN_PROJECT"] = os.getenv("LANGCHAIN_PROJECT", "monitor-ease")
 
 openai_api_key = os.getenv("OPENAI_API_KEY")
 app_key = os.getenv("APP_KEY")
+stream_responses = os.getenv("STREAM_RESPONSES", "true").lower() == "true"
+ensure_mongo_indexes = os.getenv("MONGO_ENSURE_INDEXES", "true").lower() == "true"
+check_mongo_query_plans = os.getenv("MONGO_CHECK_QUERY_PLANS", "false").lower() == "true"
+cache_watcher_enabled = os.getenv("CACHE_WATCHER_ENABLED", "true").lower() == "true"
+request_status_refresh = float(os.getenv("REQUEST_STATUS_REFRESH_SECONDS", "5"))
+debug_panel = os.getenv("DEBUG_PANEL", "false").lower() == "true"
+tool_schema_selection = os.getenv("TOOL_SCHEMA_SELECTION", "true").lower() == "true"
 
 # Setup Azure OpenAI client
 client = AzureOpenAI(
-    azure_endpoint='https://chat-ai.cisco.com',
+    azure_endpoint=os.getenv("AZURE_OPENAI_ENDPOINT", "https://chat-ai.cisco.com"),
     api_key=openai_api_key,
-    api_version="2023-08-01-preview"
+    # 2024-10-21 is the first GA version that reports token usage for streamed completions
+    api_version="2024-10-21"
 )
 
 # Streamlit UI setup
@@ -147,17 +160,39 @@ st.markdown("""
 @st.cache_resource(show_spinner=False)
 def get_user_details():
     try:
-        headers = {
-            "Authorization": "Bearer " + more_api_key,
-            "Content-Type": "application/json"
-        }
-        response = requests.get("https://more-api-dev.cisco.com/api/v1/users/userDetails", headers=headers)
+        response = get_more_client().get("users/userDetails")
         return response.json()
     except Exception as e:
         return {"error": str(e)}
     
 user_details = get_user_details()
 
+
+@st.cache_resource(show_spinner=False)
+def bootstrap_mongo():
+    # Runs once per process; a query plan regression stops the app instead of silently scanning
+    if ensure_mongo_indexes:
+        try:
+            for collection_name, name in ensure_indexes():
+                print(f"Created Mongo index {collection_name}.{name}")
+        except Exception as e:
+            print(f"Could not ensure Mongo indexes: {e}")
+    if check_mongo_query_plans:
+        check_query_plans()
+    if cache_watcher_enabled:
+        # Keeps the endpoint index and cached LLM answers in step with writes from other processes
+        start_cache_watcher()
+
+bootstrap_mongo()
+
+
+@st.cache_resource(show_spinner=False)
+def serve_metrics():
+    # Prometheus text format on METRICS_PORT/metrics, once per process
+    return start_metrics_server()
+
+serve_metrics()
+
 if "user_info" not in st.session_state:
     st.session_state.user_info = user_details
     print(f"User info initialized: {st.session_state.user_info}")
@@ -167,15 +202,31 @@ if "conversations" not in st.session_state:
     st.session_state.conversations = {"Default Chat": []}
 if "current_chat" not in st.session_state:
     st.session_state.current_chat = "Default Chat"
-if "langgraph_state" not in st.session_state:
-    st.session_state.langgraph_state = None
+if "monitor_thread" not in st.session_state:
+    st.session_state.monitor_thread = None
 if "awaiting_confirmation" not in st.session_state:
     st.session_state.awaiting_confirmation = False
+if "session_id" not in st.session_state:
+    st.session_state.session_id = str(uuid.uuid4())
+if "contexts" not in st.session_state:
+    st.session_state.contexts = {}
+
+
+def release_pending_monitor_flow():
+    # Every way out of a pending confirmation (answer, new flow, chat switch) drops its checkpoint thread
+    if st.session_state.monitor_thread is not None:
+        release_monitor_thread(st.session_state.monitor_flow, st.session_state.monitor_thread)
+    st.session_state.monitor_thread = None
+    st.session_state.awaiting_confirmation = False
+
 
 # Sidebar: Conversations
 st.sidebar.markdown("### 💬 Conversations")
 for chat_name in st.session_state.conversations.keys():
     if st.sidebar.button(chat_name):
+        if chat_name != st.session_state.current_chat:
+            # A pending confirmation belongs to the conversation that asked for it
+            release_pending_monitor_flow()
         st.session_state.current_chat = chat_name
         st.rerun()
 
@@ -185,12 +236,27 @@ new_chat_name = st.sidebar.text_input("New conversation name", key="new_chat_nam
 if st.sidebar.button("Create"):
     if new_chat_name and new_chat_name not in st.session_state.conversations:
         st.session_state.conversations[new_chat_name] = []
+        release_pending_monitor_flow()
         st.session_state.current_chat = new_chat_name
         st.rerun()
 
+st.sidebar.markdown("---")
+st.sidebar.markdown("### 📄 Bulk create monitors")
+bulk_csv = st.sidebar.file_uploader(
+    "CSV with an endpoint_sysId column and optional url, interval, ... columns", type="csv", key="bulk_csv"
+)
+bulk_test_type = st.sidebar.selectbox("Default test type", TEST_TYPES, key="bulk_test_type")
+bulk_criticality = st.sidebar.selectbox("Default criticality", ["1", "2", "3", "4", "5"], index=2, key="bulk_criticality")
+bulk_interval = st.sidebar.number_input("Default interval (seconds)", min_value=60, value=300, step=60, key="bulk_interval")
+bulk_requested = st.sidebar.button("Review bulk create", disabled=bulk_csv is None)
+
 # Active conversation
 chat_key = st.session_state.current_chat
 chat_history = st.session_state.conversations.setdefault(chat_key, [])
+# Rolling summary and token budget for the prompts built from this conversation
+context = st.session_state.contexts.setdefault(chat_key, ConversationContext())
+# Finished monitoring requests are pushed to the conversation that submitted them
+tracking_key = f"{st.session_state.session_id}:{chat_key}"
 
 # Display header and past chat
 
@@ -214,29 +280,133 @@ for role, content in chat_history:
     with st.chat_message(role):
         st.markdown(content)
 
+
+@st.fragment(run_every=request_status_refresh)
+def deliver_request_statuses():
+    # Polls only the in-process outbox; the tracker thread does the MoRE calls
+    request_tracker = get_request_tracker()
+    delivered_here = False
+    for conversation_key, conversation in st.session_state.conversations.items():
+        messages = request_tracker.drain(f"{st.session_state.session_id}:{conversation_key}")
+        conversation.extend(("assistant", message) for message in messages)
+        delivered_here = delivered_here or (messages and conversation_key == chat_key)
+    if delivered_here:
+        st.rerun()
+
+deliver_request_statuses()
+
+
+def render_reply(reply):
+    # Tool replies are either plain text or a token generator when streaming
+    with st.chat_message("assistant"):
+        if isinstance(reply, str):
+            st.markdown(reply)
+        else:
+            reply = st.write_stream(reply)
+    chat_history.append(("assistant", reply))
+
+
+def start_monitor_flow(func_name, args, messages, note=""):
+    # Runs Review/Reflect/Confirm and pauses before Execute until the user answers
+    # A confirmation still pending is superseded by the new flow
+    release_pending_monitor_flow()
+    monitor_flow = build_monitor_flow(tool_map[func_name], func_name)
+    st.session_state.monitor_flow = monitor_flow
+
+    st.session_state.monitor_thread = new_monitor_thread(monitor_flow, client, tracking_key)
+    try:
+        result_state = monitor_flow.invoke(
+            {"chat_history": messages, "monitor_args": args},
+            st.session_state.monitor_thread
+        )
+    except Exception:
+        release_pending_monitor_flow()
+        raise
+
+    # Show review message if present
+    if "result" in result_state:
+        st.chat_message("assistant").markdown(result_state["result"])
+        chat_history.append(("assistant", result_state["result"]))
+
+    # Show confirmation prompt if present
+    if "confirmation_prompt" in result_state:
+        confirmation_prompt = result_state["confirmation_prompt"] + note
+        st.session_state.awaiting_confirmation = True
+        st.chat_message("assistant").markdown(confirmation_prompt)
+        chat_history.append(("assistant", confirmation_prompt))
+    else:
+        # Review stopped the flow (e.g. missing arguments), so nothing waits on this thread
+        release_pending_monitor_flow()
+
+
+if bulk_requested and not st.session_state.awaiting_confirmation:
+    # CSV rows go straight to the bulk flow; only a one-line description reaches the LLM summary
+    try:
+        endpoints = parse_monitor_csv(bulk_csv.getvalue())
+        request = (
+            f"Create {bulk_test_type} monitors with criticality {bulk_criticality} and interval {bulk_interval}s "
+            f"for the {len(endpoints)} endpoints in {bulk_csv.name}."
+        )
+        chat_history.append(("user", request))
+        with st.chat_message("user"):
+            st.markdown(request)
+        start_monitor_flow(
+            "bulk_create_monitors",
+            {
+                "endpoints": endpoints,
+                "testType": bulk_test_type,
+                "monitoringCriticality": bulk_criticality,
+                "configurations": {"interval": int(bulk_interval)},
+            },
+            [{"role": "user", "content": request}],
+        )
+    except Exception as e:
+        err_msg = f"❌ Error: {str(e)}"
+        st.chat_message("assistant").markdown(err_msg)
+        chat_history.append(("assistant", err_msg))
+
+
 # Chat Input
 user_input = st.chat_input("Ask me to create a monitor or list monitors...")
 
 if user_input:
+    turn = start_turn()
     chat_history.append(("user", user_input))
     with st.chat_message("user"):
         st.markdown(user_input)
 
     # Handle LangGraph confirmation input
     if st.session_state.awaiting_confirmation:
-        st.session_state.langgraph_state["user_confirmation"] = user_input.strip().lower()
-        result_state = st.session_state.monitor_flow.invoke(st.session_state.langgraph_state)
-
-        if result_state.get("user_confirmation", "").lower() == "yes":
-            st.chat_message("assistant").markdown(result_state["result"])
-            chat_history.append(("assistant", result_state["result"]))
-        else:
-            cancel_msg = "Okay, monitor action is cancelled. Please go on and ask for any queries"
-            st.chat_message("assistant").markdown(cancel_msg)
-            chat_history.append(("assistant", cancel_msg))
-
-        st.session_state.awaiting_confirmation = False
-        st.session_state.langgraph_state = None
+        turn["label"] = "confirmation"
+        user_confirmation = user_input.strip().lower()
+
+        try:
+            if user_confirmation == "yes":
+                # Resume the paused flow at Execute instead of re-running Review/Reflect
+                monitor_flow = st.session_state.monitor_flow
+                monitor_flow.update_state(st.session_state.monitor_thread, {"user_confirmation": user_confirmation})
+                result_state = monitor_flow.invoke(None, st.session_state.monitor_thread)
+                st.chat_message("assistant").markdown(result_state["result"])
+                chat_history.append(("assistant", result_state["result"]))
+            else:
+                cancel_msg = "Okay, monitor action is cancelled. Please go on and ask for any queries"
+                st.chat_message("assistant").markdown(cancel_msg)
+                chat_history.append(("assistant", cancel_msg))
+        finally:
+            release_pending_monitor_flow()
+
+    elif route := fast_route(user_input, chat_history[:-1]):
+        # Obvious lookups skip the main LLM call and go straight to the tool
+        turn["label"] = "fast_path"
+        func_name, args = route
+        if stream_responses and func_name in STREAMING_TOOLS:
+            args["stream"] = True
+        try:
+            render_reply(run_tool(func_name, args, openai_client=client, app_key=app_key, user_input=user_input))
+        except Exception as e:
+            err_msg = f"❌ Error: {str(e)}"
+            st.chat_message("assistant").markdown(err_msg)
+            chat_history.append(("assistant", err_msg))
 
     else:
         # LLM + function call
@@ -263,9 +433,12 @@ if user_input:
                 - `fetch_ba_level_information`: Retrieves business-level information for monitoring purposes.
                 - `fetch_endpoint_information`: Provides details about specific endpoints being monitored.
                 - `compare_endpoint_charges`: Compares charges related to endpoint monitoring.
+                - `rank_test_charges`: Ranks the most expensive tests in a BA or across all BAs.
+                - `estimate_charge_change`: Estimates how consumption changes if interval, time limit or agents change.
                 - `fetch_agent_information`: Fetches information about monitoring agents.
                 - `fetch_request_status`: Retrieves the status of specific monitoring requests.
                 - `fetch_unmonitored_endpoints`: Lists endpoints that are not currently monitored.
+                - `bulk_create_monitors`: Creates monitors for many endpoints at once, e.g. after `fetch_unmonitored_endpoints`.
                 - `update_monitor`: Updates the configuration of an existing monitor.
                 - `delete_monitor`: Deletes an existing monitor.
                 - `fetch_user_assets`: Fetches assets associated with the user.
@@ -292,74 +465,72 @@ if user_input:
             """
         }
 
-        messages = [base_system_msg] + [
-            {"role": role, "content": content} for role, content in chat_history[-10:]
-        ]
+        # Only the schemas this turn can plausibly need; none for small talk
+        turn_tools = select_tools(user_input, chat_history[:-1]) if tool_schema_selection else tools
+        tool_options = {"tools": turn_tools, "tool_choice": "auto"} if turn_tools else {}
 
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=messages,
-            functions=functions,
-            function_call="auto",
-            user=json.dumps({"appkey": app_key})
+        # Function schemas are sent with every call, so they come out of the budget
+        messages = context.build_messages(
+            client, app_key, [base_system_msg], chat_history, reserved_tokens=count_tokens(json.dumps(turn_tools))
         )
 
-        message = response.choices[0].message
-        if message.content:
-            st.chat_message("assistant").markdown(message.content)
-            chat_history.append(("assistant", message.content))
-
-        tool_map = {
-            "fetch_ba_level_information": fetch_ba_level_information,
-            "fetch_endpoint_information": fetch_endpoint_information,
-            "compare_endpoint_charges": compare_endpoint_charges,
-            "fetch_agent_information": fetch_agent_information,
-            "fetch_newly_monitored_endpoint_configuration": fetch_newly_monitored_endpoint_configuration,
-            "fetch_unmonitored_endpoints": fetch_unmonitored_endpoints,
-            "update_monitor": update_monitor,
-            "delete_monitor": delete_monitor,
-            "create_monitor": create_monitor,
-            "fetch_user_assets": fetch_user_assets
-        }
-        # Handle function calls
-        if message.function_call:
+        with timed("llm", site="main"):
+            response = client.chat.completions.create(
+                model="gpt-4o-mini",
+                messages=messages,
+                stream=True,
+                stream_options={"include_usage": True},
+                user=json.dumps({"appkey": app_key}),
+                **tool_options
+            )
+
+            # Stream the assistant's text as it arrives; tool calls produce no text
+            stream = ChatStream(response)
+            if stream.has_content:
+                with st.chat_message("assistant"):
+                    content = st.write_stream(stream)
+                chat_history.append(("assistant", content))
+            tool_calls = stream.finish().tool_calls
+        record_tokens(stream.usage, "main")
+
+        # Handle tool calls
+        if tool_calls:
             try:
-                args = json.loads(message.function_call.arguments)
-                func_name = message.function_call.name
-
-                if func_name in {"create_monitor", "update_monitor", "delete_monitor"}:
-                    tool_function = tool_map[func_name]
-                    monitor_flow = build_monitor_flow(client, tool_function, func_name)
-                    st.session_state.monitor_flow = monitor_flow
-
-                    st.session_state.langgraph_state = {
-                        "chat_history": messages,
-                        "monitor_args": args,
-                    }
-                    result_state = monitor_flow.invoke(st.session_state.langgraph_state)
-
-                    # Show review message if present
-                    if "result" in result_state:
-                        st.chat_message("assistant").markdown(result_state["result"])
-                        chat_history.append(("assistant", result_state["result"]))
-
-                    # Show confirmation prompt if present
-                    if "confirmation_prompt" in result_state:
-                        confirmation_prompt = result_state["confirmation_prompt"]
-                        st.session_state.awaiting_confirmation = True
-                        st.chat_message("assistant").markdown(confirmation_prompt)
-                        chat_history.append(("assistant", confirmation_prompt))
+                read_only_calls, mutating_calls = parse_tool_calls(tool_calls)
+                tool_kwargs = {"openai_client": client, "app_key": app_key, "user_input": user_input}
 
+                if len(read_only_calls) == 1 and stream_responses and read_only_calls[0][0] in STREAMING_TOOLS:
+                    func_name, args = read_only_calls[0]
+                    replies = [run_tool(func_name, {**args, "stream": True}, **tool_kwargs)]
                 else:
-                    # Map and call other tools
-                    reply = tool_map.get(func_name, lambda **kwargs: "❌ Unsupported function.")(
-                        **args, openai_client=client, app_key=app_key, user_input=user_input
-                    )
+                    # Independent lookups run concurrently; replies come back in call order
+                    replies = run_read_only_tools(read_only_calls, **tool_kwargs)
+
+                for reply in replies:
+                    render_reply(reply)
 
-                    st.chat_message("assistant").markdown(reply)
-                    chat_history.append(("assistant", reply))
+                if mutating_calls:
+                    # Only one monitor change can wait for confirmation at a time
+                    func_name, args = mutating_calls[0]
+                    note = ""
+                    if len(mutating_calls) > 1:
+                        skipped = ", ".join(f"`{name}`" for name, _ in mutating_calls[1:])
+                        note = f"\n\nI can only make one monitor change at a time, so {skipped} was not started. Please ask again once this one is done."
+                    start_monitor_flow(func_name, args, messages, note)
 
             except Exception as e:
                 err_msg = f"❌ Error: {str(e)}"
                 st.chat_message("assistant").markdown(err_msg)
-                chat_history.append(("assistant", err_msg))
\ No newline at end of file
+                chat_history.append(("assistant", err_msg))
+
+    # Totals and stages are exported as metrics; DEBUG_PANEL shows this breakdown in the sidebar
+    st.session_state.last_turn = end_turn()
+
+if debug_panel:
+    with st.sidebar.expander("⏱️ Debug: timings"):
+        breakdown = st.session_state.get("last_turn")
+        if breakdown:
+            st.markdown(f"**Last turn** ({breakdown['label']}): {breakdown['total']:.2f}s")
+            st.table([{"stage": stage, "seconds": round(seconds, 3)} for stage, seconds in sorted(breakdown["stages"].items())])
+        st.markdown("**All turns** (bucket upper bounds)")
+        st.table(stage_summary())
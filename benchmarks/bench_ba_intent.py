@@ -0,0 +1,91 @@
+"""
+Compares the keyword BA intent router with the LLM router on a labelled set.
+
+    python -m benchmarks.bench_ba_intent            # local classifier only
+    python -m benchmarks.bench_ba_intent --llm      # also call the LLM router
+
+The LLM run needs OPENAI_API_KEY and APP_KEY (AZURE_OPENAI_ENDPOINT overrides
+the default endpoint). Questions the keyword router is unsure about count as
+"fallback" rather than as errors, since in production they go to the LLM.
+"""
+import argparse
+import os
+import time
+from statistics import median
+from utils.intent_router import classify_ba_intent, llm_classify_ba_intent
+from utils.llm_cache import get_llm_cache
+
+LABELLED_QUESTIONS = [
+    ("list the bams", "list_bams"),
+    ("what modules are in this BA?", "list_bams"),
+    ("show me all BAMs", "list_bams"),
+    ("which modules does it have", "list_bams"),
+    ("give me the bam names", "list_bams"),
+    ("list endpoints", "list_endpoints"),
+    ("show all monitored endpoints", "list_endpoints"),
+    ("what endpoints are monitored under this BA", "list_endpoints"),
+    ("which systems are monitored", "list_endpoints"),
+    ("list all tests in the application", "list_endpoints"),
+    ("give me the endpoint sysIds", "list_endpoints"),
+    ("how many endpoints are monitored", "summarize"),
+    ("count of endpoints", "summarize"),
+    ("summarize the BA", "summarize"),
+    ("give me an overview", "summarize"),
+    ("total number of monitored endpoints", "summarize"),
+    ("summary please", "summarize"),
+    ("how many tests do we have", "summarize"),
+    ("list endpoints in each bam", "list_endpoints"),
+    ("how many endpoints per module", "summarize"),
+]
+
+
+def run_path(classify, questions):
+    latencies, correct, fallback = [], 0, 0
+    for question, expected in questions:
+        start = time.perf_counter()
+        predicted = classify(question)
+        latencies.append(time.perf_counter() - start)
+        if predicted is None:
+            fallback += 1
+        elif predicted == expected:
+            correct += 1
+    answered = len(questions) - fallback
+    return {
+        "answered": answered,
+        "fallback": fallback,
+        "accuracy": correct / answered if answered else 0.0,
+        "median_ms": median(latencies) * 1000,
+        "max_ms": max(latencies) * 1000,
+    }
+
+
+def print_result(name, result):
+    print(
+        f"{name:<8} answered={result['answered']:<3} fallback={result['fallback']:<3} "
+        f"accuracy={result['accuracy']:.0%}  median={result['median_ms']:.3f}ms  max={result['max_ms']:.3f}ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--llm", action="store_true", help="also benchmark the LLM router")
+    args = parser.parse_args()
+
+    print(f"{len(LABELLED_QUESTIONS)} labelled questions")
+    print_result("local", run_path(classify_ba_intent, LABELLED_QUESTIONS))
+
+    if args.llm:
+        from openai import AzureOpenAI
+        client = AzureOpenAI(
+            azure_endpoint=os.getenv("AZURE_OPENAI_ENDPOINT", "https://chat-ai.cisco.com"),
+            api_key=os.getenv("OPENAI_API_KEY"),
+            api_version="2024-10-21"
+        )
+        app_key = os.getenv("APP_KEY")
+        # Measure real model round trips, not cached answers
+        get_llm_cache().clear()
+        print_result("llm", run_path(lambda q: llm_classify_ba_intent(q, client, app_key), LABELLED_QUESTIONS))
+
+
+if __name__ == "__main__":
+    main()
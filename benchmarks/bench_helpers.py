@@ -0,0 +1,127 @@
+"""
+Microbenchmarks for the utils helpers on synthetic BAs of 1k, 10k and 100k
+endpoints: time per call (mean ± std dev over runs, pyperf style) and peak
+memory allocated per call (tracemalloc). The previous implementations are
+kept here as "legacy" cases so the rewrites can be compared side by side.
+
+    python -m benchmarks.bench_helpers
+    python -m benchmarks.bench_helpers --sizes 1000 --runs 5
+    python -m benchmarks.bench_helpers --pyperf -o helpers.json   # needs pip install pyperf
+
+With --pyperf every case runs under pyperf.Runner (worker processes,
+calibration, JSON output for `python -m pyperf compare_to`); remaining
+arguments go to pyperf.
+"""
+import argparse
+import sys
+import time
+import tracemalloc
+from statistics import mean, stdev
+from benchmarks.synthetic_data import make_ba_document, make_assets_details
+from utils.helpers import (
+    list_endpoints, summarize_projection, count_endpoints, extract_null_monitoring_endpoints
+)
+from utils.monitoring_payload_utils import format_monitoring_payload
+
+
+def legacy_list_endpoints(ba_data):
+    eps = ba_data.get("endpoints", []) + [
+        ep for bam in ba_data.get("bams", []) for ep in bam.get("endpoints", [])
+    ]
+    endpoint_list = [
+        f'endpointName: "{ep.get("endpointName", "")}", endpointSysId: "{ep.get("endpointSysId", "")}"'
+        for ep in eps
+    ]
+    content = "\n\n".join(endpoint_list)
+    return f"""Here are the list of monitored endpoints:\n\n{content}"""
+
+
+def legacy_summarize_projection(ba_data):
+    # Counted the characters of the formatted listing, not the endpoints
+    total_eps = len(legacy_list_endpoints(ba_data))
+    return f"Total monitored endpoints under BA '{ba_data['baName']}': {total_eps}"
+
+
+def cases(doc, assets_details):
+    endpoint = doc["bams"][0]["endpoints"][0]
+    config = {k: endpoint["testConfiguration"][k] for k in ("interval", "url", "httpTimeLimit")}
+    return {
+        "list_endpoints": lambda: list_endpoints(doc),
+        "list_endpoints (legacy)": lambda: legacy_list_endpoints(doc),
+        "summarize_projection": lambda: summarize_projection(doc),
+        "summarize_projection (legacy)": lambda: legacy_summarize_projection(doc),
+        "count_endpoints": lambda: count_endpoints(doc),
+        "extract_null_monitoring_endpoints": lambda: extract_null_monitoring_endpoints(assets_details),
+        # Per endpoint, so the cost is independent of the BA size
+        "format_monitoring_payload": lambda: format_monitoring_payload(endpoint["endpointSysId"], "3", config, "HTTP"),
+    }
+
+
+def time_case(func, runs, min_time=0.05):
+    # Calibrate loops so each run lasts at least min_time, as pyperf does
+    loops = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(loops):
+            func()
+        if time.perf_counter() - started >= min_time:
+            break
+        loops *= 2
+
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        for _ in range(loops):
+            func()
+        timings.append((time.perf_counter() - started) / loops)
+    return timings
+
+
+def peak_allocation(func):
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def _format_time(seconds):
+    for unit, scale in (("s", 1), ("ms", 1e-3), ("us", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.2f} {unit}"
+    return f"{seconds / 1e-9:.0f} ns"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=lambda s: [int(n) for n in s.split(",")], default=[1_000, 10_000, 100_000])
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--pyperf", action="store_true", help="run the cases under pyperf.Runner")
+    args, pyperf_args = parser.parse_known_args()
+
+    documents = {size: make_ba_document(size) for size in args.sizes}
+    details = {size: make_assets_details(doc) for size, doc in documents.items()}
+
+    if args.pyperf:
+        import pyperf
+        sys.argv = [sys.argv[0]] + pyperf_args
+        runner = pyperf.Runner()
+        for size in args.sizes:
+            for name, func in cases(documents[size], details[size]).items():
+                runner.bench_func(f"{name} [{size}]", func)
+        return
+
+    print(f"{'case':<46}{'size':>8}{'time per call':>24}{'peak alloc':>14}")
+    for size in args.sizes:
+        for name, func in cases(documents[size], details[size]).items():
+            timings = time_case(func, args.runs)
+            spread = stdev(timings) if len(timings) > 1 else 0.0
+            print(
+                f"{name:<46}{size:>8}{_format_time(mean(timings)) + ' +- ' + _format_time(spread):>24}"
+                f"{peak_allocation(func) / 1024:>11.0f} KB"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Bytes on the wire and BSON decode time for whole-document BA reads versus the
+projected queries in utils/ba_queries, on a synthetic 10k-endpoint BA.
+
+    python -m benchmarks.bench_projection                          # offline
+    python -m benchmarks.bench_projection --mongo-uri mongodb://localhost:27017
+
+Offline mode builds the documents each query would return in Python and times
+their BSON encoding/decoding. With --mongo-uri the synthetic BA is written to a
+scratch collection and the real queries are run with RawBSONDocument, so the
+sizes are exactly what the server sends back.
+"""
+import argparse
+import timeit
+import bson
+from bson.raw_bson import RawBSONDocument
+from pymongo import MongoClient
+from benchmarks.synthetic_data import make_ba_document, iter_all_endpoints
+from utils.ba_queries import (
+    matched_endpoint_pipeline, ba_counts_pipeline, BAM_NAMES_PROJECTION, ENDPOINT_LISTING_PROJECTION
+)
+
+
+def offline_results(doc, endpoint_sysId):
+    """
+    The documents each query returns, built in Python to mirror the server-side projections.
+    """
+    matched_bam = next(bam for bam in doc["bams"] if any(ep["endpointSysId"] == endpoint_sysId for ep in bam["endpoints"]))
+    return {
+        "full document": doc,
+        "matched endpoint": {
+            "baName": doc["baName"],
+            "baSysId": doc["baSysId"],
+            "endpoints": [],
+            "bams": [{
+                "bamName": matched_bam["bamName"],
+                "bamSysId": matched_bam["bamSysId"],
+                "endpoints": [ep for ep in matched_bam["endpoints"] if ep["endpointSysId"] == endpoint_sysId],
+            }],
+        },
+        "BAM names": {"baName": doc["baName"], "bams": [{"bamName": bam["bamName"]} for bam in doc["bams"]]},
+        "endpoint listing": {
+            "baName": doc["baName"],
+            "endpoints": [{"endpointName": ep["endpointName"], "endpointSysId": ep["endpointSysId"]} for ep in doc["endpoints"]],
+            "bams": [
+                {"endpoints": [{"endpointName": ep["endpointName"], "endpointSysId": ep["endpointSysId"]} for ep in bam["endpoints"]]}
+                for bam in doc["bams"]
+            ],
+        },
+        "counts": {"baName": doc["baName"], "bamCount": len(doc["bams"]), "endpointCount": sum(1 for _ in iter_all_endpoints(doc))},
+    }
+
+
+def mongo_results(mongo_uri, doc, endpoint_sysId):
+    client = MongoClient(mongo_uri, document_class=RawBSONDocument)
+    collection = client["monitor-ease-bench"]["brownfield-ba-data"]
+    collection.drop()
+    collection.insert_one(doc)
+    try:
+        return {
+            "full document": collection.find_one({"baName": doc["baName"]}),
+            "matched endpoint": next(collection.aggregate(matched_endpoint_pipeline(endpoint_sysId))),
+            "BAM names": collection.find_one({"baName": doc["baName"]}, BAM_NAMES_PROJECTION),
+            "endpoint listing": collection.find_one({"baName": doc["baName"]}, ENDPOINT_LISTING_PROJECTION),
+            "counts": next(collection.aggregate(ba_counts_pipeline(doc["baName"]))),
+        }
+    finally:
+        collection.drop()
+        client.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--endpoints", type=int, default=10_000)
+    parser.add_argument("--mongo-uri", help="run the real queries against this MongoDB")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    doc = make_ba_document(args.endpoints)
+    endpoint_sysId = doc["bams"][-1]["endpoints"][-1]["endpointSysId"]
+
+    if args.mongo_uri:
+        raw_results = {name: raw.raw for name, raw in mongo_results(args.mongo_uri, dict(doc), endpoint_sysId).items()}
+    else:
+        raw_results = {name: bson.encode(result) for name, result in offline_results(doc, endpoint_sysId).items()}
+
+    decode_times = {
+        name: min(timeit.repeat(lambda: bson.decode(raw), number=1, repeat=args.repeat))
+        for name, raw in raw_results.items()
+    }
+    full_bytes = len(raw_results["full document"])
+    full_decode = decode_times["full document"]
+
+    print(f"{args.endpoints} endpoint BA, {'mongo' if args.mongo_uri else 'offline'} mode")
+    print(f"{'query':<18}{'bytes':>14}{'saved':>9}{'decode ms':>12}{'saved':>9}")
+    for name, raw in raw_results.items():
+        decode = decode_times[name]
+        print(
+            f"{name:<18}{len(raw):>14,}{1 - len(raw) / full_bytes:>9.1%}"
+            f"{decode * 1000:>12.3f}{1 - decode / full_decode:>9.1%}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+"""
+Measures per-turn tool schema selection on a replay set of labelled turns:
+schema tokens sent versus the full function list, and whether the tool the
+turn needs is still offered.
+
+    python -m benchmarks.bench_schema_selector          # offline
+    python -m benchmarks.bench_schema_selector --llm    # also ask the model, with all and with selected tools
+
+The LLM run needs OPENAI_API_KEY and APP_KEY (AZURE_OPENAI_ENDPOINT overrides
+the default endpoint) and reports how often the model picks the expected tool
+(or no tool) with each schema list.
+"""
+import argparse
+import json
+import os
+import time
+from statistics import mean, median
+from tools.tool_schema import tools
+from tools.schema_selector import select_tools
+from utils.context_manager import count_tokens
+
+ENDPOINT = "4f1c2a9e8b7d6c5a4f3e2d1c0b9a8f7e"
+OTHER_ENDPOINT = "9a8b7c6d5e4f3a2b1c0d9e8f7a6b5c4d"
+BA = "0123456789abcdef0123456789abcdef"
+REQUEST = "65f0c1d2e3a4b5c6d7e8f901"
+
+CREATE_STARTED = [
+    ("user", f"create a monitor for {ENDPOINT}"),
+    ("assistant", "Sure. Which test type, criticality and interval should it use?"),
+]
+LOOKUP_DONE = [
+    ("user", f"what is the polling interval of {ENDPOINT}?"),
+    ("assistant", "The test runs every 300 seconds."),
+]
+CHARGES_DONE = [
+    ("user", f"compare the charges of {ENDPOINT} and {OTHER_ENDPOINT}"),
+    ("assistant", "The first test consumes 1,200 units a month, the second 800."),
+]
+UNMONITORED_DONE = [
+    ("user", f"show the unmonitored endpoints of {BA}"),
+    ("assistant", 'endpointName: "orders-api", endpointSysId: "..."\n\nendpointName: "billing-api", endpointSysId: "..."'),
+]
+
+# (history, user input, tool the turn should call or None)
+REPLAY_SET = [
+    ([], f"create an HTTP monitor for {ENDPOINT}", "create_monitor"),
+    (CREATE_STARTED, "HTTP with interval 300 and url https://orders.example.com/health", "create_monitor"),
+    (CREATE_STARTED, "criticality 3 please", "create_monitor"),
+    (CREATE_STARTED, "WebTransaction, 5, https://orders.example.com, every 600 seconds, time limit 30", "create_monitor"),
+    ([], f"delete the monitor on {ENDPOINT}", "delete_monitor"),
+    ([], f"remove monitoring for {ENDPOINT}", "delete_monitor"),
+    ([], f"change the interval of {ENDPOINT} to 600", "update_monitor"),
+    ([], f"update the url of {ENDPOINT} to https://billing.example.com", "update_monitor"),
+    # Monitor changes without create/update/delete in them
+    ([], f"monitor endpoint {ENDPOINT} with an HTTP test", "create_monitor"),
+    ([], f"start monitoring {ENDPOINT}", "create_monitor"),
+    ([], f"make an http test for {ENDPOINT}", "create_monitor"),
+    ([], f"please stop monitoring {ENDPOINT}", "delete_monitor"),
+    ([], f"set the interval of {ENDPOINT} to 120", "update_monitor"),
+    ([], f"edit the monitor for {ENDPOINT}", "update_monitor"),
+    ([], f"increase interval for {ENDPOINT} to 600", "update_monitor"),
+    ([], f"the config of {ENDPOINT}", "fetch_endpoint_information"),
+    ([], f"create monitors for all unmonitored endpoints in {BA}", "fetch_unmonitored_endpoints"),
+    (UNMONITORED_DONE, "create HTTP monitors for all of them with interval 300 and criticality 3", "bulk_create_monitors"),
+    ([], f"what is the polling interval of {ENDPOINT}?", "fetch_endpoint_information"),
+    ([], f"show me the configuration of {ENDPOINT}", "fetch_endpoint_information"),
+    ([], f"which agents does {ENDPOINT} run on?", "fetch_endpoint_information"),
+    ([], "tell me about the Cisco: San Jose, CA agent", "fetch_agent_information"),
+    ([], f"what's the status of request {REQUEST}", "fetch_newly_monitored_endpoint_configuration"),
+    ([], "show my assets", "fetch_user_assets"),
+    ([], "which business applications do I own? my userId is jdoe", "fetch_user_assets"),
+    ([], "list the BAMs in Orders Portal BA", "fetch_ba_level_information"),
+    ([], "how many endpoints are monitored in the Orders Portal BA?", "fetch_ba_level_information"),
+    ([], f"which endpoints are not monitored in {BA}?", "fetch_unmonitored_endpoints"),
+    ([], f"compare the charges of {ENDPOINT} and {OTHER_ENDPOINT}", "compare_endpoint_charges"),
+    ([], "which are the 5 most expensive tests in the Orders Portal BA?", "rank_test_charges"),
+    ([], f"how would consumption change if the interval of {ENDPOINT} were 60?", "estimate_charge_change"),
+    (CHARGES_DONE, "and what if the second one ran every 900 seconds?", "estimate_charge_change"),
+    (CHARGES_DONE, "rank the costliest tests across all BAs", "rank_test_charges"),
+    (LOOKUP_DONE, "and the url?", "fetch_endpoint_information"),
+    (LOOKUP_DONE, f"same for {OTHER_ENDPOINT}", "fetch_endpoint_information"),
+    ([], "hi", None),
+    ([], "thanks a lot!", None),
+    ([], "what can you do?", None),
+]
+
+
+def schema_tokens(schemas):
+    return count_tokens(json.dumps(schemas)) if schemas else 0
+
+
+def run_offline(replay_set):
+    full_tokens = schema_tokens(tools)
+    selected_tokens, latencies, missed, fallback = [], [], [], 0
+    for history, user_input, expected in replay_set:
+        started = time.perf_counter()
+        selected = select_tools(user_input, history)
+        latencies.append(time.perf_counter() - started)
+        selected_tokens.append(schema_tokens(selected))
+        fallback += selected is tools
+        if expected and expected not in {tool["function"]["name"] for tool in selected}:
+            missed.append((user_input, expected))
+    return {
+        "full_tokens": full_tokens,
+        "mean_tokens": mean(selected_tokens),
+        "saved": 1 - mean(selected_tokens) / full_tokens,
+        "recall": 1 - len(missed) / sum(1 for *_, expected in replay_set if expected),
+        "fallback": fallback,
+        "missed": missed,
+        "median_us": median(latencies) * 1e6,
+    }
+
+
+def llm_tool_choice(client, app_key, history, user_input, schemas):
+    messages = [{"role": "system", "content": "You are MonitorEase, an assistant for ThousandEyes monitoring tasks."}]
+    messages += [{"role": role, "content": content} for role, content in history]
+    messages.append({"role": "user", "content": user_input})
+    options = {"tools": schemas, "tool_choice": "auto"} if schemas else {}
+    response = client.chat.completions.create(
+        model="gpt-4o-mini", messages=messages, user=json.dumps({"appkey": app_key}), **options
+    )
+    tool_calls = response.choices[0].message.tool_calls
+    return (tool_calls[0].function.name if tool_calls else None), response.usage.prompt_tokens
+
+
+def run_llm(client, app_key, replay_set):
+    results = {"all": [0, 0], "selected": [0, 0]}
+    for history, user_input, expected in replay_set:
+        for name, schemas in (("all", tools), ("selected", select_tools(user_input, history))):
+            chosen, prompt_tokens = llm_tool_choice(client, app_key, history, user_input, schemas)
+            results[name][0] += chosen == expected
+            results[name][1] += prompt_tokens
+            if chosen != expected:
+                print(f"  {name:<8} {user_input[:60]!r}: expected {expected}, got {chosen}")
+    for name, (correct, prompt_tokens) in results.items():
+        print(
+            f"llm/{name:<8} accuracy={correct / len(replay_set):.0%}  "
+            f"mean prompt tokens={prompt_tokens / len(replay_set):.0f}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--llm", action="store_true", help="also compare the model's tool choice with all and selected tools")
+    args = parser.parse_args()
+
+    result = run_offline(REPLAY_SET)
+    print(f"{len(REPLAY_SET)} replayed turns")
+    print(
+        f"schema tokens: all={result['full_tokens']}  selected mean={result['mean_tokens']:.0f}  "
+        f"saved={result['saved']:.0%}  fallback to all={result['fallback']}"
+    )
+    print(f"expected tool offered: {result['recall']:.0%}  selection median={result['median_us']:.0f}us")
+    for user_input, expected in result["missed"]:
+        print(f"  missed {expected}: {user_input!r}")
+
+    if args.llm:
+        from openai import AzureOpenAI
+        client = AzureOpenAI(
+            azure_endpoint=os.getenv("AZURE_OPENAI_ENDPOINT", "https://chat-ai.cisco.com"),
+            api_key=os.getenv("OPENAI_API_KEY"),
+            api_version="2024-10-21",
+        )
+        run_llm(client, os.getenv("APP_KEY"), REPLAY_SET)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,287 @@
+"""
+Offline latency and throughput per tool and per chat turn, against local
+stand-ins for Mongo (mongomock), MoRE and Azure OpenAI (benchmarks/fakes.py),
+with synthetic BAs of 10 to 50k endpoints.
+
+    python -m benchmarks.bench_tools                       # run and compare with the baseline
+    python -m benchmarks.bench_tools --save-baseline       # run and store the numbers as the new baseline
+    python -m benchmarks.bench_tools --sizes 10,1000 --repeat 5
+
+mongomock has no real indexes and runs queries in Python, so Mongo-bound cases
+(e.g. update_monitor against 50k monitoring documents) are slower than against
+a real server; compare them with their own baseline, not with production.
+
+Exits 1 when a case's median is more than --tolerance slower than the stored
+baseline (and by more than --min-delta-ms), so it can gate CI. Baselines are
+machine specific; re-save one on the machine that runs the comparison.
+Needs mongomock (pip install mongomock).
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from statistics import median
+from benchmarks.fakes import FakeMoreServer, FakeOpenAIServer
+from benchmarks.synthetic_data import make_dataset, make_assets_details, iter_all_endpoints
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baseline.json")
+APP_KEY = "bench"
+
+
+def _consume(reply):
+    # Streaming tools return generators; the time to render them is part of the call
+    return reply if isinstance(reply, (str, dict, type(None))) else "".join(reply)
+
+
+def measure(call, repeat, concurrency):
+    latencies = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        _consume(call())
+        latencies.append(time.perf_counter() - started)
+
+    errors = []
+
+    def worker():
+        try:
+            for _ in range(repeat):
+                _consume(call())
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    if errors:
+        raise errors[0]
+
+    latencies.sort()
+    return {
+        "p50_ms": median(latencies) * 1000,
+        "p95_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000,
+        "throughput_per_s": concurrency * repeat / elapsed,
+    }
+
+
+def setup_environment(args):
+    """
+    Starts the fakes and points the app's configuration at them. Must run before
+    the tool modules are imported, since they read their endpoints at import time.
+    """
+    ba_documents, monitoring_documents = make_dataset(args.sizes)
+    more = FakeMoreServer(
+        latency=args.more_latency,
+        assets_details={doc["baSysId"]: make_assets_details(doc) for doc in ba_documents},
+    ).start()
+    openai = FakeOpenAIServer(latency=args.llm_latency, token_delay=args.token_delay).start()
+
+    os.environ["MORE_API_BASE_URL"] = more.url
+    os.environ["AZURE_OPENAI_ENDPOINT"] = openai.url
+    os.environ["LLM_CACHE_BACKEND"] = "memory"
+    # Background services would add noise to the timings
+    os.environ["CACHE_WATCHER_ENABLED"] = "false"
+    os.environ.setdefault("LANGCHAIN_TRACING_V2", "false")
+    os.environ["MORE_MAX_RETRIES"] = "0"
+
+    import mongomock
+    from utils import mongo_loader
+    mongo_loader._client = mongomock.MongoClient()
+    db = mongo_loader.connect_mongo()
+    db["brownfield-ba-data"].insert_many([dict(doc) for doc in ba_documents])
+    db["assetsMonitoringConfiguration"].insert_many(monitoring_documents)
+    return ba_documents, more, openai
+
+
+def tool_cases(doc, client, requestId):
+    from tools import tool_functions as tf
+
+    endpoints = list(iter_all_endpoints(doc))
+    first, last = endpoints[0], endpoints[-1]
+    common = {"openai_client": client, "app_key": APP_KEY}
+    config = dict(first["testConfiguration"])
+    return {
+        "fetch_ba_level_information:list_bams": lambda: tf.fetch_ba_level_information(
+            doc["baName"], "list the bams", client, APP_KEY),
+        "fetch_ba_level_information:list_endpoints": lambda: tf.fetch_ba_level_information(
+            doc["baName"], "list endpoints", client, APP_KEY),
+        "get_matched_endpoint": lambda: tf.get_matched_endpoint(last["endpointSysId"]),
+        "fetch_endpoint_information": lambda: tf.fetch_endpoint_information(
+            last["endpointSysId"], "what is the interval?", **common),
+        "compare_endpoint_charges": lambda: tf.compare_endpoint_charges(
+            first["endpointSysId"], last["endpointSysId"], user_input="which costs more?", **common),
+        "rank_test_charges": lambda: tf.rank_test_charges(user_input="top tests", baName=doc["baName"], **common),
+        "estimate_charge_change": lambda: tf.estimate_charge_change(
+            user_input="halve the interval", baName=doc["baName"], interval_factor=0.5, **common),
+        "fetch_agent_information": lambda: tf.fetch_agent_information("251041", user_input="tests on 251041", **common),
+        "fetch_newly_monitored_endpoint_configuration": lambda: tf.fetch_newly_monitored_endpoint_configuration(
+            requestId, user_input="status?", **common),
+        "fetch_unmonitored_endpoints": lambda: tf.fetch_unmonitored_endpoints(
+            doc["baSysId"], user_input="unmonitored", stream=True, **common),
+        "fetch_user_assets": lambda: tf.fetch_user_assets("benchuser", user_input="my assets", **common),
+        "create_monitor": lambda: tf.create_monitor(
+            first["endpointSysId"], "HTTP", {"url": config["url"], "interval": 300, "httpTimeLimit": 5}, "3"),
+        "update_monitor": lambda: tf.update_monitor(first["endpointSysId"], "HTTP", {"interval": 600}),
+        "delete_monitor": lambda: tf.delete_monitor(first["endpointSysId"]),
+        "bulk_create_monitors": lambda: tf.bulk_create_monitors(
+            [{"endpoint_sysId": ep["endpointSysId"], "configurations": {"url": ep["testConfiguration"]["url"]}}
+             for ep in endpoints[:200]],
+            "HTTP", "3", {"interval": 300, "httpTimeLimit": 5}),
+    }
+
+
+def turn_scenarios(doc):
+    endpoints = list(iter_all_endpoints(doc))
+    first, last = endpoints[0]["endpointSysId"], endpoints[-1]["endpointSysId"]
+    return {
+        "fast_path:endpoint_sysId": (last, []),
+        "llm:endpoint_question": (
+            f"what is the polling interval of {last}?",
+            [{"name": "fetch_endpoint_information", "arguments": {"endpoint_sysId": last}}],
+        ),
+        "llm:two_parallel_lookups": (
+            f"show me the configuration of {first} and of {last}",
+            [
+                {"name": "fetch_endpoint_information", "arguments": {"endpoint_sysId": first}},
+                {"name": "fetch_endpoint_information", "arguments": {"endpoint_sysId": last}},
+            ],
+        ),
+        "llm:small_talk": ("hi there", []),
+    }
+
+
+def run_turn(user_input, client):
+    """
+    One chat turn as app.py runs it: fast path, else the streamed main completion
+    followed by the requested read-only tools.
+    """
+    from tools.schema_selector import select_tools
+    from tools.dispatcher import STREAMING_TOOLS, parse_tool_calls, run_tool, run_read_only_tools
+    from tools.fast_router import fast_route
+    from utils.llm_streaming import ChatStream
+    from utils.instrumentation import start_turn, end_turn, timed
+
+    start_turn()
+    tool_kwargs = {"openai_client": client, "app_key": APP_KEY, "user_input": user_input}
+    route = fast_route(user_input)
+    if route:
+        func_name, args = route
+        if func_name in STREAMING_TOOLS:
+            args["stream"] = True
+        _consume(run_tool(func_name, args, **tool_kwargs))
+    else:
+        turn_tools = select_tools(user_input)
+        with timed("llm", site="main"):
+            stream = ChatStream(client.chat.completions.create(
+                model="gpt-4o-mini",
+                messages=[{"role": "system", "content": "You are MonitorEase."}, {"role": "user", "content": user_input}],
+                stream=True,
+                stream_options={"include_usage": True},
+                user=json.dumps({"appkey": APP_KEY}),
+                **({"tools": turn_tools, "tool_choice": "auto"} if turn_tools else {}),
+            ))
+            "".join(stream)
+        read_only_calls, _ = parse_tool_calls(stream.tool_calls)
+        for reply in run_read_only_tools(read_only_calls, **tool_kwargs):
+            _consume(reply)
+    return end_turn()
+
+
+def compare_with_baseline(results, baseline, tolerance, min_delta_ms):
+    regressions = []
+    for case, current in results.items():
+        previous = baseline.get(case)
+        if previous is None:
+            continue
+        delta = current["p50_ms"] - previous["p50_ms"]
+        if delta > min_delta_ms and current["p50_ms"] > previous["p50_ms"] * (1 + tolerance):
+            regressions.append(f"{case}: p50 {previous['p50_ms']:.2f}ms -> {current['p50_ms']:.2f}ms")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=lambda s: [int(n) for n in s.split(",")], default=[10, 1000, 50_000],
+                        help="endpoints per synthetic BA")
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--concurrency", type=int, default=4, help="threads for the throughput run")
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="fake OpenAI seconds per request")
+    parser.add_argument("--token-delay", type=float, default=0.0, help="fake OpenAI seconds per streamed token")
+    parser.add_argument("--more-latency", type=float, default=0.02, help="fake MoRE seconds per request")
+    parser.add_argument("--warm-cache", action="store_true", help="keep LLM answers cached between calls")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed median slowdown, 0.25 = 25%%")
+    parser.add_argument("--min-delta-ms", type=float, default=2.0, help="ignore slowdowns smaller than this")
+    args = parser.parse_args()
+
+    ba_documents, more, openai = setup_environment(args)
+    from openai import AzureOpenAI
+    from utils.endpoint_index import get_endpoint_index
+    from utils.llm_cache import get_llm_cache
+    from tools import tool_functions as tf
+
+    client = AzureOpenAI(azure_endpoint=os.environ["AZURE_OPENAI_ENDPOINT"], api_key="bench", api_version="2024-10-21")
+
+    started = time.perf_counter()
+    get_endpoint_index().refresh()
+    print(f"endpoint index: {len(get_endpoint_index())} endpoints in {(time.perf_counter() - started) * 1000:.0f}ms")
+
+    first_endpoint = next(iter_all_endpoints(ba_documents[0]))
+    requestId = tf.create_monitor(
+        first_endpoint["endpointSysId"], "HTTP", {"url": "https://bench", "interval": 300, "httpTimeLimit": 5}, "3"
+    ).split("tracking Id : ")[1].split("`")[0]
+
+    def cold(call):
+        if args.warm_cache:
+            return call
+        return lambda: (get_llm_cache().clear(), call())[1]
+
+    results = {}
+    print(f"{'case':<58}{'p50 ms':>10}{'p95 ms':>10}{'calls/s':>10}")
+    for size, doc in zip(args.sizes, ba_documents):
+        for name, call in tool_cases(doc, client, requestId).items():
+            case = f"tool:{name}@{size}"
+            results[case] = measure(cold(call), args.repeat, args.concurrency)
+            print(f"{case:<58}{results[case]['p50_ms']:>10.2f}{results[case]['p95_ms']:>10.2f}{results[case]['throughput_per_s']:>10.1f}")
+
+    scenarios_doc = ba_documents[len(ba_documents) // 2]
+    breakdowns = {}
+    for name, (user_input, planned_calls) in turn_scenarios(scenarios_doc).items():
+        openai.script = lambda request, planned_calls=planned_calls: (
+            {"tool_calls": planned_calls} if "tools" in request and planned_calls
+            else {"content": "Happy to help with monitoring. The value you asked about is shown above."}
+        )
+        case = f"turn:{name}"
+        results[case] = measure(cold(lambda: breakdowns.__setitem__(case, run_turn(user_input, client))), args.repeat, args.concurrency)
+        stages = ", ".join(f"{stage}={seconds * 1000:.1f}ms" for stage, seconds in sorted(breakdowns[case]["stages"].items()))
+        print(f"{case:<58}{results[case]['p50_ms']:>10.2f}{results[case]['p95_ms']:>10.2f}{results[case]['throughput_per_s']:>10.1f}  {stages}")
+
+    more.stop()
+    openai.stop()
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+        print(f"baseline saved to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"no baseline at {args.baseline}; run with --save-baseline to create one")
+        return 0
+    with open(args.baseline) as f:
+        regressions = compare_with_baseline(results, json.load(f), args.tolerance, args.min_delta_ms)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    if not regressions:
+        print("no regressions against the baseline")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,237 @@
+"""
+Local stand-ins for the MoRE API and the Azure OpenAI chat endpoint, served on
+ephemeral ports so benchmarks can point MORE_API_BASE_URL and
+AZURE_OPENAI_ENDPOINT at them.
+
+Both add a configurable latency per request; the OpenAI fake also streams
+tokens with a per-token delay and answers from a script, so a benchmark can make
+the main completion call a given tool.
+"""
+import json
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class _FakeServer:
+    handler_class = None
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._server = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def count_request(self):
+        with self._lock:
+            self.requests += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def start(self):
+        handler = type("Handler", (self.handler_class,), {"fake": self})
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, name=type(self).__name__, daemon=True).start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+class _JsonHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out in separate writes; without this, delayed ACKs add ~40ms per request
+    disable_nagle_algorithm = True
+
+    def log_message(self, *args):
+        pass
+
+    def read_json(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length)) if length else {}
+
+    def send_json(self, status, body):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+class _MoreHandler(_JsonHandler):
+    def _route(self, method):
+        self.fake.count_request()
+        path = self.path.split("?")[0].strip("/")
+        body = self.read_json() if method in ("POST", "PUT") else {}
+        return self.fake.respond(method, path, body, self.headers)
+
+    def _handle(self, method):
+        status, body = self._route(method)
+        self.send_json(status, body)
+
+    def do_GET(self):
+        self._handle("GET")
+
+    def do_POST(self):
+        self._handle("POST")
+
+    def do_PUT(self):
+        self._handle("PUT")
+
+    def do_DELETE(self):
+        status, body = self._route("DELETE")
+        if status == 204:
+            self.send_response(204)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+        else:
+            self.send_json(status, body)
+
+
+class FakeMoreServer(_FakeServer):
+    """
+    Serves the MoRE routes the tools call. assets_details maps a BA sysId to its
+    onboarding/assetsDetails response (see synthetic_data.make_assets_details).
+    Monitoring requests complete on the status_polls-th status poll.
+    """
+    handler_class = _MoreHandler
+
+    def __init__(self, latency=0.0, assets_details=None, status_polls=1):
+        super().__init__(latency)
+        self.assets_details = assets_details or {}
+        self.status_polls = status_polls
+        self.monitoring_requests = {}
+
+    def _new_request(self, payload):
+        requestId = uuid.uuid4().hex[:24]
+        self.monitoring_requests[requestId] = {"payload": payload, "polls": 0}
+        return 201, {"requestId": requestId}
+
+    def respond(self, method, path, body, headers):
+        if method == "POST" and path == "monitoringRequest":
+            return self._new_request(body)
+        if method == "PUT" and path == "monitoringRequest/updateMonitoring":
+            return self._new_request(body)
+        if method == "DELETE" and path.startswith("monitoringRequest/ci/"):
+            return 204, {}
+        match = re.fullmatch(r"monitoringRequests/([^/]+)/status", path)
+        if method == "GET" and match:
+            request = self.monitoring_requests.get(match.group(1))
+            if request is None:
+                return 404, {"message": "Request not found"}
+            request["polls"] += 1
+            done = request["polls"] >= self.status_polls
+            return 200, {
+                "requestId": match.group(1),
+                "status": "COMPLETED" if done else "IN_PROGRESS",
+                "assets": request["payload"].get("assets", []),
+                "assetsStatusInThousandEyes": [{"errors": []}],
+            }
+        match = re.fullmatch(r"onboarding/assetsDetails/([^/]+)", path)
+        if method == "POST" and match:
+            details = self.assets_details.get(match.group(1))
+            return (200, details) if details else (404, {"message": "BA not found"})
+        if method == "POST" and path == "onboarding/assetsList/thousandEyes":
+            return 200, {"data": [{"ciName": f"ba-{i}", "sysId": f"{i:032x}"} for i in range(25)]}
+        if method == "GET" and path == "users/userDetails":
+            return 200, {"userId": "benchuser", "firstName": "Bench", "lastName": "User"}
+        return 404, {"message": f"No fake for {method} /{path}"}
+
+
+class _OpenAIHandler(_JsonHandler):
+    def do_POST(self):
+        self.fake.count_request()
+        request = self.read_json()
+        reply = self.fake.reply_for(request)
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+        model = request.get("model", "gpt-4o-mini")
+        usage = {
+            "prompt_tokens": len(json.dumps(request.get("messages", []))) // 4,
+            "completion_tokens": len((reply.get("content") or "").split()) + 1,
+        }
+        usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+
+        if not request.get("stream"):
+            message = {"role": "assistant", "content": reply.get("content")}
+            if reply.get("tool_calls"):
+                message["tool_calls"] = [
+                    {"id": f"call_{i}", "type": "function", "function": {"name": call["name"], "arguments": json.dumps(call["arguments"])}}
+                    for i, call in enumerate(reply["tool_calls"])
+                ]
+            self.send_json(200, {
+                "id": completion_id, "object": "chat.completion", "created": int(time.time()), "model": model,
+                "choices": [{"index": 0, "message": message, "finish_reason": "tool_calls" if reply.get("tool_calls") else "stop"}],
+                "usage": usage,
+            })
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Connection", "close")
+        self.end_headers()
+
+        def send(delta, finish_reason=None):
+            chunk = {
+                "id": completion_id, "object": "chat.completion.chunk", "created": int(time.time()), "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+            }
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+            self.wfile.flush()
+
+        send({"role": "assistant", "content": ""})
+        for word in (reply.get("content") or "").split(" ") if reply.get("content") else []:
+            if self.fake.token_delay:
+                time.sleep(self.fake.token_delay)
+            send({"content": word + " "})
+        for i, call in enumerate(reply.get("tool_calls") or []):
+            send({"tool_calls": [{
+                "index": i, "id": f"call_{i}", "type": "function",
+                "function": {"name": call["name"], "arguments": json.dumps(call["arguments"])},
+            }]})
+        send({}, "tool_calls" if reply.get("tool_calls") else "stop")
+        if (request.get("stream_options") or {}).get("include_usage"):
+            chunk = {
+                "id": completion_id, "object": "chat.completion.chunk", "created": int(time.time()), "model": model,
+                "choices": [], "usage": usage,
+            }
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+        self.close_connection = True
+
+
+class FakeOpenAIServer(_FakeServer):
+    """
+    Answers chat completions (plain or streamed) at any path.
+
+    script(request) -> {"content": str} or {"tool_calls": [{"name", "arguments"}]}
+    decides each reply; by default requests that offer tools get no tool call and
+    every request gets a short canned answer.
+    """
+    handler_class = _OpenAIHandler
+
+    def __init__(self, latency=0.0, token_delay=0.0, script=None):
+        super().__init__(latency)
+        self.token_delay = token_delay
+        self.script = script
+
+    def reply_for(self, request):
+        if self.script is not None:
+            return self.script(request)
+        return {"content": "The requested value is shown in the configuration above."}
@@ -0,0 +1,133 @@
+"""
+Synthetic brownfield-ba-data documents shaped like the real collection.
+"""
+import random
+
+TEST_TYPES = ("HTTP", "WebTransaction", "Network", "DNS", "FTTP")
+AGENT_IDS = ("251041", "251146", "251226", "251306", "251386", "251471", "251556")
+INTERVALS = (60, 120, 300, 600, 900, 1800, 3600)
+ALERT_RULES = [
+    "HTTP Server Availability 0%",
+    "HTTP Server Availability Below 50%",
+    "HTTP Server Availability Below 75%",
+    "HTTP Server Availability Below 99%",
+    "Latency above 2x stddev",
+    "Latency above 450ms",
+    "Packet Loss: >= 25%",
+    "SSL Certificate Expiry: 1 day",
+    "SSL Certificate Expiry: 30 days",
+    "SSL Certificate Expiry: 7 days",
+    "Transport Layer Availability 0%",
+    "Transport Layer Availability Below 50%",
+    "Transport Layer Availability Below 75%",
+    "Transport Layer Availability Below 99%",
+]
+
+
+def sys_id(rng):
+    return "%032x" % rng.getrandbits(128)
+
+
+def make_endpoint(rng, name):
+    test_type = rng.choice(TEST_TYPES)
+    return {
+        "endpointSysId": sys_id(rng),
+        "endpointName": name,
+        "testName": f"{test_type} - {name}",
+        "testConfiguration": {
+            "type": f"ThousandEyes{test_type}Configuration",
+            "interval": rng.choice(INTERVALS),
+            "httpTimeLimit": rng.choice((5, 10, 15, 30)),
+            "url": f"https://{name}.example.com/health",
+            "agents": rng.sample(AGENT_IDS, rng.randint(1, 4)),
+            "agentSelect": "Static",
+            "alertsEnabled": True,
+            "enabled": True,
+            "alertRules": list(ALERT_RULES),
+        },
+    }
+
+
+def make_ba_document(n_endpoints, ba_index=0, n_bams=10, ba_level_share=0.2, seed=0):
+    """
+    Builds one BA with n_endpoints endpoints, ba_level_share of them at BA level
+    and the rest spread evenly over n_bams BAMs.
+    """
+    rng = random.Random(f"{seed}-{ba_index}")
+    ba_name = f"synthetic-ba-{ba_index}"
+    n_ba_level = int(n_endpoints * ba_level_share)
+    bams = [{"bamName": f"{ba_name}-bam-{i}", "bamSysId": sys_id(rng), "endpoints": []} for i in range(n_bams)]
+    for i in range(n_endpoints - n_ba_level):
+        bams[i % n_bams]["endpoints"].append(make_endpoint(rng, f"{ba_name}-bam-ep-{i}"))
+    return {
+        "baName": ba_name,
+        "baSysId": sys_id(rng),
+        "endpoints": [make_endpoint(rng, f"{ba_name}-ep-{i}") for i in range(n_ba_level)],
+        "bams": bams,
+    }
+
+
+def iter_all_endpoints(doc):
+    yield from doc.get("endpoints", [])
+    for bam in doc.get("bams", []):
+        yield from bam.get("endpoints", [])
+
+
+def make_monitoring_document(endpoint, criticality="3"):
+    """
+    The assetsMonitoringConfiguration document for a monitored endpoint.
+    """
+    return {
+        "data": {
+            "cmdbId": endpoint["endpointSysId"],
+            "monitoringCriticality": criticality,
+            "monitoringPlatform": "ThousandEyes",
+            "thousandEyesConfiguration": dict(endpoint["testConfiguration"]),
+        }
+    }
+
+
+def make_assets_details(doc, unmonitored_share=0.3, seed=0):
+    """
+    The MoRE onboarding/assetsDetails response for a BA, with unmonitored_share of
+    its endpoints reported with monitoringConfigurationType: null.
+    """
+    rng = random.Random(f"{seed}-{doc['baName']}-assets")
+
+    def app_endpoint(ep):
+        unmonitored = rng.random() < unmonitored_share
+        return {
+            "ciName": ep["endpointName"],
+            "sysId": ep["endpointSysId"],
+            "monitoringConfigurationType": None if unmonitored else "ThousandEyes",
+        }
+
+    return {
+        "assetDetails": {
+            "ciName": doc["baName"],
+            "sysId": doc["baSysId"],
+            "appInstances": [{"appEndpoints": [app_endpoint(ep) for ep in doc.get("endpoints", [])]}],
+            "bam": [
+                {"ciName": bam["bamName"], "appInstances": [{"appEndpoints": [app_endpoint(ep) for ep in bam["endpoints"]]}]}
+                for bam in doc.get("bams", [])
+            ],
+        }
+    }
+
+
+def make_dataset(sizes, seed=0):
+    """
+    One BA per entry of sizes (endpoint counts, e.g. 10 to 50_000) plus the
+    monitoring configuration of every endpoint.
+
+    Returns:
+        tuple: (ba_documents, monitoring_documents)
+    """
+    ba_documents = [
+        make_ba_document(n_endpoints, ba_index=i, n_bams=max(1, min(10, n_endpoints // 5)), seed=seed)
+        for i, n_endpoints in enumerate(sizes)
+    ]
+    monitoring_documents = [
+        make_monitoring_document(ep) for doc in ba_documents for ep in iter_all_endpoints(doc)
+    ]
+    return ba_documents, monitoring_documents
@@ -1,9 +1,23 @@
+import os
+import threading
+import time
+import uuid
+from functools import lru_cache
 from typing import TypedDict, List, Callable
-from langgraph.graph import StateGraph, END
+from langchain_core.runnables import RunnableConfig
+from langgraph.graph import StateGraph
+from langgraph.checkpoint.memory import MemorySaver
 from agents.reflect_summary_agent import reflect_and_summarize
-from agents.reflect_review_agent import review_monitor_arguments
-from tools.tool_functions import create_monitor
+from agents.reflect_review_agent import review_monitor_arguments, review_bulk_monitor_arguments
 from langsmith import traceable
+from dotenv import load_dotenv
+
+load_dotenv()
+# Paused flows nobody answers (closed tab, expired session) are dropped after this many seconds
+MONITOR_CONFIRMATION_TIMEOUT = float(os.getenv("MONITOR_CONFIRMATION_TIMEOUT", "3600"))
+
+# Tools that return a MoRE requestId the request tracker can follow
+TRACKED_TOOLS = {"create_monitor", "update_monitor", "bulk_create_monitors"}
 
 
 class MonitorState(TypedDict, total=False):
@@ -14,27 +28,95 @@ class MonitorState(TypedDict, total=False):
     monitor_args: dict
     result: str
     operation_type: str
+    # Existing assetsMonitoringConfiguration data for update flows, read once by Review and reused by Execute
+    existing_monitoring: dict
 
-def build_monitor_flow(openai_client, tool_function: Callable, operation_type: str):
 
-    builder = StateGraph(MonitorState)
+@traceable(name="Reflect & Summarize")
+def reflect(state: MonitorState, config: RunnableConfig) -> MonitorState:
+    openai_client = config["configurable"]["openai_client"]
+    summary = reflect_and_summarize(openai_client, state["chat_history"])
+    return {"summary": summary}
+
+
+@traceable(name="Generate Confirmation Prompt")
+def confirm_summary(state: MonitorState) -> MonitorState:
+    summary = state["summary"]
+    return {
+        "summary": summary,
+        "confirmation_prompt": f"Here is what I understood:\n\n{summary}\n\nDo you want to proceed? (Yes/No)"
+    }
 
-    @traceable(name="Reflect & Summarize")
-    def reflect(state: MonitorState) -> MonitorState:
-        summary = reflect_and_summarize(openai_client, state["chat_history"])
-        return {"summary": summary}
-
-    @traceable(name="Generate Confirmation Prompt")
-    def confirm_summary(state: MonitorState) -> MonitorState:
-        summary = state["summary"]
-        return {
-            "summary": summary,
-            "confirmation_prompt": f"Here is what I understood:\n\n{summary}\n\nDo you want to proceed? (Yes/No)"
+
+# thread_id -> (compiled flow, started) for every run not yet released
+_open_threads = {}
+_open_threads_lock = threading.Lock()
+
+
+def new_monitor_thread(monitor_flow, openai_client, tracking_key=None):
+    """
+    Config for one run of monitor_flow: a fresh checkpoint thread plus the
+    OpenAI client, which is passed per run so compiled graphs can be shared.
+    tracking_key names the conversation that gets the request's final status.
+    Runs still open after MONITOR_CONFIRMATION_TIMEOUT are released here.
+    """
+    release_stale_monitor_threads()
+    config = {
+        "configurable": {
+            "thread_id": str(uuid.uuid4()),
+            "openai_client": openai_client,
+            "tracking_key": tracking_key,
         }
+    }
+    with _open_threads_lock:
+        _open_threads[config["configurable"]["thread_id"]] = (monitor_flow, time.monotonic())
+    return config
+
+
+def release_monitor_thread(monitor_flow, config):
+    # Compiled flows are shared, so drop finished or abandoned threads from the checkpointer
+    if config is None:
+        return
+    thread_id = config["configurable"]["thread_id"]
+    with _open_threads_lock:
+        _open_threads.pop(thread_id, None)
+    checkpointer = monitor_flow.checkpointer
+    if hasattr(checkpointer, "delete_thread"):
+        checkpointer.delete_thread(thread_id)
+
+
+def release_stale_monitor_threads(timeout=MONITOR_CONFIRMATION_TIMEOUT):
+    cutoff = time.monotonic() - timeout
+    with _open_threads_lock:
+        stale = [(thread_id, flow) for thread_id, (flow, started) in _open_threads.items() if started < cutoff]
+    for thread_id, flow in stale:
+        release_monitor_thread(flow, {"configurable": {"thread_id": thread_id}})
+
+
+@lru_cache(maxsize=None)
+def build_monitor_flow(tool_function: Callable, operation_type: str):
+    """
+    Builds the Review -> Reflect -> Confirm -> Execute flow.
+
+    Compiled graphs are memoized per (tool_function, operation_type); run with
+    new_monitor_thread() as config. The graph is checkpointed and interrupts
+    before Execute, so the first invoke stops once the confirmation prompt is
+    ready. On "yes" the caller records the confirmation with update_state() and
+    resumes with invoke(None, config) on the same thread_id, which runs Execute
+    without repeating Review and Reflect.
+    """
+
+    builder = StateGraph(MonitorState)
 
     @traceable(name="Execute Monitor Resource")
-    def execute_tool(state: MonitorState) -> MonitorState:
+    def execute_tool(state: MonitorState, config: RunnableConfig) -> MonitorState:
+        if state.get("user_confirmation", "").lower() != "yes":
+            return {"result": "Okay, monitor action is cancelled. Please go on and ask for any queries"}
         args = state.get("monitor_args", {})
+        if operation_type == "update_monitor" and state.get("existing_monitoring") is not None:
+            args = {**args, "existing_monitoring": state["existing_monitoring"]}
+        if tool_function.__name__ in TRACKED_TOOLS:
+            args = {**args, "tracking_key": config["configurable"].get("tracking_key")}
         result = tool_function(**args)
         return {"result": result}
 
@@ -45,20 +127,21 @@ def build_monitor_flow(openai_client, tool_function: Callable, operation_type: s
     # Entry point and flow logic
     if tool_function.__name__ in ["create_monitor", "update_monitor"]:
         def review(state: MonitorState) -> MonitorState:
-            state["operation_type"] = operation_type  
+            state["operation_type"] = operation_type
             return review_monitor_arguments(state)
         builder.add_node("Review", review)
         builder.set_entry_point("Review")
         builder.add_edge("Review", "Reflect")
+    elif tool_function.__name__ == "bulk_create_monitors":
+        builder.add_node("Review", review_bulk_monitor_arguments)
+        builder.set_entry_point("Review")
+        builder.add_edge("Review", "Reflect")
     else:
         builder.set_entry_point("Reflect")
 
     # Common edges
     builder.add_edge("Reflect", "Confirm")
-    builder.add_conditional_edges(
-        "Confirm",
-        lambda state: "Execute" if state.get("user_confirmation", "").lower() == "yes" else END
-    )
+    builder.add_edge("Confirm", "Execute")
     builder.set_finish_point("Execute")
 
-    return builder.compile()
+    return builder.compile(checkpointer=MemorySaver(), interrupt_before=["Execute"])
@@ -0,0 +1,89 @@
+import os
+import json
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from dotenv import load_dotenv
+from utils.instrumentation import timed
+from tools.tool_functions import (
+    fetch_ba_level_information, fetch_endpoint_information,
+    compare_endpoint_charges, fetch_agent_information, fetch_newly_monitored_endpoint_configuration,
+    fetch_unmonitored_endpoints, update_monitor, delete_monitor, fetch_user_assets, create_monitor, bulk_create_monitors,
+    rank_test_charges, estimate_charge_change
+)
+
+load_dotenv()
+MAX_TOOL_WORKERS = int(os.getenv("MAX_TOOL_WORKERS", "4"))
+
+tool_map = {
+    "fetch_ba_level_information": fetch_ba_level_information,
+    "fetch_endpoint_information": fetch_endpoint_information,
+    "compare_endpoint_charges": compare_endpoint_charges,
+    "rank_test_charges": rank_test_charges,
+    "estimate_charge_change": estimate_charge_change,
+    "fetch_agent_information": fetch_agent_information,
+    "fetch_newly_monitored_endpoint_configuration": fetch_newly_monitored_endpoint_configuration,
+    "fetch_unmonitored_endpoints": fetch_unmonitored_endpoints,
+    "update_monitor": update_monitor,
+    "delete_monitor": delete_monitor,
+    "create_monitor": create_monitor,
+    "bulk_create_monitors": bulk_create_monitors,
+    "fetch_user_assets": fetch_user_assets
+}
+
+# These go through build_monitor_flow for review and user confirmation
+MUTATING_TOOLS = {"create_monitor", "bulk_create_monitors", "update_monitor", "delete_monitor"}
+
+# Tools that can return their answer as a generator: LLM narration token by token, or pages of a large listing
+STREAMING_TOOLS = {
+    "fetch_endpoint_information",
+    "compare_endpoint_charges",
+    "fetch_newly_monitored_endpoint_configuration",
+    "fetch_unmonitored_endpoints",
+}
+
+
+def parse_tool_calls(tool_calls):
+    """
+    Turns model tool calls into (name, args) pairs and splits them into read-only and mutating calls.
+    """
+    read_only, mutating = [], []
+    for tool_call in tool_calls:
+        call = (tool_call.name, json.loads(tool_call.arguments or "{}"))
+        (mutating if tool_call.name in MUTATING_TOOLS else read_only).append(call)
+    return read_only, mutating
+
+
+def run_tool(func_name, args, **tool_kwargs):
+    tool_function = tool_map.get(func_name)
+    if tool_function is None or func_name in MUTATING_TOOLS:
+        return "❌ Unsupported function."
+    try:
+        # Streaming tools return a generator, so only the time until their first output is counted here
+        with timed("tool", tool=func_name):
+            return tool_function(**args, **tool_kwargs)
+    except Exception as e:
+        return f"❌ Error: {str(e)}"
+
+
+def run_read_only_tools(calls, **tool_kwargs):
+    """
+    Runs independent read-only tool calls concurrently on a bounded thread pool.
+
+    Args:
+        calls (list): (func_name, args) pairs from parse_tool_calls().
+        tool_kwargs: Arguments every tool receives (openai_client, app_key, user_input).
+
+    Returns:
+        list: One reply per call, in the order of `calls`. A failing tool yields
+        an error message instead of failing the whole batch.
+    """
+    if len(calls) <= 1:
+        return [run_tool(func_name, args, **tool_kwargs) for func_name, args in calls]
+
+    with ThreadPoolExecutor(max_workers=min(MAX_TOOL_WORKERS, len(calls))) as executor:
+        # Each call runs in a copy of the caller's context so its timings land in the current turn
+        futures = [
+            executor.submit(contextvars.copy_context().run, run_tool, func_name, args, **tool_kwargs)
+            for func_name, args in calls
+        ]
+        return [future.result() for future in futures]
@@ -0,0 +1,151 @@
+import re
+import threading
+from utils.endpoint_index import get_endpoint_index
+from utils.helpers import resolve_agent
+from utils.instrumentation import increment, register_collector
+
+# MoRE request ids are Mongo ObjectIds, ServiceNow sysIds are 32 hex characters
+REQUEST_ID_PATTERN = re.compile(r"\b[0-9a-f]{24}\b", re.IGNORECASE)
+SYS_ID_PATTERN = re.compile(r"\b[0-9a-f]{32}\b", re.IGNORECASE)
+
+# Anything that could be a monitor change always goes to the LLM and the confirmation flow.
+# "monitor" counts as a verb at the start of a request ("monitor X", "please monitor", "to monitor")
+# or before what it acts on ("monitor endpoint X", "monitor it"), not as a noun ("the monitor for X")
+MUTATION_PATTERN = re.compile(
+    r"\b(create|update|delete|remove|add|modify|change|edit|onboard|set( ?up)?|make|new|start|stop|pause|resume"
+    r"|enable|disable|turn (on|off)|increase|decrease|raise|lower|reduce|extend|shorten)\b"
+    r"|(^\W*|\b(please|pls|to|you|and|then|also)\s+)monitor\b"
+    r"|\bmonitor\s+(endpoints?|it|this|that|these|those|them|all|[0-9a-f]{32})\b",
+    re.IGNORECASE
+)
+REQUEST_STATUS_PATTERN = re.compile(r"\b(request|status|tracking)\b", re.IGNORECASE)
+CHARGE_PATTERN = re.compile(r"\b(compare|charges?|costs?|consum\w*)\b", re.IGNORECASE)
+BA_LISTING_PATTERN = re.compile(r"\b(bams?|modules?|endpoints?)\b", re.IGNORECASE)
+AGENT_PATTERN = re.compile(r"\b(agents?|runs? on|running on|tests? on)\b", re.IGNORECASE)
+
+# Capitalised words that may follow or precede a BA name without being part of it
+BA_SUFFIX_WORDS = {"ba", "bas", "bam", "bams", "business", "application"}
+
+# How many earlier user messages count as the conversation's current topic
+RECENT_USER_MESSAGES = 2
+
+_stats = {"fast_path": 0, "llm": 0}
+_stats_lock = threading.Lock()
+
+
+def recent_user_messages(chat_history):
+    return [str(content) for role, content in chat_history if role == "user"][-RECENT_USER_MESSAGES:]
+
+
+def _match_known_ba(text):
+    """
+    The known BA named in text, matched on word boundaries, or None when no BA,
+    several BAs, or a longer name than any known BA (e.g. "Ordering Portal" when
+    only "Ordering" is known) appears.
+    """
+    matches = [
+        (name, match) for name in get_endpoint_index().ba_names()
+        for match in re.finditer(r"(?<!\w)" + re.escape(name) + r"(?!\w)", text, re.IGNORECASE)
+    ]
+    if not matches:
+        return None
+
+    # Prefer the longest name so "Foo Bar" wins over "Foo"; any other BA outside its span is ambiguous
+    name, span = max(matches, key=lambda item: len(item[0]))
+    if any(m.start() < span.start() or m.end() > span.end() for _, m in matches):
+        return None
+
+    # A capitalised word next to the match means the text names something longer than the known BA
+    # (the first word of the text is capitalised anyway)
+    preceding = text[:span.start()].split()
+    neighbours = [
+        word.strip(".,;:!?\"'()") for word in preceding[-1:] * (len(preceding) > 1) + text[span.end():].split()[:1]
+    ]
+    if any(word[:1].isupper() and word.lower() not in BA_SUFFIX_WORDS for word in neighbours):
+        return None
+    return name
+
+
+def _route(text):
+    stripped = text.strip()
+    if MUTATION_PATTERN.search(stripped):
+        return None
+
+    request_ids = REQUEST_ID_PATTERN.findall(stripped)
+    sys_ids = SYS_ID_PATTERN.findall(stripped)
+
+    if len(request_ids) == 1 and not sys_ids:
+        if stripped == request_ids[0] or REQUEST_STATUS_PATTERN.search(stripped):
+            return "fetch_newly_monitored_endpoint_configuration", {"requestId": request_ids[0]}
+        return None
+
+    if len(sys_ids) == 2 and CHARGE_PATTERN.search(stripped):
+        return "compare_endpoint_charges", {"endpoint_sysId1": sys_ids[0], "endpoint_sysId2": sys_ids[1]}
+
+    if len(sys_ids) == 1:
+        if re.search(r"\bunmonitored\b", stripped, re.IGNORECASE):
+            return "fetch_unmonitored_endpoints", {"baSysId": sys_ids[0]}
+        if stripped == sys_ids[0]:
+            return "fetch_endpoint_information", {"endpoint_sysId": sys_ids[0]}
+        return None
+
+    if sys_ids or request_ids:
+        return None
+
+    if AGENT_PATTERN.search(stripped):
+        agent = resolve_agent(stripped)
+        if agent:
+            return "fetch_agent_information", {"agentName": agent[0]}
+
+    if BA_LISTING_PATTERN.search(stripped) and not re.search(r"\bunmonitored\b", stripped, re.IGNORECASE):
+        ba_name = _match_known_ba(stripped)
+        if ba_name:
+            return "fetch_ba_level_information", {"baName": ba_name}
+
+    return None
+
+
+def fast_route(user_input, chat_history=()):
+    """
+    Maps obvious requests straight to a tool without the main LLM call.
+
+    Only high-confidence shapes are routed: a request id, a bare endpoint sysId,
+    two sysIds with a charge question, an unmonitored-endpoints question for a BA
+    sysId, a known agent location, or a BAM/endpoint listing for a known BA name.
+    Anything that looks like a monitor change, or is ambiguous, returns None so
+    the caller falls back to the LLM. So does any input while a monitor change is
+    being discussed in chat_history (earlier (role, content) entries), since a bare
+    sysId is then most likely the answer to "which endpoint?".
+
+    Returns:
+        tuple | None: (func_name, args) for the tool in tool_map, or None.
+    """
+    try:
+        if any(MUTATION_PATTERN.search(content) for content in recent_user_messages(chat_history)):
+            route = None
+        else:
+            route = _route(user_input)
+    except Exception as e:
+        print(f"Fast path router failed, falling back to LLM: {e}")
+        route = None
+
+    with _stats_lock:
+        _stats["fast_path" if route else "llm"] += 1
+    if route:
+        increment("monitorease_fast_path_routes_total", help_text="Turns routed without the main LLM call", tool=route[0])
+    return route
+
+
+def _route_metrics():
+    stats = fast_path_stats()
+    for route in ("fast_path", "llm"):
+        yield "monitorease_routed_turns", {"route": route}, stats[route]
+
+
+register_collector(_route_metrics)
+
+
+def fast_path_stats():
+    with _stats_lock:
+        total = _stats["fast_path"] + _stats["llm"]
+        return {**_stats, "total": total, "fast_path_ratio": _stats["fast_path"] / total if total else 0.0}
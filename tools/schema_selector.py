@@ -0,0 +1,113 @@
+import re
+from tools.tool_schema import tools
+from tools.fast_router import (
+    MUTATION_PATTERN, REQUEST_STATUS_PATTERN, CHARGE_PATTERN, BA_LISTING_PATTERN, AGENT_PATTERN,
+    REQUEST_ID_PATTERN, SYS_ID_PATTERN, recent_user_messages
+)
+from utils.instrumentation import increment
+
+# Tools offered together; a turn gets the union of the groups its signals point to
+TOOL_GROUPS = {
+    "mutation": ("create_monitor", "bulk_create_monitors", "update_monitor", "delete_monitor"),
+    "lookup": (
+        "fetch_ba_level_information", "fetch_endpoint_information", "fetch_agent_information",
+        "fetch_newly_monitored_endpoint_configuration", "fetch_unmonitored_endpoints", "fetch_user_assets",
+    ),
+    "charges": ("compare_endpoint_charges", "rank_test_charges", "estimate_charge_change"),
+}
+
+# Answers to the parameter questions of a create/update flow, e.g. "HTTP, interval 300, https://..."
+MONITOR_PARAMETER_PATTERN = re.compile(
+    r"\b(interval|criticality|time ?limit|dns ?servers?|domain|https?://\S+|HTTP|DNS|FTTP|WebTransaction|Network)\b",
+    re.IGNORECASE
+)
+# Nouns that point at a lookup, but also appear in change requests ("the config of X")
+LOOKUP_PATTERN = re.compile(
+    r"\b(details?|info\w*|config\w*|unmonitored|not monitored|assets?|my (apps?|applications?)|BAs?)\b", re.IGNORECASE
+)
+# A lookup noun or bare sysId only counts as a lookup when the turn is phrased as a question
+QUESTION_PATTERN = re.compile(
+    r"^\W*(what|which|who|when|where|how|why|show|list|get|fetch|tell|give|find|display|is|are|does|do)\b|\?\s*$",
+    re.IGNORECASE
+)
+CHARGE_QUESTION_PATTERN = re.compile(r"\b(expensive|cheap\w*|rank\w*|top \d+|what if|estimate\w*|saving\w*|units?)\b", re.IGNORECASE)
+
+SMALL_TALK_PATTERN = re.compile(
+    r"^\W*(hi|hello|hey|thanks|thank you|ok|okay|good (morning|afternoon|evening)|bye)( there| a lot| so much)?\W*$",
+    re.IGNORECASE
+)
+
+
+def _groups_for(text):
+    """
+    Groups text points to on its own, or None when its only signal is lookup
+    nouns or a sysId outside a question, which a monitor change can also contain.
+    """
+    groups = set()
+    if MUTATION_PATTERN.search(text):
+        groups.add("mutation")
+    elif MONITOR_PARAMETER_PATTERN.search(text):
+        # "interval 300" answers a monitor change; "what is the interval?" may also be a lookup
+        groups.add("mutation")
+        if QUESTION_PATTERN.search(text):
+            groups.add("lookup")
+    if CHARGE_PATTERN.search(text) or CHARGE_QUESTION_PATTERN.search(text):
+        groups.add("charges")
+    if (
+        BA_LISTING_PATTERN.search(text) or AGENT_PATTERN.search(text)
+        or REQUEST_STATUS_PATTERN.search(text) or REQUEST_ID_PATTERN.search(text)
+    ):
+        groups.add("lookup")
+    if not groups and (LOOKUP_PATTERN.search(text) or SYS_ID_PATTERN.search(text)):
+        if not QUESTION_PATTERN.search(text):
+            return None
+        groups.add("lookup")
+    return groups
+
+
+def select_tool_groups(user_input, chat_history=()):
+    """
+    Tool groups relevant to this turn, from the user input and, when it has no
+    signal of its own (e.g. "yes, 300 seconds"), from the recent user messages.
+
+    Args:
+        user_input (str): The current user message.
+        chat_history (list): Earlier (role, content) entries, without user_input.
+
+    Returns:
+        set | None: Group names from TOOL_GROUPS (empty for small talk), or None
+        when the turn is ambiguous and every tool should be offered.
+    """
+    if SMALL_TALK_PATTERN.match(user_input):
+        return set()
+
+    groups = _groups_for(user_input)
+    if groups is None:
+        return None
+    recent = [_groups_for(content) or set() for content in recent_user_messages(chat_history)]
+    earlier = set().union(*recent)
+
+    # Parameters, or a bare sysId, while a monitor change is being discussed keep the mutation tools
+    if "mutation" in earlier and (MONITOR_PARAMETER_PATTERN.search(user_input) or groups == {"lookup"}):
+        groups.add("mutation")
+    if not groups:
+        groups = earlier
+    return groups or None
+
+
+def select_tools(user_input, chat_history=(), all_tools=tools):
+    """
+    Function schemas to send with the main completion for this turn, in schema order.
+    Falls back to all_tools when the turn gives no signal; empty for small talk,
+    in which case the call should be made without tools.
+    """
+    groups = select_tool_groups(user_input, chat_history)
+    if groups is None:
+        increment("monitorease_tool_selection_total", help_text="Tool schema selections per turn", outcome="all")
+        return all_tools
+
+    names = {name for group in groups for name in TOOL_GROUPS[group]}
+    increment(
+        "monitorease_tool_selection_total", help_text="Tool schema selections per turn", outcome="+".join(sorted(groups)) or "none"
+    )
+    return [tool for tool in all_tools if tool["function"]["name"] in names]
@@ -1,53 +1,84 @@
 import json
-import requests
-from utils.mongo_loader import connect_mongo
-from utils.helpers import list_bams, list_endpoints, summarize_projection, extract_null_monitoring_endpoints
-from utils.monitoring_payload_utils import format_monitoring_payload, format_get_assets_payload
-from dotenv import load_dotenv
 import os
-from copy import deepcopy
+from dotenv import load_dotenv
+from utils.mongo_loader import get_collection
+from utils.endpoint_index import get_endpoint_index
+from utils.ba_queries import find_matched_endpoint_document, find_bam_names, find_endpoint_listing, find_ba_counts
+from utils.monitoring_config import find_existing_monitoring
+from utils.helpers import list_bams, list_endpoints, summarize_counts, iter_null_monitoring_endpoints, resolve_agent, AGENT_MAPPING
+from utils.monitoring_payload_utils import format_monitoring_payload, format_get_assets_payload
+from utils.bulk_monitoring import validate_bulk_endpoints, pack_monitoring_requests, submit_monitoring_requests, format_bulk_report
+from utils.more_client import get_more_client, get_error_message
+from utils.request_tracker import get_request_tracker
+from utils.llm_cache import chat_completion_text, stream_completion_text
+from utils.intent_router import route_ba_intent
+from utils.charge_model import ChargeTable, format_consumption
+from utils.prompt_pruning import compact_for_prompt
 from langsmith import traceable
 
-
 load_dotenv()
-more_api_key = os.getenv("MORE_API_KEY")
+# Unmonitored endpoints are rendered this many at a time while the response is still downloading
+UNMONITORED_PAGE_SIZE = int(os.getenv("UNMONITORED_PAGE_SIZE", "50"))
+
+
+def _track_request(requestId, tracking_key):
+    # With a tracking key the final status is pushed to the conversation instead of the user asking for it
+    if tracking_key and requestId:
+        get_request_tracker().track(requestId, tracking_key)
+        return "I will post the status of your request here once it is processed."
+    return "Please check after some time to see the status of your request"
 
 @traceable(name="Create Monitor")
-def create_monitor(endpoint_sysId, testType, configurations, monitoringCriticality):
+def create_monitor(endpoint_sysId, testType, configurations, monitoringCriticality, tracking_key=None):
     payload = format_monitoring_payload(
         endpoint_sysId=endpoint_sysId,
         monitoringCriticality=monitoringCriticality,
         configurations=configurations,
         testType=testType
     )
-    response = requests.post("https://more-api-dev.cisco.com/api/v1/monitoringRequest", headers={
-        "Content-Type": "application/json",
-        "Authorization": "Bearer " + more_api_key,
-    }, json=payload)
+    response = get_more_client().post("monitoringRequest", json=payload)
 
     requestId = response.json().get("requestId")
     if response.status_code == 201:
-        return f"Monitoring created for `{endpoint_sysId}` with test type `{testType}. Please track you application status using tracking Id : {requestId}`. Please check after some time to see the status of your request"
+        return f"Monitoring created for `{endpoint_sysId}` with test type `{testType}. Please track you application status using tracking Id : {requestId}`. " + _track_request(requestId, tracking_key)
     else:
-        error_description = response.json().get("errorDescription", [])
-        if isinstance(error_description, list) and error_description:
-            error_message = error_description[0]
-        else:
-            error_message = str(error_description)
+        error_message = get_error_message(response)
 
         return f"Failed to create {testType} test to monitor {endpoint_sysId}. Error: {error_message}"
 
+@traceable(name="Bulk Create Monitors")
+def bulk_create_monitors(endpoints, testType=None, monitoringCriticality=None, configurations=None, tracking_key=None):
+    valid, rejected = validate_bulk_endpoints(endpoints, testType, monitoringCriticality, configurations)
+    if not valid:
+        return "❌ None of the endpoints can be monitored.\n\n" + format_bulk_report(valid, rejected)
+
+    payloads = pack_monitoring_requests(valid)
+    results = submit_monitoring_requests(payloads)
+    submitted = sum(1 for status, _, _ in results.values() if status == "submitted")
+    requestIds = {requestId for _, _, requestId in results.values() if requestId}
+    for requestId in requestIds:
+        _track_request(requestId, tracking_key)
+    follow_up = (
+        "I will post the status of each request here once it is processed."
+        if tracking_key and requestIds else "Please check after some time to see the status of your requests."
+    )
+    return (
+        f"Submitted {submitted} of {len(valid) + len(rejected)} endpoints in {len(payloads)} monitoring request(s). "
+        f"{follow_up}\n\n"
+        + format_bulk_report(valid, rejected, results)
+    )
+
 @traceable(name="Update Monitor")   
-def update_monitor(endpoint_sysId, testType, configurations):
-    db = connect_mongo()
-    collection = db["assetsMonitoringConfiguration"]
-    existingEndpointData = collection.find_one({"data.cmdbId": endpoint_sysId})
+def update_monitor(endpoint_sysId, testType, configurations, existing_monitoring=None, tracking_key=None):
+    # The monitor flow passes the configuration its Review step already read
+    if existing_monitoring is None:
+        existing_monitoring = find_existing_monitoring(endpoint_sysId)
 
-    if not existingEndpointData:
+    if not existing_monitoring:
         return f"❌ No existing monitoring configuration found for endpoint `{endpoint_sysId}`. Please create a new monitor instead."
 
-    monitoringCriticality = existingEndpointData.get("data", {}).get("monitoringCriticality", "5")
-    existingEndpointConfiguration = existingEndpointData.get("data", {}).get("thousandEyesConfiguration", {})
+    monitoringCriticality = existing_monitoring.get("monitoringCriticality", "5")
+    existingEndpointConfiguration = existing_monitoring.get("thousandEyesConfiguration", {})
  
     if not existingEndpointConfiguration:
         return f"❌ No existing monitoring configuration found for endpoint `{endpoint_sysId}`. Please create a new monitor instead."
@@ -65,234 +96,237 @@ def update_monitor(endpoint_sysId, testType, configurations):
         ]
     }
 
-    response = requests.put("https://more-api-dev.cisco.com/api/v1/monitoringRequest/updateMonitoring", headers={
-        "Content-Type": "application/json",
-        "Authorization": "Bearer " + more_api_key,
-    }, json=payload)
+    response = get_more_client().put("monitoringRequest/updateMonitoring", json=payload)
 
     requestId = response.json().get("requestId")
     if response.status_code == 201:
-        return f"Monitoring updated for `{endpoint_sysId}` with test type `{testType}. Please track you application status using tracking Id : {requestId}`. Please check after some time to see the status of your request"
+        return f"Monitoring updated for `{endpoint_sysId}` with test type `{testType}. Please track you application status using tracking Id : {requestId}`. " + _track_request(requestId, tracking_key)
     else:
-        error_description = response.json().get("errorDescription", [])
-        if isinstance(error_description, list) and error_description:
-            error_message = error_description[0]
-        else:
-            error_message = str(error_description)
+        error_message = get_error_message(response)
 
         return f"Failed to update {testType} test to monitor {endpoint_sysId}. Error: {error_message}"
 
 @traceable(name="Delete Monitor")
 def delete_monitor(endpoint_sysId):
-    response = requests.delete(f"https://more-api-dev.cisco.com/api/v1/monitoringRequest/ci/{endpoint_sysId}?monitoringPlatform=ThousandEyes", headers={
-        "Content-Type": "application/json",
-        "Authorization": "Bearer " + more_api_key,
-    })
+    response = get_more_client().delete(
+        f"monitoringRequest/ci/{endpoint_sysId}", params={"monitoringPlatform": "ThousandEyes"}
+    )
 
     if response.status_code == 202 or response.status_code == 204:
         return f"Monitoring deleted for {endpoint_sysId}"
     else:
-        error_description = response.json().get("errorDescription", [])
-        if isinstance(error_description, list) and error_description:
-            error_message = error_description[0]
-        else:
-            error_message = str(error_description)
+        error_message = get_error_message(response)
 
         return f"Failed to delete test which was monitoring {endpoint_sysId}. Error: {error_message}"
 
 @traceable(name="Fetch BA Level Information")
 def fetch_ba_level_information(baName: str, user_input: str, openai_client, app_key):
-    db = connect_mongo()
-    collection = db["brownfield-ba-data"]
-    ba_data = collection.find_one({"baName": baName})
+    # Keyword router first, the LLM only decides ambiguous questions
+    tool = route_ba_intent(user_input, openai_client, app_key)
+
+    # Each intent reads only the fields it needs instead of the whole BA document
+    if tool == "list_bams":
+        ba_data = find_bam_names(baName)
+    elif tool == "list_endpoints":
+        ba_data = find_endpoint_listing(baName)
+    elif tool == "summarize":
+        ba_data = find_ba_counts(baName)
+    else:
+        return "Sorry, at this point of time I do not support this request"
 
     if not ba_data:
         return f"❌ No data found for Business Application `{baName}`."
-    
-    # Let LLM decide the intent and target
-    intent_response = openai_client.chat.completions.create(
-        model="gpt-4o-mini",
-        messages=[
-            {"role": "system", 
-             "content": 
-                """You are a tool router for a monitoring assistant. The user will ask questions about business applications (BAs), business application modules (BAMs), and endpoints (systems monitored in ThousandEyes). 
-                - If the user asks for a list of modules, return {"tool": "list_bams"}.
-                - If the user asks for a list of endpoints or monitored systems, return {"tool": "list_endpoints"}.
-                - If the user asks for a summary or count of endpoints, return {"tool": "summarize"}.
-                - If the intent is unclear or unsupported, return {"tool": "unknown"}.
-
-                BAs are business applications, BAMs are modules within a BA, and endpoints are systems where monitoring is set up in ThousandEyes.
 
-                Always return a JSON object with the key "tool"."""
-            },
-            {"role": "user", "content": user_input}
-        ],
-        user=json.dumps({"appkey": app_key})
-    )
-    tool = json.loads(intent_response.choices[0].message.content).get("tool")
-    
     if tool == "list_bams":
         return "\n".join(list_bams(ba_data))
     elif tool == "list_endpoints":
         return list_endpoints(ba_data)
-    elif tool == "summarize":
-        return summarize_projection(ba_data)
     else:
-        return "Sorry, at this point of time I do not support this request"
+        return summarize_counts(ba_data)
 
 @traceable(name="Get Matched Endpoint")
-def get_matched_endpoint(db, endpoint_sysId):
-    collection = db["brownfield-ba-data"]
+def get_matched_endpoint(endpoint_sysId):
+    index = get_endpoint_index()
+    matched_endpoint = index.lookup(endpoint_sysId)
+    if matched_endpoint:
+        return matched_endpoint
 
-    doc = collection.find_one({
-        "$or": [
-            {"endpoints.endpointSysId": endpoint_sysId},
-            {"bams.endpoints.endpointSysId": endpoint_sysId}
-        ]
-    })
+    # Not in the index yet (e.g. onboarded after the last refresh): fetch just this
+    # endpoint and its BA/BAM context from Mongo and patch it into the index
+    doc = find_matched_endpoint_document(endpoint_sysId)
 
     if not doc:
         return f"❌ No data found for endpoint in MoRE `{endpoint_sysId}`."
-    # Extract the matching endpoint
-    matched_endpoint = None
-    source = ""
-
-    # Check top-level endpoints
-    for ep in doc.get("endpoints", []):
-        if ep.get("endpointSysId") == endpoint_sysId:
-            matched_endpoint = deepcopy(ep)
-            source = "BA"
-            break
-
-    # Check inside BAMS if not found
-    if not matched_endpoint:
-        for bam in doc.get("bams", []):
-            for ep in bam.get("endpoints", []):
-                if ep.get("endpointSysId") == endpoint_sysId:
-                    matched_endpoint = deepcopy(ep)
-                    matched_endpoint["bamName"] = bam.get("bamName")
-                    matched_endpoint["bamSysId"] = bam.get("bamSysId")
-                    source = "BAM"
-                    break
-            if matched_endpoint:
-                break
 
+    index.merge_ba(doc)
+    matched_endpoint = index.lookup(endpoint_sysId)
     if not matched_endpoint:
         return f"❌ Endpoint `{endpoint_sysId}` not found in any known BA/BAM structure."
-
-    #add context metadata from the parent document
-    matched_endpoint["baName"] = doc.get("baName")
-    matched_endpoint["baSysId"] = doc.get("baSysId")
-    matched_endpoint["source"] = source 
     return matched_endpoint
 
 @traceable(name="Fetch Endpoint Information")
-def fetch_endpoint_information(endpoint_sysId: str, user_input: str, openai_client, app_key):
-    db = connect_mongo()
-    matched_endpoint = get_matched_endpoint(db, endpoint_sysId)
-
-    response = openai_client.chat.completions.create(
-        model="gpt-4o-mini",
+def fetch_endpoint_information(endpoint_sysId: str, user_input: str, openai_client, app_key, stream=False):
+    matched_endpoint = get_matched_endpoint(endpoint_sysId)
+
+    complete = stream_completion_text if stream else chat_completion_text
+    return complete(
+        openai_client,
+        app_key=app_key,
+        cache="endpoint_information",
+        cache_tags=[endpoint_sysId],
         messages=[
             {"role": "system",
                 "content": (
                     "You are a helpful assistant. "
-                    "You will be given endpoint data in JSON format and a user question. "
+                    "You will be given endpoint data (compact JSON or key=value lines) and a user question. "
                     "Answer the user's question using only the provided data. "
                     "If the answer is not present, say you don't have enough information."
                 )
             },
-            {"role": "user", "content": f"Endpoint data: {json.dumps(matched_endpoint)}\n\nQuestion: {user_input}"}
-        ],
-        user=json.dumps({"appkey": app_key})
+            {"role": "user", "content": f"Endpoint data: {compact_for_prompt(matched_endpoint, 'fetch_endpoint_information', user_input)}\n\nQuestion: {user_input}"}
+        ]
     )
-    return response.choices[0].message.content
+
+def _charge_row(endpoint, inputs, consumption):
+    return {
+        "endpointSysId": endpoint.get("endpointSysId"),
+        "testName": endpoint.get("testName"),
+        "baName": endpoint.get("baName"),
+        "bamName": endpoint.get("bamName"),
+        "url": (endpoint.get("testConfiguration") or {}).get("url"),
+        "interval": float(inputs["interval"]),
+        "timeLimit": float(inputs["timeLimit"]),
+        "agents": int(inputs["agents"]),
+        "monthlyConsumption": int(round(float(consumption))),
+    }
 
 @traceable(name="Compare Endpoint Charges")
-def compare_endpoint_charges(endpoint_sysId1: str, endpoint_sysId2: str, openai_client, app_key, user_input):
-    db = connect_mongo()
-    matched_endpoint1 = get_matched_endpoint(db, endpoint_sysId1)
-    matched_endpoint2 = get_matched_endpoint(db, endpoint_sysId2)
+def compare_endpoint_charges(endpoint_sysId1: str, endpoint_sysId2: str, openai_client, app_key, user_input, stream=False):
+    matched_endpoint1 = get_matched_endpoint(endpoint_sysId1)
+    matched_endpoint2 = get_matched_endpoint(endpoint_sysId2)
+    for matched_endpoint in (matched_endpoint1, matched_endpoint2):
+        if isinstance(matched_endpoint, str):
+            return matched_endpoint
+
+    # The numbers come from the local charge model, the LLM only explains them
+    table = ChargeTable([matched_endpoint1, matched_endpoint2])
+    rows = [
+        _charge_row(endpoint, {"interval": table.interval[i], "timeLimit": table.time_limit[i], "agents": int(table.agents[i])}, table.consumption[i])
+        if table.unknown_reason(i) is None
+        else {"endpointSysId": endpoint.get("endpointSysId"), "monthlyConsumption": f"unknown ({table.unknown_reason(i)})"}
+        for i, endpoint in enumerate(table.endpoints)
+    ]
 
-    response = openai_client.chat.completions.create(
-        model="gpt-4o-mini",
+    complete = stream_completion_text if stream else chat_completion_text
+    return complete(
+        openai_client,
+        app_key=app_key,
+        cache="compare_endpoint_charges",
+        cache_tags=[endpoint_sysId1, endpoint_sysId2],
         messages=[
             {"role": "system",
                 "content": (
-                    "You are a helpful assistant who will compare config of 2 test and explain why there is charge difference. "
-                    "You will be given endpoints data where it will have test information of both endpoints in JSON format"
-                    "Configuration strictly responsible for consumption or charges are interval, timeLimit and number of agents assigned to the endpoint"
-                    "Do not consider any other configuration for charge comparison"
-                    "So you have to answer back user in natural language why their one test is consuming more than the other"
+                    "You are a helpful assistant who will explain why there is a charge difference between 2 tests. "
+                    "You will be given precomputed charge data for both tests (compact JSON or key=value lines). "
+                    "monthlyConsumption is agent-seconds per month, computed as agents * (seconds in 30 days / interval) * timeLimit. "
+                    "Use only these numbers and do not recompute or invent other figures. "
+                    "Explain in natural language which of interval, timeLimit and number of agents makes one test consume more than the other. "
                     "If you don't have answer, say you don't have enough information."
                 )
             },
-            {"role": "user", "content": f"Endpoint data1: {json.dumps(matched_endpoint1)}\nEndpoint data2: {json.dumps(matched_endpoint2)}"}],
-        user=json.dumps({"appkey": app_key})
+            {"role": "user", "content": f"Charge data: {compact_for_prompt(rows, 'compare_endpoint_charges', user_input)}\n\nQuestion: {user_input}"}]
+    )
+
+def _unknown_note(table):
+    unknown = table.unknown()
+    return f", {unknown} without an interval or agents not counted" if unknown else ""
+
+@traceable(name="Rank Test Charges")
+def rank_test_charges(openai_client, app_key, user_input, baName: str = None, top_n: int = 20):
+    # The model may pass "5" or 5.0
+    try:
+        top_n = int(top_n)
+    except (TypeError, ValueError):
+        return f"❌ top_n must be a whole number, got {top_n!r}."
+    if top_n < 1:
+        return f"❌ top_n must be at least 1, got {top_n}."
+
+    endpoints = get_endpoint_index().endpoints_for_ba(baName)
+    if not endpoints:
+        return f"❌ No data found for Business Application `{baName}`." if baName else "❌ No monitored endpoints found."
+
+    table = ChargeTable(endpoints)
+    scope = f"BA `{baName}`" if baName else "all BAs"
+    lines = [
+        f'{rank}. testName: "{endpoint.get("testName")}", endpointSysId: "{endpoint.get("endpointSysId")}", '
+        f'interval: {inputs["interval"]:.0f}s, timeLimit: {inputs["timeLimit"]:.0f}s, agents: {inputs["agents"]} '
+        f'-> {format_consumption(consumption)} ({share:.1%} of total)'
+        for rank, (endpoint, inputs, consumption, share) in enumerate(table.top(top_n), start=1)
+    ]
+    return (
+        f"Top {len(lines)} most expensive tests in {scope} "
+        f"(total {format_consumption(table.total())} across {len(table)} tests{_unknown_note(table)}):\n\n" + "\n".join(lines)
+    )
+
+@traceable(name="Estimate Charge Change")
+def estimate_charge_change(openai_client, app_key, user_input, baName: str = None, endpoint_sysId: str = None,
+                           interval_factor: float = 1.0, time_limit_factor: float = 1.0, agents_delta: int = 0):
+    # Factors scale the current values (0.5 halves, 2 doubles); zero or less would divide by zero or go negative
+    for name, factor in (("interval_factor", interval_factor), ("time_limit_factor", time_limit_factor)):
+        if factor <= 0:
+            return f"❌ {name} must be greater than 0 (e.g. 0.5 to halve, 2 to double), got {factor:g}."
+
+    if endpoint_sysId:
+        matched_endpoint = get_matched_endpoint(endpoint_sysId)
+        if isinstance(matched_endpoint, str):
+            return matched_endpoint
+        endpoints, scope = [matched_endpoint], f"endpoint `{endpoint_sysId}`"
+    else:
+        endpoints = get_endpoint_index().endpoints_for_ba(baName)
+        scope = f"BA `{baName}`" if baName else "all BAs"
+    if not endpoints:
+        return f"❌ No monitored endpoints found for {scope}."
+
+    table = ChargeTable(endpoints)
+    current = table.total()
+    projected = table.what_if(interval_factor, time_limit_factor, agents_delta)
+    change = (projected - current) / current if current else 0.0
+    return (
+        f"Estimated monthly consumption for {scope} ({len(table)} tests{_unknown_note(table)}):\n\n"
+        f"- Current: {format_consumption(current)}\n"
+        f"- Projected: {format_consumption(projected)} ({change:+.1%})\n\n"
+        f"Assumes interval x{interval_factor:g}, time limit x{time_limit_factor:g}, agents {agents_delta:+d} per test."
     )
-    return response.choices[0].message.content
 
 @traceable(name="Fetch Agent Information")
 def fetch_agent_information(agentName: str, openai_client, app_key, user_input):
+    agent = resolve_agent(agentName)
+    if not agent:
+        known_agents = "\n".join(f"- {name}" for name in AGENT_MAPPING)
+        return f"❌ Could not find an agent matching `{agentName}`. Known agents are:\n{known_agents}"
 
-    agentMapping = {
-        "Cisco: San Jose, CA" :  251041,
-        "Cisco: Allen/Richardson, TX" : 251146,
-        "Cisco: Raleigh, NC" : 251226,
-        "Cisco: Almere, Netherlands" : 251306,
-        "Cisco: Bangalore, India" : 251386,
-        "Cisco: Tokyo, Japan" : 251471,
-        "Cisco: St. Leonards, Australia" : 251556
-    }
+    resolvedAgentName, agentId = agent
+    results = get_endpoint_index().endpoints_for_agent(agentId)
+    if not results:
+        return f"ℹ️ No tests are running on agent `{resolvedAgentName}`."
 
-    response = openai_client.chat.completions.create(
-        model="gpt-4o-mini",
-        messages=[
-            {"role": "system",
-                "content": (
-                    "You are a assistant who is expert in analyzing mapping data and user input to return correct data."
-                    "You will get an agentMapping and also an user input which will have user input"
-                    "You have to only return the agentId based on the user input which maps to the correct agentName present in agentmapping"
-                    "If you don't have answer, say you don't have enough information."
-                )
-            },
-            {"role": "user", "content": f"Endpoint data1: {json.dumps(agentMapping)}\nUser input: {agentName}"}],
-        user=json.dumps({"appkey": app_key})
-    )
-    agentId = response.choices[0].message.content
-    db = connect_mongo()
-    collection = db["brownfield-ba-data"]
-
-    pipeline = [
-        { "$unwind": "$endpoints" },
-        { "$match": { "endpoints.testConfiguration.agents": agentId } },
-        { 
-            "$project": { 
-                "_id": 0, 
-                "testName": "$endpoints.testName",
-                "endpointSysId": "$endpoints.endpointSysId"
-            } 
-        }
-    ]   
-
-    results = list(collection.aggregate(pipeline))
-    # return results
     formatted_results = [
-        f'testName: "{result["testName"]}", endpointSysId: "{result["endpointSysId"]}"\n'
+        f'testName: "{result["testName"]}", endpointSysId: "{result["endpointSysId"]}", '
+        f'baName: "{result["baName"]}"' + (f', bamName: "{result["bamName"]}"' if result["bamName"] else "") + "\n"
         for result in results
     ]
 
-    return "\n".join(formatted_results)
+    return f"Tests running on `{resolvedAgentName}`:\n\n" + "\n".join(formatted_results)
 
 @traceable(name="Fetch newly monitored endpoint configuration")
-def fetch_newly_monitored_endpoint_configuration(requestId: str, openai_client, app_key, user_input):
-    response = requests.get(f"https://more-api-dev.cisco.com/api/v1/monitoringRequests/{requestId}/status", headers={
-        "Content-Type": "application/json",
-        "Authorization": "Bearer " + more_api_key,
-    })
+def fetch_newly_monitored_endpoint_configuration(requestId: str, openai_client, app_key, user_input, stream=False):
+    response = get_more_client().get(f"monitoringRequests/{requestId}/status")
     testInformation = response.json()
-    response = openai_client.chat.completions.create(
-        model="gpt-4o-mini",
+    # Not cached: the status payload changes while the request is processed
+    complete = stream_completion_text if stream else chat_completion_text
+    return complete(
+        openai_client,
+        app_key=app_key,
         messages=[
             {"role": "system",
                 "content": (
@@ -306,34 +340,45 @@ def fetch_newly_monitored_endpoint_configuration(requestId: str, openai_client,
                     "Important: If the user query includes both a request ID and configuration/test context (e.g., 'What configuration was used for request <id>'), do **not** return the status. Return the monitoringConfiguration instead.\n"
                 )
             },
-            {"role": "user", "content": f"Required information : {json.dumps(testInformation)}\n"}],
-        user=json.dumps({"appkey": app_key})
+            {"role": "user", "content": f"Required information : {compact_for_prompt(testInformation, 'fetch_newly_monitored_endpoint_configuration', user_input)}\n"}]
     )
-    return response.choices[0].message.content
 
-@traceable(name="Fetch Unmonitored Endpoints")
-def fetch_unmonitored_endpoints(baSysId, openai_client, app_key, user_input):
+def _iter_unmonitored_endpoint_pages(baSysId, page_size):
     print(f"Fetching unmonitored endpoints for BA SysId: {baSysId}")
-    response = requests.post(f"https://more-api-dev.cisco.com/api/v1/onboarding/assetsDetails/{baSysId}", headers={
-        "Content-Type": "application/json",
-        "Authorization": "Bearer " + more_api_key,
-    })
-    endpoints = extract_null_monitoring_endpoints(response.json())
-    formatted_results = [
-        f'endpointName: "{result["endpointName"]}", endpointSysId: "{result["endpointSysId"]}"\n'
-            for result in endpoints
-    ]
+    # Parse the body as it downloads instead of loading the whole assetsDetails payload
+    with get_more_client().post(f"onboarding/assetsDetails/{baSysId}", stream=True) as response:
+        if response.status_code != 200:
+            # An error body has no endpoints to parse, so it would read as "none found"
+            error_message = get_error_message(response)
+            yield f"❌ Failed to fetch unmonitored endpoints for BA `{baSysId}`. Error: {error_message}"
+            return
+        response.raw.decode_content = True
+        page, total = [], 0
+        for result in iter_null_monitoring_endpoints(response.raw):
+            page.append(f'endpointName: "{result["endpointName"]}", endpointSysId: "{result["endpointSysId"]}"\n')
+            if len(page) == page_size:
+                total += len(page)
+                yield "\n".join(page) + "\n"
+                page = []
+        total += len(page)
+        if page:
+            yield "\n".join(page) + "\n"
+        yield f"\n{total} unmonitored endpoint(s) found." if total else "No unmonitored endpoints found."
 
-    output = "\n".join(formatted_results) 
-    return output
+@traceable(name="Fetch Unmonitored Endpoints")
+def fetch_unmonitored_endpoints(baSysId, openai_client, app_key, user_input, stream=False):
+    pages = _iter_unmonitored_endpoint_pages(baSysId, UNMONITORED_PAGE_SIZE)
+    if stream:
+        # Each page renders as soon as it is parsed
+        return pages
+    return "".join(pages)
     
  # Update or insert the userID in the MongoDB collection 'clientIdToUserMapping' for the record with clientId="monoh-dev-integration".
 
 @traceable(name="Set User ID in MongoDB")
 def set_user_id_in_mongo(userId):
     try:
-        db = connect_mongo()
-        collection = db["clientIdToUserMapping"]
+        collection = get_collection("clientIdToUserMapping")
         result = collection.update_one(
             {"clientId": "monoh-dev-integration"},
             {"$set": {"userId": userId}},
@@ -368,14 +413,10 @@ def fetch_user_assets(userId: str, openai_client, app_key, user_input: str):
         enabled=True
     )
     print(f"Payload: {json.dumps(payload, indent=2)}")
-    # Set the user in the headers as auth-user
-    headers = {
-        "Content-Type": "application/json",
-        "Authorization": "Bearer " + more_api_key,
-        "auth-user": userId
-    }
-    # Make a post request to the more API
-    response = requests.post("https://more-api-dev.cisco.com/api/v1/onboarding/assetsList/thousandEyes", headers=headers, json=payload)
+    # Make a post request to the more API with the user set as auth-user
+    response = get_more_client().post(
+        "onboarding/assetsList/thousandEyes", headers={"auth-user": userId}, json=payload
+    )
 
     # Handle response
     if response.status_code == 200:
@@ -391,10 +432,6 @@ def fetch_user_assets(userId: str, openai_client, app_key, user_input: str):
         return f"✅ Assets associated with user `{userId}`:\n\n{asset_list}"
 
     else:
-        error_description = response.json().get("errorDescription", [])
-        if isinstance(error_description, list) and error_description:
-            error_message = error_description[0]
-        else:
-            error_message = str(error_description)
+        error_message = get_error_message(response)
 
         return f"❌ Failed to fetch assets for user `{userId}`. Error: {error_message}"
\ No newline at end of file
@@ -39,6 +39,55 @@ functions = [
             "required": ["endpoint_sysId", "testType", "monitoringCriticality", "configurations"]
         }
     },
+    {
+        "name": "bulk_create_monitors",
+        "description": "Creates thousandeyes tests for many endpoints at once, e.g. the endpoints listed by fetch_unmonitored_endpoints. testType, monitoringCriticality and configurations are shared defaults; each endpoint can override them. Ask for the shared parameters before creating the tests",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "endpoints": {
+                    "type": "array",
+                    "description": "Endpoints to monitor",
+                    "items": {
+                        "type": "object",
+                        "properties": {
+                            "endpoint_sysId": { "type": "string", "description": "sysId of the endpoint" },
+                            "endpointName": { "type": "string", "description": "Name of the endpoint" },
+                            "testType": { "type": "string", "description": "Overrides the shared testType" },
+                            "monitoringCriticality": { "type": "string", "description": "Overrides the shared criticality" },
+                            "configurations": { "type": "object", "description": "Overrides for the shared configurations, typically the url" }
+                        },
+                        "required": ["endpoint_sysId"]
+                    }
+                },
+                "testType": {
+                    "type": "string",
+                    "description": "Type of test to create for every endpoint. Must be one of: HTTP, WebTransaction, Network, DNS, FTTP."
+                },
+                "monitoringCriticality": {
+                    "type": "string",
+                    "description": "Criticality from 1 (low) to 5 (high) for every endpoint"
+                },
+                "configurations": {
+                    "type": "object",
+                    "description": "Configuration shared by every endpoint",
+                    "properties": {
+                        "interval": { "type": "integer", "description": "Polling interval in seconds" },
+                        "httpTimeLimit": { "type": "integer", "description": "Time limit for HTTP" },
+                        "timeLimit": { "type": "integer", "description": "Time limit for WebTransaction" },
+                        "fttpTimeLimit": { "type": "integer", "description": "Time limit for FTTP" },
+                        "dnsServers": {
+                            "type": "array",
+                            "items": { "type": "string", "format": "ipv4" },
+                            "description": "DNS servers to use (only for DNS tests)"
+                        },
+                        "domain": { "type": "string", "description": "Domain to monitor (only for DNS tests)" }
+                    }
+                }
+            },
+            "required": ["endpoints"]
+        }
+    },
     {
         "name": "update_monitor",
         "description": "Updates a thousandeyes test configuration for application/update monitored endpoint's configurations. Requires endpoint_sysId and testType, and optionally allows updating configurations. You should ask user what configuration you wants to update and then proceed",
@@ -134,6 +183,52 @@ functions = [
             "required": ["endpoint_sysId1","endpoint_sysId2"]
         }
     },
+    {
+        "name": "rank_test_charges",
+        "description": "When user asks which tests or endpoints are the most expensive or consume the most, e.g. 'top 20 most expensive tests in BA X'. Leave baName empty to rank across all BAs",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "baName": {
+                    "type": "string",
+                    "description": "Name of the business application to rank, omit for all business applications"
+                },
+                "top_n": {
+                    "type": "integer",
+                    "description": "Number of tests to return, at least 1, defaults to 20"
+                }
+            }
+        }
+    },
+    {
+        "name": "estimate_charge_change",
+        "description": "When user asks what a configuration change would cost, e.g. 'what would halving the interval cost for BA X'. Halving the interval is interval_factor 0.5, doubling the time limit is time_limit_factor 2, adding an agent is agents_delta 1. Give either an endpoint sysId or a BA name, or neither for all BAs",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "baName": {
+                    "type": "string",
+                    "description": "Name of the business application to estimate for"
+                },
+                "endpoint_sysId": {
+                    "type": "string",
+                    "description": "Application Id of a single monitored endpoint to estimate for"
+                },
+                "interval_factor": {
+                    "type": "number",
+                    "description": "Multiplier applied to every test interval, greater than 0, defaults to 1"
+                },
+                "time_limit_factor": {
+                    "type": "number",
+                    "description": "Multiplier applied to every test time limit, greater than 0, defaults to 1"
+                },
+                "agents_delta": {
+                    "type": "integer",
+                    "description": "Number of agents added (or removed if negative) per test, defaults to 0"
+                }
+            }
+        }
+    },
     {
         "name": "fetch_agent_information",
         "description": "When user asks queries based on agent name or agent id to know the endpoints/tests associated with the specific agent",
@@ -191,3 +286,6 @@ functions = [
         }
     },
 ]
+
+# Same schemas in the tools format, which lets the model return several tool calls per turn
+tools = [{"type": "function", "function": function} for function in functions]
@@ -0,0 +1,103 @@
+from utils.mongo_loader import get_collection
+
+BA_COLLECTION = "brownfield-ba-data"
+
+
+def _ifnull_list(expression):
+    return {"$ifNull": [expression, []]}
+
+
+def _filter_endpoints(expression, endpoint_sysId):
+    return {
+        "$filter": {
+            "input": _ifnull_list(expression),
+            "as": "ep",
+            "cond": {"$eq": ["$$ep.endpointSysId", endpoint_sysId]},
+        }
+    }
+
+
+def matched_endpoint_pipeline(endpoint_sysId):
+    """
+    Aggregation that returns a BA document trimmed down to the one matched
+    endpoint, keeping the BA name/sysId and, for BAM endpoints, only the BAM
+    that holds it.
+    """
+    return [
+        {"$match": {"$or": [
+            {"endpoints.endpointSysId": endpoint_sysId},
+            {"bams.endpoints.endpointSysId": endpoint_sysId},
+        ]}},
+        {"$limit": 1},
+        {"$project": {
+            "_id": 0,
+            "baName": 1,
+            "baSysId": 1,
+            "endpoints": _filter_endpoints("$endpoints", endpoint_sysId),
+            "bams": {
+                "$filter": {
+                    "input": {
+                        "$map": {
+                            "input": _ifnull_list("$bams"),
+                            "as": "bam",
+                            "in": {
+                                "bamName": "$$bam.bamName",
+                                "bamSysId": "$$bam.bamSysId",
+                                "endpoints": _filter_endpoints("$$bam.endpoints", endpoint_sysId),
+                            },
+                        }
+                    },
+                    "as": "bam",
+                    "cond": {"$gt": [{"$size": "$$bam.endpoints"}, 0]},
+                }
+            },
+        }},
+    ]
+
+
+BAM_NAMES_PROJECTION = {"_id": 0, "baName": 1, "bams.bamName": 1}
+
+ENDPOINT_LISTING_PROJECTION = {
+    "_id": 0,
+    "baName": 1,
+    "endpoints.endpointName": 1,
+    "endpoints.endpointSysId": 1,
+    "bams.endpoints.endpointName": 1,
+    "bams.endpoints.endpointSysId": 1,
+}
+
+
+def ba_counts_pipeline(baName):
+    return [
+        {"$match": {"baName": baName}},
+        {"$limit": 1},
+        {"$project": {
+            "_id": 0,
+            "baName": 1,
+            "bamCount": {"$size": _ifnull_list("$bams")},
+            "endpointCount": {"$add": [
+                {"$size": _ifnull_list("$endpoints")},
+                {"$sum": {"$map": {
+                    "input": _ifnull_list("$bams"),
+                    "as": "bam",
+                    "in": {"$size": _ifnull_list("$$bam.endpoints")},
+                }}},
+            ]},
+        }},
+    ]
+
+
+def find_matched_endpoint_document(endpoint_sysId):
+    return next(get_collection(BA_COLLECTION).aggregate(matched_endpoint_pipeline(endpoint_sysId)), None)
+
+
+def find_bam_names(baName):
+    return get_collection(BA_COLLECTION).find_one({"baName": baName}, BAM_NAMES_PROJECTION)
+
+
+def find_endpoint_listing(baName):
+    return get_collection(BA_COLLECTION).find_one({"baName": baName}, ENDPOINT_LISTING_PROJECTION)
+
+
+def find_ba_counts(baName):
+    return next(get_collection(BA_COLLECTION).aggregate(ba_counts_pipeline(baName)), None)
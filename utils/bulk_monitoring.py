@@ -0,0 +1,196 @@
+"""
+Bulk monitor creation: validates many endpoints locally in one pass, packs them
+into as few monitoringRequest calls as MoRE accepts and submits the chunks
+concurrently.
+
+Endpoints with the same criticality and final test configuration share one
+`assets` entry, so e.g. 200 DNS tests with the same servers become one entry
+with 200 sysIds.
+"""
+import csv
+import io
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from dotenv import load_dotenv
+from utils.monitoring_payload_utils import build_monitoring_configuration, format_monitoring_asset
+from utils.more_client import get_more_client, get_error_message
+
+load_dotenv()
+# Most sysIds MoRE accepts in one monitoringRequest, and how many requests run at once
+BULK_CREATE_MAX_SYSIDS = int(os.getenv("BULK_CREATE_MAX_SYSIDS", "50"))
+BULK_CREATE_WORKERS = int(os.getenv("BULK_CREATE_WORKERS", "4"))
+
+TEST_TYPES = ("HTTP", "WebTransaction", "Network", "DNS", "FTTP")
+INTEGER_FIELDS = ("interval", "httpTimeLimit", "timeLimit", "fttpTimeLimit")
+CONFIG_FIELDS = INTEGER_FIELDS + ("url", "dnsServers", "domain")
+
+
+def _csv_value(field, value):
+    if field in INTEGER_FIELDS:
+        return int(value)
+    if field == "dnsServers":
+        return [server.strip() for server in value.replace(";", ",").split(",") if server.strip()]
+    return value
+
+
+def parse_monitor_csv(data):
+    """
+    Reads endpoints from a CSV with an endpoint_sysId (or endpointSysId) column and
+    optional endpointName, testType, monitoringCriticality and configuration columns
+    (interval, url, httpTimeLimit, timeLimit, fttpTimeLimit, dnsServers, domain).
+    Empty cells fall back to the defaults given to bulk_create_monitors.
+
+    Args:
+        data (str | bytes): CSV content.
+
+    Returns:
+        list: Endpoints in the shape bulk_create_monitors expects.
+    """
+    if isinstance(data, bytes):
+        data = data.decode("utf-8-sig")
+
+    endpoints = []
+    for row in csv.DictReader(io.StringIO(data)):
+        row = {key.strip(): (value or "").strip() for key, value in row.items() if key}
+        endpoint = {
+            "endpoint_sysId": row.get("endpoint_sysId") or row.get("endpointSysId", ""),
+            "configurations": {},
+        }
+        for key in ("endpointName", "testType", "monitoringCriticality"):
+            if row.get(key):
+                endpoint[key] = row[key]
+        for field in CONFIG_FIELDS:
+            if row.get(field):
+                try:
+                    endpoint["configurations"][field] = _csv_value(field, row[field])
+                except ValueError:
+                    # Left as text so validation reports it against this endpoint
+                    endpoint["configurations"][field] = row[field]
+        endpoints.append(endpoint)
+    return endpoints
+
+
+def validate_bulk_endpoints(endpoints, testType=None, monitoringCriticality=None, configurations=None):
+    """
+    Resolves every endpoint against the shared defaults and validates it, without any network call.
+
+    Returns:
+        tuple: (valid, rejected). valid is a list of dicts with endpoint_sysId, endpointName,
+        testType, monitoringCriticality and the final monitoringConfiguration; rejected is a
+        list of (endpoint_sysId, endpointName, reason).
+    """
+    valid, rejected, seen = [], [], set()
+    for endpoint in endpoints:
+        sysId = str(endpoint.get("endpoint_sysId") or endpoint.get("endpointSysId") or "").strip()
+        name = endpoint.get("endpointName", "")
+        test_type = endpoint.get("testType") or testType
+        criticality = str(endpoint.get("monitoringCriticality") or monitoringCriticality or "")
+        config = {**(configurations or {}), **(endpoint.get("configurations") or {})}
+
+        if not sysId:
+            rejected.append((sysId, name, "endpoint_sysId is missing"))
+            continue
+        if sysId in seen:
+            rejected.append((sysId, name, "listed more than once"))
+            continue
+        seen.add(sysId)
+        if test_type not in TEST_TYPES:
+            rejected.append((sysId, name, f"testType must be one of: {', '.join(TEST_TYPES)}"))
+            continue
+        if criticality not in ("1", "2", "3", "4", "5"):
+            rejected.append((sysId, name, "monitoringCriticality must be 1 to 5"))
+            continue
+        bad_fields = [field for field in INTEGER_FIELDS if field in config and not isinstance(config[field], int)]
+        if bad_fields:
+            rejected.append((sysId, name, f"{', '.join(bad_fields)} must be a whole number"))
+            continue
+        try:
+            monitoring_configuration = build_monitoring_configuration(config, test_type)
+        except ValueError as e:
+            rejected.append((sysId, name, str(e).split("\n")[0]))
+            continue
+
+        valid.append({
+            "endpoint_sysId": sysId,
+            "endpointName": name,
+            "testType": test_type,
+            "monitoringCriticality": criticality,
+            "monitoringConfiguration": monitoring_configuration,
+        })
+    return valid, rejected
+
+
+def pack_monitoring_requests(valid, max_sysids=BULK_CREATE_MAX_SYSIDS):
+    """
+    Groups endpoints with identical criticality and configuration into one asset
+    entry and splits the assets into payloads of at most max_sysids sysIds.
+
+    Returns:
+        list: monitoringRequest payloads ({"assets": [...]}).
+    """
+    groups = {}
+    for endpoint in valid:
+        key = (endpoint["monitoringCriticality"], json.dumps(endpoint["monitoringConfiguration"], sort_keys=True))
+        groups.setdefault(key, []).append(endpoint)
+
+    payloads, assets, size = [], [], 0
+    for group in groups.values():
+        criticality = group[0]["monitoringCriticality"]
+        configuration = group[0]["monitoringConfiguration"]
+        sysIds = [endpoint["endpoint_sysId"] for endpoint in group]
+        while sysIds:
+            take = sysIds[:max_sysids - size]
+            sysIds = sysIds[len(take):]
+            assets.append(format_monitoring_asset(take, criticality, configuration))
+            size += len(take)
+            if size == max_sysids:
+                payloads.append({"assets": assets})
+                assets, size = [], 0
+    if assets:
+        payloads.append({"assets": assets})
+    return payloads
+
+
+def _submit(payload):
+    sysIds = [sysId for asset in payload["assets"] for sysId in asset["sysIds"]]
+    try:
+        response = get_more_client().post("monitoringRequest", json=payload)
+    except Exception as e:
+        return {sysId: ("failed", str(e), None) for sysId in sysIds}
+
+    if response.status_code == 201:
+        requestId = response.json().get("requestId")
+        return {sysId: ("submitted", f"tracking Id {requestId}", requestId) for sysId in sysIds}
+    return {sysId: ("failed", get_error_message(response), None) for sysId in sysIds}
+
+
+def submit_monitoring_requests(payloads, max_workers=BULK_CREATE_WORKERS):
+    """
+    Posts the payloads concurrently on a bounded pool.
+
+    Returns:
+        dict: endpoint_sysId -> (status, detail, requestId) for every sysId in the payloads.
+    """
+    results = {}
+    if not payloads:
+        return results
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(payloads))) as executor:
+        for chunk_results in executor.map(_submit, payloads):
+            results.update(chunk_results)
+    return results
+
+
+def format_bulk_report(valid, rejected, results=None):
+    """
+    Markdown table with one row per endpoint. Without results it previews what would be submitted.
+    """
+    lines = ["| Endpoint | sysId | Test | Status | Detail |", "|---|---|---|---|---|"]
+    for endpoint in valid:
+        status, detail, _ = (results or {}).get(endpoint["endpoint_sysId"], ("ready", "", None))
+        lines.append(
+            f"| {endpoint['endpointName']} | `{endpoint['endpoint_sysId']}` | {endpoint['testType']} | {status} | {detail} |"
+        )
+    for sysId, name, reason in rejected:
+        lines.append(f"| {name} | `{sysId}` | | rejected | {reason} |")
+    return "\n".join(lines)
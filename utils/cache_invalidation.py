@@ -0,0 +1,227 @@
+"""
+Keeps the in-process caches in step with writes to brownfield-ba-data and
+assetsMonitoringConfiguration.
+
+A background thread consumes a Mongo change stream and patches or evicts the
+affected entries by baName, endpointSysId and cmdbId. Change streams need a
+replica set; on a standalone server the watcher falls back to polling and
+diffing document digests, which the server computes so only changed BAs are
+downloaded.
+
+To try it locally, start a single node replica set and run the watcher in the
+foreground, then edit documents from another shell:
+
+    mongod --replSet rs0 --dbpath /tmp/rs0 &
+    mongosh --eval "rs.initiate()"
+    MORE_MONGO_URI=mongodb://localhost:27017/?replicaSet=rs0 python -m utils.cache_invalidation
+"""
+import hashlib
+import os
+import threading
+import bson
+from dotenv import load_dotenv
+from pymongo.errors import OperationFailure, PyMongoError
+from utils.mongo_loader import connect_mongo
+from utils.endpoint_index import get_endpoint_index, BA_PROJECTION
+from utils.llm_cache import get_llm_cache
+from utils.ba_queries import BA_COLLECTION
+from utils.monitoring_config import MONITORING_COLLECTION, MONITORING_PROJECTION
+
+load_dotenv()
+CACHE_WATCH_POLL_INTERVAL = float(os.getenv("CACHE_WATCH_POLL_INTERVAL", "60"))
+
+# Error codes Mongo returns for $changeStream on a standalone server
+CHANGE_STREAMS_UNSUPPORTED = {40573, 40324}
+# Error codes for an unknown aggregation operator, on servers without $toHashedIndexKey
+AGGREGATION_OPERATOR_UNSUPPORTED = {168, 31325}
+
+_handlers = {"baName": [], "endpointSysId": [], "cmdbId": []}
+
+
+def register_invalidation_handler(key, handler):
+    """
+    Registers handler(value, document) to run when data for a baName, endpointSysId or cmdbId changes.
+    document is the changed BA / monitoring document when known, otherwise None.
+    """
+    _handlers[key].append(handler)
+
+
+def invalidate(key, value, document=None):
+    for handler in _handlers[key]:
+        try:
+            handler(value, document)
+        except Exception as e:
+            print(f"Cache invalidation handler for {key}={value} failed: {e}")
+
+
+def _patch_endpoint_index(baName, document):
+    index = get_endpoint_index()
+    # A removed BA takes its endpoints' cached answers with it, a replaced one only the changed endpoints'
+    changed = index.remove_ba(baName) if document is None else index.replace_ba(document)
+    for endpoint_sysId in changed:
+        invalidate("endpointSysId", endpoint_sysId)
+
+
+def _evict_llm_answers(value, document=None):
+    get_llm_cache().invalidate_tag(value)
+
+
+register_invalidation_handler("baName", _patch_endpoint_index)
+register_invalidation_handler("endpointSysId", _evict_llm_answers)
+# cmdbId in assetsMonitoringConfiguration is the endpoint sysId
+register_invalidation_handler("cmdbId", _evict_llm_answers)
+
+
+def _digest(document):
+    return hashlib.sha1(bson.encode(document)).hexdigest()
+
+
+def _server_digests(collection, projection, key):
+    # {key: hash of the projected document}, without downloading the documents
+    pipeline = [
+        {"$project": projection},
+        {"$project": {"_id": 0, "key": f"${key}", "digest": {"$toHashedIndexKey": "$$ROOT"}}},
+    ]
+    return {doc.get("key"): doc["digest"] for doc in collection.aggregate(pipeline)}
+
+
+def _client_digests(collection, projection, key):
+    digests = {}
+    for doc in collection.find({}, projection):
+        value = doc
+        for part in key.split("."):
+            value = (value or {}).get(part)
+        digests[value] = _digest(doc)
+    return digests
+
+
+class CacheInvalidationWatcher(threading.Thread):
+    def __init__(self, poll_interval=CACHE_WATCH_POLL_INTERVAL):
+        super().__init__(name="cache-invalidation-watcher", daemon=True)
+        self.poll_interval = poll_interval
+        self.mode = None
+        self._stop_event = threading.Event()
+        self._resume_token = None
+        self._ba_digests = None
+        self._monitoring_digests = None
+        self._digests = _server_digests
+
+    def stop(self):
+        self._stop_event.set()
+
+    def run(self):
+        while not self._stop_event.is_set():
+            try:
+                self.mode = "change_stream"
+                self._watch()
+            except OperationFailure as e:
+                if e.code in CHANGE_STREAMS_UNSUPPORTED:
+                    print("Change streams unavailable, polling for cache invalidation instead")
+                    self.mode = "polling"
+                    self._poll_forever()
+                    return
+                print(f"Change stream failed, retrying: {e}")
+                self._stop_event.wait(self.poll_interval)
+            except PyMongoError as e:
+                print(f"Change stream failed, retrying: {e}")
+                self._stop_event.wait(self.poll_interval)
+
+    def _watch(self):
+        pipeline = [{"$match": {"ns.coll": {"$in": [BA_COLLECTION, MONITORING_COLLECTION]}}}]
+        with connect_mongo().watch(
+            pipeline, full_document="updateLookup", resume_after=self._resume_token, max_await_time_ms=1000
+        ) as stream:
+            # Every write now reaches the endpoint index through the stream, so it
+            # needs no TTL rebuilds until the stream ends (e.g. on a fall back to polling)
+            index = get_endpoint_index()
+            ttl, index.ttl = index.ttl, None
+            try:
+                while not self._stop_event.is_set() and stream.alive:
+                    change = stream.try_next()
+                    if change is not None:
+                        self.handle_change(change)
+                        self._resume_token = stream.resume_token
+            finally:
+                index.ttl = ttl
+
+    def handle_change(self, change):
+        collection = change["ns"]["coll"]
+        document = change.get("fullDocument")
+
+        if collection == BA_COLLECTION:
+            if document is None:
+                # Deletes carry only the _id, so the BA is unknown: rebuild the whole index
+                get_endpoint_index().invalidate()
+            else:
+                invalidate("baName", document.get("baName"), document)
+        elif collection == MONITORING_COLLECTION and document is not None:
+            cmdbId = document.get("data", {}).get("cmdbId")
+            if cmdbId:
+                invalidate("cmdbId", cmdbId, document)
+
+    def _poll_forever(self):
+        while not self._stop_event.is_set():
+            try:
+                self.poll_once()
+            except PyMongoError as e:
+                print(f"Cache invalidation poll failed: {e}")
+            self._stop_event.wait(self.poll_interval)
+
+    def poll_once(self):
+        """
+        Diffs per-document digests against the previous poll and downloads only the
+        BAs that changed. The first poll only records a baseline.
+        """
+        db = connect_mongo()
+        try:
+            ba_digests = self._digests(db[BA_COLLECTION], BA_PROJECTION, "baName")
+        except OperationFailure as e:
+            if self._digests is not _server_digests or e.code not in AGGREGATION_OPERATOR_UNSUPPORTED:
+                raise
+            print("Server-side digests unavailable, hashing documents locally instead")
+            self._digests = _client_digests
+            ba_digests = self._digests(db[BA_COLLECTION], BA_PROJECTION, "baName")
+
+        if self._ba_digests is not None:
+            changed = [
+                name for name in self._ba_digests.keys() | ba_digests.keys()
+                if self._ba_digests.get(name) != ba_digests.get(name)
+            ]
+            ba_docs = (
+                {doc.get("baName"): doc for doc in db[BA_COLLECTION].find({"baName": {"$in": changed}}, BA_PROJECTION)}
+                if changed else {}
+            )
+            for name in changed:
+                invalidate("baName", name, ba_docs.get(name))
+        self._ba_digests = ba_digests
+
+        monitoring_digests = self._digests(db[MONITORING_COLLECTION], MONITORING_PROJECTION, "data.cmdbId")
+        if self._monitoring_digests is not None:
+            for cmdbId in self._monitoring_digests.keys() | monitoring_digests.keys():
+                if cmdbId and self._monitoring_digests.get(cmdbId) != monitoring_digests.get(cmdbId):
+                    invalidate("cmdbId", cmdbId)
+        self._monitoring_digests = monitoring_digests
+
+
+_watcher = None
+_watcher_lock = threading.Lock()
+
+
+def start_cache_watcher():
+    global _watcher
+    with _watcher_lock:
+        if _watcher is None or not _watcher.is_alive():
+            _watcher = CacheInvalidationWatcher()
+            _watcher.start()
+    return _watcher
+
+
+if __name__ == "__main__":
+    for key in _handlers:
+        register_invalidation_handler(key, lambda value, document, key=key: print(f"invalidated {key}={value}"))
+    watcher = start_cache_watcher()
+    try:
+        while watcher.is_alive():
+            watcher.join(1)
+    except KeyboardInterrupt:
+        watcher.stop()
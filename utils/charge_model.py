@@ -0,0 +1,96 @@
+import numpy as np
+
+SECONDS_PER_MONTH = 30 * 24 * 60 * 60
+# ThousandEyes default time limit when a test does not set one
+DEFAULT_TIME_LIMIT = 5
+TIME_LIMIT_FIELDS = ("timeLimit", "httpTimeLimit", "fttpTimeLimit")
+
+
+def _time_limit(config):
+    for field in TIME_LIMIT_FIELDS:
+        if config.get(field):
+            return config[field]
+    return DEFAULT_TIME_LIMIT
+
+
+def estimate_consumption(interval, time_limit, agents):
+    """
+    Monthly consumption of a test in agent-seconds: every assigned agent runs the
+    test once per interval and each run can hold up to time_limit seconds.
+
+    Works element-wise on NumPy arrays; tests without a usable interval give NaN.
+    """
+    interval = np.asarray(interval, dtype=float)
+    runs_per_month = np.divide(
+        SECONDS_PER_MONTH * np.asarray(agents, dtype=float), interval,
+        out=np.full(interval.shape, np.nan), where=interval > 0,
+    )
+    return runs_per_month * np.asarray(time_limit, dtype=float)
+
+
+class ChargeTable:
+    """
+    Column-oriented charge inputs for a set of endpoint records (as returned by the endpoint index).
+    """
+
+    def __init__(self, endpoints):
+        self.endpoints = list(endpoints)
+        configs = [ep.get("testConfiguration") or {} for ep in self.endpoints]
+        self.interval = np.array([config.get("interval") or 0 for config in configs], dtype=float)
+        self.time_limit = np.array([_time_limit(config) for config in configs], dtype=float)
+        # A test with no agents assigned runs nowhere; like a missing interval its consumption is unknown (NaN)
+        self.agents = np.array([len(config.get("agents") or []) or np.nan for config in configs], dtype=float)
+        self.consumption = estimate_consumption(self.interval, self.time_limit, self.agents)
+
+    def __len__(self):
+        return len(self.endpoints)
+
+    def unknown_reason(self, i):
+        """
+        Why test i has no consumption estimate, or None when it has one.
+        """
+        if not self.interval[i] > 0:
+            return "no interval configured"
+        if np.isnan(self.agents[i]):
+            return "no agents assigned"
+        return None
+
+    def unknown(self):
+        """
+        Number of tests left out of total(), top() and what_if() for lack of an interval or agents.
+        """
+        return int(np.isnan(self.consumption).sum())
+
+    def total(self):
+        return float(np.nansum(self.consumption))
+
+    def top(self, n=20):
+        """
+        Returns the n most expensive tests as (endpoint, inputs, consumption, share of total) rows.
+        """
+        ranked = np.argsort(np.nan_to_num(self.consumption, nan=-1.0))[::-1][:n]
+        total = self.total()
+        return [
+            (
+                self.endpoints[i],
+                {"interval": self.interval[i], "timeLimit": self.time_limit[i], "agents": int(self.agents[i])},
+                float(self.consumption[i]),
+                float(self.consumption[i] / total) if total else 0.0,
+            )
+            for i in ranked if not np.isnan(self.consumption[i])
+        ]
+
+    def what_if(self, interval_factor=1.0, time_limit_factor=1.0, agents_delta=0):
+        """
+        Total consumption after scaling every test's interval/time limit or adding agents.
+        Tests without agents stay unknown rather than gaining agents_delta.
+        """
+        return float(np.nansum(estimate_consumption(
+            self.interval * interval_factor,
+            self.time_limit * time_limit_factor,
+            np.maximum(self.agents + agents_delta, 1),
+        )))
+
+
+def format_consumption(value):
+    return "unknown" if value is None or np.isnan(value) else f"{value:,.0f} agent-seconds/month"
@@ -0,0 +1,230 @@
+"""
+Keeps chat prompts within a token budget.
+
+Older turns are folded into a rolling summary a few messages at a time, on a
+background thread, long history entries (endpoint listings, documents returned
+by tools) are cut down to their first lines, and only the newest messages that
+fit the budget are sent.
+Tokens are counted locally with tiktoken when it is installed, otherwise
+estimated at four characters per token.
+"""
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from dotenv import load_dotenv
+from utils.llm_cache import chat_completion_text
+from utils.instrumentation import increment, observe, TOKEN_BUCKETS
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+load_dotenv()
+# Prompt tokens per call, including system messages and whatever the caller reserves (e.g. function schemas)
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "8000"))
+# Newest messages always considered for the prompt; older ones go into the summary
+CONTEXT_WINDOW_MESSAGES = int(os.getenv("CONTEXT_WINDOW_MESSAGES", "10"))
+# Older history entries longer than this are truncated (the newest message only to fit the budget)
+CONTEXT_MAX_MESSAGE_TOKENS = int(os.getenv("CONTEXT_MAX_MESSAGE_TOKENS", "600"))
+# Messages folded into the summary per summarization call, and the summary's length
+CONTEXT_SUMMARY_BATCH = int(os.getenv("CONTEXT_SUMMARY_BATCH", "4"))
+CONTEXT_SUMMARY_TOKENS = int(os.getenv("CONTEXT_SUMMARY_TOKENS", "300"))
+
+# Token counts cached by text digest; longer texts (e.g. a whole BA document) are counted every time
+TOKEN_COUNT_CACHE_SIZE = 4096
+TOKEN_COUNT_CACHE_MAX_CHARS = 16384
+_token_counts = OrderedDict()
+_token_counts_lock = threading.Lock()
+
+SUMMARY_PREFIX = "Summary of the earlier conversation:"
+# Role and separators the chat format adds to every message
+MESSAGE_OVERHEAD_TOKENS = 4
+
+SUMMARY_PROMPT = f"""
+    You keep a running summary of a conversation between a user and MonitorEase, a monitoring assistant.
+    Merge the new messages into the current summary. Keep BA names, endpoint names and sysIds, test types,
+    configuration values, request IDs and anything the user still wants done. Leave out greetings and the
+    contents of listings. Reply with the summary only, in at most {CONTEXT_SUMMARY_TOKENS} tokens.
+"""
+
+
+@lru_cache(maxsize=1)
+def _encoding():
+    if tiktoken is None:
+        return None
+    try:
+        # gpt-4o and gpt-4o-mini
+        return tiktoken.get_encoding("o200k_base")
+    except Exception as e:
+        # The encoding is downloaded on first use; offline hosts fall back to the estimate
+        print(f"tiktoken encoding unavailable, estimating tokens: {e}")
+        return None
+
+
+def _count_tokens(text):
+    encoding = _encoding()
+    if encoding is None:
+        return (len(text) + 3) // 4
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def count_tokens(text):
+    """
+    Tokens in text. Counts of repeated strings (system prompts, tool schemas,
+    history entries) are cached by a digest of the text, so the cache never
+    keeps the strings themselves alive; one-off long texts are not cached.
+    """
+    if not text:
+        return 0
+    if len(text) > TOKEN_COUNT_CACHE_MAX_CHARS:
+        return _count_tokens(text)
+
+    key = hashlib.blake2b(text.encode("utf-8", "surrogatepass"), digest_size=16).digest()
+    with _token_counts_lock:
+        tokens = _token_counts.get(key)
+        if tokens is not None:
+            _token_counts.move_to_end(key)
+            return tokens
+    tokens = _count_tokens(text)
+    with _token_counts_lock:
+        _token_counts[key] = tokens
+        if len(_token_counts) > TOKEN_COUNT_CACHE_SIZE:
+            _token_counts.popitem(last=False)
+    return tokens
+
+
+def count_message_tokens(messages):
+    return sum(MESSAGE_OVERHEAD_TOKENS + count_tokens(message.get("content") or "") for message in messages)
+
+
+def truncate_text(text, max_tokens):
+    """
+    Cuts text to about max_tokens, at a line boundary where possible, and says how much was left out.
+    """
+    total = count_tokens(text)
+    if total <= max_tokens:
+        return text
+
+    lines = text.splitlines()
+    kept, used = [], 0
+    for line in lines:
+        cost = count_tokens(line) + 1
+        if used + cost > max_tokens:
+            break
+        kept.append(line)
+        used += cost
+    if not kept:
+        # A single long line, e.g. a JSON document: cut it by characters instead
+        kept, used = [lines[0][:len(text) * max_tokens // total]], max_tokens
+
+    increment("monitorease_context_truncations_total", help_text="History entries truncated to fit the prompt")
+    return "\n".join(kept) + (
+        f"\n[... {len(lines) - len(kept)} more line(s), about {total - used} tokens, left out to save context]"
+    )
+
+
+def fit_messages(messages, budget=CONTEXT_TOKEN_BUDGET, reserved_tokens=0, site="main"):
+    """
+    Returns the system messages plus the newest other messages that fit in budget.
+
+    Entries over CONTEXT_MAX_MESSAGE_TOKENS are truncated; the newest message is
+    always kept and only truncated when it alone exceeds what is left.
+    reserved_tokens counts prompt parts sent alongside the messages, such as tools.
+    """
+    system = [message for message in messages if message["role"] == "system"]
+    others = [message for message in messages if message["role"] != "system"]
+    remaining = budget - reserved_tokens - count_message_tokens(system)
+
+    kept = []
+    for message in reversed(others):
+        content = str(message.get("content") or "")
+        limit = CONTEXT_MAX_MESSAGE_TOKENS if kept else max(remaining - MESSAGE_OVERHEAD_TOKENS, 1)
+        content = truncate_text(content, limit)
+        cost = MESSAGE_OVERHEAD_TOKENS + count_tokens(content)
+        if kept and cost > remaining:
+            break
+        kept.append({**message, "content": content})
+        remaining -= cost
+
+    fitted = system + kept[::-1]
+    observe(
+        "monitorease_prompt_tokens_estimate", count_message_tokens(fitted) + reserved_tokens, buckets=TOKEN_BUCKETS,
+        help_text="Locally counted prompt tokens per call", site=site
+    )
+    return fitted
+
+
+class ConversationContext:
+    """
+    Rolling summary of one conversation: chat_history[:summarized] is folded into summary.
+    Keep one per conversation (e.g. in st.session_state) and build every prompt through it.
+
+    Folding runs on a background thread so it never delays a reply; until it
+    finishes, prompts carry the raw messages it is folding, trimmed to the budget.
+    """
+
+    def __init__(self):
+        self.summary = ""
+        self.summarized = 0
+        self._folding = None
+        self._lock = threading.Lock()
+
+    def _fold(self, openai_client, app_key, chat_history, summarized):
+        transcript = "\n".join(
+            f"{role}: {truncate_text(str(content), CONTEXT_MAX_MESSAGE_TOKENS)}" for role, content in chat_history
+        )
+        messages = [
+            {"role": "system", "content": SUMMARY_PROMPT},
+            {"role": "user", "content": f"Current summary:\n{self.summary or '(none)'}\n\nNew messages:\n{transcript}"},
+        ]
+        try:
+            summary = chat_completion_text(openai_client, messages=messages, app_key=app_key, max_tokens=CONTEXT_SUMMARY_TOKENS)
+            with self._lock:
+                self.summary = truncate_text(summary or "", CONTEXT_SUMMARY_TOKENS)
+            increment("monitorease_context_summaries_total", help_text="Rolling summary updates")
+        except Exception as e:
+            # The messages are dropped from the prompt either way; the summary just misses them
+            print(f"Could not update conversation summary: {e}")
+        finally:
+            with self._lock:
+                self.summarized = summarized
+
+    def build_messages(self, openai_client, app_key, system_messages, chat_history,
+                       budget=CONTEXT_TOKEN_BUDGET, reserved_tokens=0):
+        """
+        Prompt messages for the next call: system_messages, the rolling summary and
+        the recent (role, content) entries of chat_history, fitted to budget.
+        """
+        window_start = max(len(chat_history) - CONTEXT_WINDOW_MESSAGES, 0)
+        with self._lock:
+            # Once the window has moved a whole batch past the summary, fold that batch in the background
+            folding = self._folding is not None and self._folding.is_alive()
+            if not folding and window_start - self.summarized >= CONTEXT_SUMMARY_BATCH:
+                self._folding = threading.Thread(
+                    target=self._fold, args=(openai_client, app_key, list(chat_history[self.summarized:window_start]), window_start),
+                    name="context-summary", daemon=True
+                )
+                self._folding.start()
+            summary, summarized = self.summary, self.summarized
+
+        messages = list(system_messages)
+        if summary:
+            messages.append({"role": "system", "content": f"{SUMMARY_PREFIX}\n{summary}"})
+        messages += [{"role": role, "content": content} for role, content in chat_history[summarized:]]
+        return fit_messages(messages, budget, reserved_tokens)
+
+
+def history_for_agent(messages, system_prompt, budget, site):
+    """
+    Prompt for a helper agent from prompt messages built by ConversationContext:
+    its own system_prompt instead of the main one, plus the rolling summary and
+    the recent messages, fitted to budget.
+    """
+    history = [
+        message for message in messages
+        if message["role"] != "system" or str(message.get("content", "")).startswith(SUMMARY_PREFIX)
+    ]
+    return fit_messages([{"role": "system", "content": system_prompt}] + history, budget, site=site)
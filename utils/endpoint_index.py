@@ -0,0 +1,309 @@
+import os
+import threading
+import time
+from operator import itemgetter
+from dotenv import load_dotenv
+from utils.mongo_loader import get_collection
+
+load_dotenv()
+ENDPOINT_INDEX_TTL = float(os.getenv("ENDPOINT_INDEX_TTL", "300"))
+
+BA_COLLECTION = "brownfield-ba-data"
+# The endpoint fields the tools read (fetch_endpoint_information answers from the whole testConfiguration)
+ENDPOINT_FIELDS = ("endpointSysId", "endpointName", "testName", "testConfiguration")
+BA_PROJECTION = {
+    "_id": 0,
+    "baName": 1,
+    "baSysId": 1,
+    "bams.bamName": 1,
+    "bams.bamSysId": 1,
+    **{f"endpoints.{field}": 1 for field in ENDPOINT_FIELDS},
+    **{f"bams.endpoints.{field}": 1 for field in ENDPOINT_FIELDS},
+}
+
+
+def _index_ba_document(doc):
+    """
+    Yields (endpointSysId, entry) for every BA and BAM level endpoint in a BA document.
+    """
+    ba = {"baName": doc.get("baName"), "baSysId": doc.get("baSysId")}
+    for ep in doc.get("endpoints", []) or []:
+        if ep.get("endpointSysId"):
+            yield ep["endpointSysId"], (ba, None, _endpoint_fields(ep))
+    for bam in doc.get("bams", []) or []:
+        bam_ctx = {"bamName": bam.get("bamName"), "bamSysId": bam.get("bamSysId")}
+        for ep in bam.get("endpoints", []) or []:
+            if ep.get("endpointSysId"):
+                yield ep["endpointSysId"], (ba, bam_ctx, _endpoint_fields(ep))
+
+
+def _endpoint_fields(ep):
+    # Full documents from change streams and single-endpoint lookups are cut to what BA_PROJECTION loads
+    return {field: ep[field] for field in ENDPOINT_FIELDS if field in ep}
+
+
+def _endpoint_agents(ep):
+    """
+    Agent ids assigned to an endpoint's test, as strings; ids may be stored as ints, strings or {"agentId": ...}.
+    """
+    agents = (ep.get("testConfiguration") or {}).get("agents") or []
+    return {str(agent.get("agentId") if isinstance(agent, dict) else agent) for agent in agents}
+
+
+def _drop_agents(by_agent, posting, entry):
+    for agent_id in _endpoint_agents(entry[2]):
+        postings = by_agent.get(agent_id)
+        if postings is not None:
+            postings.discard(posting)
+            if not postings:
+                del by_agent[agent_id]
+
+
+def _remove_owner(entries, by_agent, sys_id, baName):
+    # Drops baName's entry for sys_id; the remaining BAs that list it keep theirs
+    owners = entries.get(sys_id)
+    entry = owners.pop(baName, None) if owners is not None else None
+    if entry is None:
+        return None
+    _drop_agents(by_agent, (baName, sys_id), entry)
+    if not owners:
+        del entries[sys_id]
+    return entry
+
+
+def _add_ba(entries, by_ba, by_agent, doc):
+    # by_ba values are dicts used as insertion-ordered sets of sysIds. entries maps a
+    # sysId to {baName: entry} for every BA listing it, in indexing order; a lookup by
+    # sysId alone answers with the BA indexed last
+    baName = doc.get("baName")
+    sys_ids = by_ba.setdefault(baName, {})
+    for sys_id, entry in _index_ba_document(doc):
+        _remove_owner(entries, by_agent, sys_id, baName)
+        entries.setdefault(sys_id, {})[baName] = entry
+        sys_ids[sys_id] = None
+        # Postings are (baName, sysId), so a shared test is found under every BA that lists it
+        for agent_id in _endpoint_agents(entry[2]):
+            by_agent.setdefault(agent_id, set()).add((baName, sys_id))
+
+
+def _primary(owners):
+    return next(reversed(owners.values()))
+
+
+def _annotate(entry):
+    ba, bam, ep = entry
+    matched_endpoint = dict(ep)
+    if bam is not None:
+        matched_endpoint.update(bam)
+    matched_endpoint.update(ba)
+    matched_endpoint["source"] = "BAM" if bam is not None else "BA"
+    return matched_endpoint
+
+
+class EndpointIndex:
+    """
+    In-memory map of endpointSysId -> (BA, BAM, endpoint) per BA listing it, built from brownfield-ba-data,
+    with an inverted agent id -> (baName, endpointSysId) index over BA and BAM endpoints.
+
+    The first lookup loads the index; after that, once the TTL expires or
+    invalidate() is called, it is rebuilt on a background thread while lookups
+    keep using the previous one. A ttl of None never expires (for when the cache
+    watcher keeps the index current). Single BAs can be patched in place with
+    replace_ba()/remove_ba()/merge_ba(); patches made during a rebuild are
+    replayed on the rebuilt index.
+    """
+
+    def __init__(self, ttl=ENDPOINT_INDEX_TTL):
+        self.ttl = ttl
+        self._entries = {}
+        self._by_ba = {}
+        self._by_agent = {}
+        self._loaded_at = None
+        self._invalidated = False
+        self._refreshing = False
+        # Patches made while a rebuild runs, as (method, argument); None when no rebuild runs
+        self._pending_patches = None
+        self._lock = threading.RLock()
+        self._refresh_lock = threading.Lock()
+
+    def refresh(self):
+        """
+        Rebuilds the whole index from Mongo and swaps it in.
+        """
+        with self._refresh_lock:
+            self._rebuild()
+
+    def _rebuild(self):
+        with self._lock:
+            self._pending_patches = []
+            # An invalidate() that arrives during the rebuild triggers another one
+            self._invalidated = False
+        try:
+            entries, by_ba, by_agent = {}, {}, {}
+            for doc in get_collection(BA_COLLECTION).find({}, BA_PROJECTION):
+                _add_ba(entries, by_ba, by_agent, doc)
+
+            with self._lock:
+                self._entries = entries
+                self._by_ba = by_ba
+                self._by_agent = by_agent
+                patches, self._pending_patches = self._pending_patches, None
+                for method, argument in patches:
+                    method(argument)
+                self._loaded_at = time.monotonic()
+        finally:
+            with self._lock:
+                self._pending_patches = None
+
+    def _record_patch(self, method, argument):
+        if self._pending_patches is not None:
+            self._pending_patches.append((method, argument))
+
+    def is_stale(self):
+        if self._loaded_at is None or self._invalidated:
+            return True
+        return self.ttl is not None and time.monotonic() - self._loaded_at > self.ttl
+
+    def _ensure_fresh(self):
+        if self._loaded_at is None:
+            # Nothing to serve yet, so the first load happens in the foreground
+            with self._refresh_lock:
+                if self._loaded_at is None:
+                    self._rebuild()
+        elif self.is_stale():
+            self._refresh_in_background()
+
+    def _refresh_in_background(self):
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+
+        def run():
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"Endpoint index rebuild failed, serving the previous index: {e}")
+            finally:
+                with self._lock:
+                    self._refreshing = False
+
+        threading.Thread(target=run, name="endpoint-index-refresh", daemon=True).start()
+
+    def invalidate(self):
+        # Rebuilds in the background on the next lookup
+        with self._lock:
+            self._invalidated = True
+
+    def replace_ba(self, doc):
+        """
+        Re-indexes one BA from its document.
+
+        Returns:
+            set: endpointSysIds that were added, removed or changed.
+        """
+        with self._lock:
+            self._record_patch(self.replace_ba, doc)
+            before = {sys_id: entry[2] for sys_id, entry in self._ba_entries(doc.get("baName"))}
+            self._remove_ba(doc.get("baName"))
+            _add_ba(self._entries, self._by_ba, self._by_agent, doc)
+            after = {sys_id: entry[2] for sys_id, entry in self._ba_entries(doc.get("baName"))}
+        return {sys_id for sys_id in before.keys() | after.keys() if before.get(sys_id) != after.get(sys_id)}
+
+    def merge_ba(self, doc):
+        """
+        Adds the endpoints of a partial BA document (such as a single projected
+        endpoint) without dropping the BA's other endpoints from the index.
+        """
+        with self._lock:
+            self._record_patch(self.merge_ba, doc)
+            _add_ba(self._entries, self._by_ba, self._by_agent, doc)
+
+    def remove_ba(self, baName):
+        """
+        Drops one BA from the index.
+
+        Returns:
+            set: endpointSysIds the BA listed.
+        """
+        with self._lock:
+            self._record_patch(self.remove_ba, baName)
+            return self._remove_ba(baName)
+
+    def _remove_ba(self, baName):
+        with self._lock:
+            sys_ids = self._by_ba.pop(baName, {})
+            for sys_id in sys_ids:
+                # Endpoints also listed under another BA stay indexed under that BA
+                _remove_owner(self._entries, self._by_agent, sys_id, baName)
+            return set(sys_ids)
+
+    def _ba_entries(self, baName):
+        # (sysId, entry) for the endpoints baName lists
+        for sys_id in self._by_ba.get(baName, {}):
+            entry = self._entries.get(sys_id, {}).get(baName)
+            if entry is not None:
+                yield sys_id, entry
+
+    def lookup(self, endpoint_sysId):
+        """
+        Returns the endpoint record annotated with its BA/BAM context, or None.
+        An endpoint listed under several BAs is returned with the BA indexed last.
+        """
+        self._ensure_fresh()
+        with self._lock:
+            owners = self._entries.get(endpoint_sysId)
+            if not owners:
+                return None
+            entry = _primary(owners)
+        return _annotate(entry)
+
+    def endpoints_for_ba(self, baName=None):
+        """
+        Returns the annotated endpoint records of one BA, or of every BA when baName is None.
+        """
+        self._ensure_fresh()
+        with self._lock:
+            if baName is None:
+                entries = [_primary(owners) for owners in self._entries.values()]
+            else:
+                entries = [entry for _, entry in self._ba_entries(baName)]
+        return [_annotate(entry) for entry in entries]
+
+    def endpoints_for_agent(self, agent_id):
+        """
+        Returns [{"testName", "endpointSysId", "baName", "bamName"}] for every test running on the agent,
+        once per BA listing it.
+        """
+        self._ensure_fresh()
+        results = []
+        with self._lock:
+            for baName, sys_id in sorted(self._by_agent.get(str(agent_id), ()), key=itemgetter(1)):
+                ba, bam, ep = self._entries[sys_id][baName]
+                results.append({
+                    "testName": ep.get("testName"),
+                    "endpointSysId": sys_id,
+                    "baName": ba.get("baName"),
+                    "bamName": bam.get("bamName") if bam else None,
+                })
+        return results
+
+    def ba_names(self):
+        self._ensure_fresh()
+        return [name for name in self._by_ba if name]
+
+    def __len__(self):
+        return len(self._entries)
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_endpoint_index():
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = EndpointIndex()
+    return _index
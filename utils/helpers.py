@@ -1,34 +1,126 @@
+import difflib
+import ijson
+
 def list_bams(ba_data):
     return [bam['bamName'] for bam in ba_data.get("bams", [])]
 
+def iter_ba_endpoints(ba_data):
+    """
+    Yields the BA-level endpoints, then each BAM's, without building a combined list.
+    """
+    yield from ba_data.get("endpoints") or []
+    for bam in ba_data.get("bams") or []:
+        yield from bam.get("endpoints") or []
+
+def count_endpoints(ba_data):
+    # Sums list lengths in one pass instead of materialising the endpoints
+    return len(ba_data.get("endpoints") or []) + sum(len(bam.get("endpoints") or []) for bam in ba_data.get("bams") or [])
+
 def list_endpoints(ba_data):
-    eps = ba_data.get("endpoints", []) + [
-        ep for bam in ba_data.get("bams", []) for ep in bam.get("endpoints", [])
-    ]
-    endpoint_list = [
+    # A list joins faster than a generator, which join() would materialise anyway
+    content = "\n\n".join([
         f'endpointName: "{ep.get("endpointName", "")}", endpointSysId: "{ep.get("endpointSysId", "")}"'
-        for ep in eps
-    ]
-   
-    content = "\n\n".join(endpoint_list)
-    
+        for ep in iter_ba_endpoints(ba_data)
+    ])
     return f"""Here are the list of monitored endpoints:\n\n{content}"""
 
 def summarize_projection(ba_data):
-    total_eps = len(list_endpoints(ba_data))
-    return f"Total monitored endpoints under BA '{ba_data['baName']}': {total_eps}"
+    return f"Total monitored endpoints under BA '{ba_data['baName']}': {count_endpoints(ba_data)}"
+
+def summarize_counts(ba_counts):
+    # ba_counts is the output of utils.ba_queries.ba_counts_pipeline
+    return f"Total monitored endpoints under BA '{ba_counts['baName']}': {ba_counts['endpointCount']}"
+
+AGENT_MAPPING = {
+    "Cisco: San Jose, CA" :  251041,
+    "Cisco: Allen/Richardson, TX" : 251146,
+    "Cisco: Raleigh, NC" : 251226,
+    "Cisco: Almere, Netherlands" : 251306,
+    "Cisco: Bangalore, India" : 251386,
+    "Cisco: Tokyo, Japan" : 251471,
+    "Cisco: St. Leonards, Australia" : 251556
+}
 
 def getAgentIdFromAgentName(agentName):
-    agentMapping = {
-        "Cisco: San Jose, CA" :  251041,
-        "Cisco: Allen/Richardson, TX" : 251146,
-        "Cisco: Raleigh, NC" : 251226,
-        "Cisco: Almere, Netherlands" : 251306,
-        "Cisco: Bangalore, India" : 251386,
-        "Cisco: Tokyo, Japan" : 251471,
-        "Cisco: St. Leonards, Australia" : 251556
+    return AGENT_MAPPING.get(agentName, None)
+
+def _agent_location(name):
+    # "Cisco: Bangalore, India" -> "bangalore"
+    return name.split(":", 1)[-1].split(",", 1)[0].strip().lower()
+
+def resolve_agent(agentName):
+    """
+    Fuzzy-matches a user supplied agent name or id against AGENT_MAPPING.
+
+    Accepts the full name, an agent id, or any part of the location such as
+    "bangalore", "San Jose" or "tokio" (close misspellings match too).
+
+    Returns:
+        tuple: (agentName, agentId) from AGENT_MAPPING, or None if nothing matches
+        confidently or the name matches more than one agent.
+    """
+    query = (agentName or "").strip().lower()
+    if not query:
+        return None
+
+    for name, agent_id in AGENT_MAPPING.items():
+        if query == name.lower() or query == str(agent_id):
+            return name, agent_id
+
+    locations = {_agent_location(name): name for name in AGENT_MAPPING}
+    contained = [name for location, name in locations.items() if location in query or query in name.lower()]
+    if len(contained) == 1:
+        return contained[0], AGENT_MAPPING[contained[0]]
+    if contained:
+        # e.g. "tokyo and bangalore": naming several agents is not a match for one
+        return None
+
+    close = {
+        locations[match[0]]
+        for match in (difflib.get_close_matches(candidate, list(locations), n=1, cutoff=0.75)
+                      for candidate in [query] + query.split())
+        if match
     }
-    return agentMapping.get(agentName, None)
+    if len(close) == 1:
+        name = close.pop()
+        return name, AGENT_MAPPING[name]
+    return None
+
+# assetsDetails paths of the endpoint objects: BAM -> App Instances -> Endpoints, and App Instances directly under the BA
+ASSET_ENDPOINT_PREFIXES = (
+    "assetDetails.bam.item.appInstances.item.appEndpoints.item",
+    "assetDetails.appInstances.item.appEndpoints.item",
+)
+
+def iter_null_monitoring_endpoints(stream):
+    """
+    Incrementally parses an assetsDetails JSON body and yields its endpoints with
+    monitoringConfigurationType: null as they are read, so the whole response is
+    never held in memory. Endpoints come out in document order.
+
+    Args:
+        stream: A binary file-like object with the JSON body, e.g. response.raw.
+
+    Yields:
+        dict: {"endpointName": "", "endpointSysId": ""}
+    """
+    builder = None
+    for prefix, event, value in ijson.parse(stream, use_float=True):
+        if builder is None:
+            if prefix in ASSET_ENDPOINT_PREFIXES and event == "start_map":
+                builder, endpoint_prefix = ijson.ObjectBuilder(), prefix
+                builder.event(event, value)
+            continue
+
+        builder.event(event, value)
+        if prefix == endpoint_prefix and event == "end_map":
+            endpoint = builder.value
+            builder = None
+            if isinstance(endpoint, dict) and endpoint.get("monitoringConfigurationType") is None:
+                yield {
+                    "endpointName": endpoint.get("ciName", ""),
+                    "endpointSysId": endpoint.get("sysId", "")
+                }
 
 def extract_null_monitoring_endpoints(api_response):
     """
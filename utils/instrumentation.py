@@ -0,0 +1,263 @@
+"""
+Process-wide timings, token usage, payload sizes and cache hits for chat turns.
+
+Stages (llm, tool, mongo, more) are timed with `timed()` into histograms and
+into the breakdown of the current chat turn, which is tracked in a contextvar so
+concurrent sessions and tool threads (run via contextvars.copy_context()) add
+to the right turn. render_prometheus() renders everything in the Prometheus
+text format; start_metrics_server() serves it on /metrics.
+"""
+import bisect
+import contextvars
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from dotenv import load_dotenv
+from pymongo import monitoring
+
+load_dotenv()
+METRICS_PORT = os.getenv("METRICS_PORT")
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+SIZE_BUCKETS = (1_000, 10_000, 100_000, 1_000_000, 10_000_000, 100_000_000)
+TOKEN_BUCKETS = (100, 500, 1_000, 2_000, 4_000, 8_000, 16_000, 32_000, 128_000)
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q):
+        """
+        Upper bound of the bucket holding the q-quantile, like histogram_quantile() without interpolation.
+        """
+        if not self.count:
+            return 0.0
+        rank, seen = q * self.count, 0
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return float("inf")
+
+
+_lock = threading.Lock()
+# (metric name, sorted label items) -> Histogram / counter value
+_histograms = {}
+_counters = {}
+_help = {}
+_collectors = []
+
+_current_turn = contextvars.ContextVar("current_turn", default=None)
+
+
+def _key(name, labels):
+    return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def observe(name, value, buckets=LATENCY_BUCKETS, help_text="", **labels):
+    with _lock:
+        histogram = _histograms.get(_key(name, labels))
+        if histogram is None:
+            histogram = _histograms[_key(name, labels)] = Histogram(buckets)
+            _help.setdefault(name, help_text)
+        histogram.observe(value)
+
+
+def increment(name, n=1, help_text="", **labels):
+    with _lock:
+        _counters[_key(name, labels)] = _counters.get(_key(name, labels), 0) + n
+        _help.setdefault(name, help_text)
+
+
+def register_collector(collector):
+    """
+    Registers collector() -> iterable of (name, labels dict, value) gauges read at scrape time,
+    for counters other modules already keep (cache stats, fast-path routing).
+    """
+    _collectors.append(collector)
+
+
+def start_turn(label="chat"):
+    """
+    Starts a per-turn breakdown in the current context; stages timed until end_turn() add to it.
+    """
+    turn = {"label": label, "started": time.perf_counter(), "stages": {}, "lock": threading.Lock()}
+    _current_turn.set(turn)
+    return turn
+
+
+def end_turn():
+    """
+    Closes the current turn, records its total and returns {"label", "total", "stages": {stage: seconds}}.
+    """
+    turn = _current_turn.get()
+    if turn is None:
+        return None
+    _current_turn.set(None)
+    total = time.perf_counter() - turn["started"]
+    observe("monitorease_turn_seconds", total, help_text="Wall time of a chat turn", route=turn["label"])
+    with turn["lock"]:
+        return {"label": turn["label"], "total": total, "stages": dict(turn["stages"])}
+
+
+def record_stage(stage, seconds, **labels):
+    observe("monitorease_stage_seconds", seconds, help_text="Time spent per stage", stage=stage, **labels)
+    turn = _current_turn.get()
+    if turn is not None:
+        name = stage + "".join(f":{value}" for _, value in sorted(labels.items()))
+        with turn["lock"]:
+            turn["stages"][name] = turn["stages"].get(name, 0.0) + seconds
+
+
+@contextmanager
+def timed(stage, **labels):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(stage, time.perf_counter() - started, **labels)
+
+
+def record_tokens(usage, site):
+    """
+    Records token usage from a completion's response.usage, if the API returned it.
+    """
+    if usage is None:
+        return
+    for kind in ("prompt_tokens", "completion_tokens"):
+        tokens = getattr(usage, kind, None)
+        if tokens is not None:
+            increment("monitorease_llm_tokens_total", tokens, help_text="LLM tokens used", site=site, kind=kind)
+            observe("monitorease_llm_tokens", tokens, buckets=TOKEN_BUCKETS, help_text="LLM tokens per call", site=site, kind=kind)
+
+
+def record_payload(source, size):
+    if size is not None:
+        observe("monitorease_payload_bytes", size, buckets=SIZE_BUCKETS, help_text="Response payload size", source=source)
+
+
+class MongoCommandTimer(monitoring.CommandListener):
+    """
+    Times every Mongo command (find, aggregate, ...) into the mongo stage of the
+    calling thread's turn. Register with MongoClient(event_listeners=[...]).
+    """
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        record_stage("mongo", event.duration_micros / 1e6, command=event.command_name)
+
+    def failed(self, event):
+        record_stage("mongo", event.duration_micros / 1e6, command=event.command_name)
+        increment("monitorease_mongo_failures_total", help_text="Failed Mongo commands", command=event.command_name)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels) + "}"
+
+
+def render_prometheus():
+    lines = []
+    with _lock:
+        histograms = sorted(_histograms.items())
+        counters = sorted(_counters.items())
+        help_texts = dict(_help)
+
+    typed = set()
+    for (name, labels), histogram in histograms:
+        if name not in typed:
+            lines += [f"# HELP {name} {help_texts.get(name, '')}", f"# TYPE {name} histogram"]
+            typed.add(name)
+        cumulative = 0
+        for bound, count in zip(histogram.buckets + (float("inf"),), histogram.counts):
+            cumulative += count
+            le = "+Inf" if bound == float("inf") else repr(bound)
+            lines.append(f"{name}_bucket{_format_labels(labels + (('le', le),))} {cumulative}")
+        lines.append(f"{name}_sum{_format_labels(labels)} {histogram.sum}")
+        lines.append(f"{name}_count{_format_labels(labels)} {histogram.count}")
+
+    for (name, labels), value in counters:
+        if name not in typed:
+            lines += [f"# HELP {name} {help_texts.get(name, '')}", f"# TYPE {name} counter"]
+            typed.add(name)
+        lines.append(f"{name}{_format_labels(labels)} {value}")
+
+    for collector in _collectors:
+        try:
+            for name, labels, value in collector():
+                if name not in typed:
+                    lines.append(f"# TYPE {name} gauge")
+                    typed.add(name)
+                lines.append(f"{name}{_format_labels(tuple(sorted(labels.items())))} {value}")
+        except Exception as e:
+            print(f"Metrics collector failed: {e}")
+    return "\n".join(lines) + "\n"
+
+
+def stage_summary():
+    """
+    Per stage and label set: count, p50, p95 and mean seconds, for the debug panel.
+    """
+    with _lock:
+        items = [(labels, h) for (name, labels), h in _histograms.items() if name == "monitorease_stage_seconds"]
+        return [
+            {
+                **dict(labels),
+                "count": h.count,
+                "p50": h.quantile(0.5),
+                "p95": h.quantile(0.95),
+                "mean": h.sum / h.count if h.count else 0.0,
+            }
+            for labels, h in sorted(items)
+        ]
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = render_prometheus().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+_server = None
+
+
+def start_metrics_server(port=METRICS_PORT):
+    """
+    Serves /metrics on port in a daemon thread; does nothing when port is unset.
+    """
+    global _server
+    if not port:
+        return None
+    with _lock:
+        if _server is None:
+            _server = ThreadingHTTPServer(("0.0.0.0", int(port)), _MetricsHandler)
+            threading.Thread(target=_server.serve_forever, name="metrics-server", daemon=True).start()
+    return _server
@@ -0,0 +1,74 @@
+import json
+import re
+from utils.llm_cache import chat_completion_text
+
+BA_INTENTS = ("list_bams", "list_endpoints", "summarize")
+
+SUMMARY_PATTERN = re.compile(r"\b(how many|count|number of|total|summary|summari[sz]e|overview)\b", re.IGNORECASE)
+BAM_PATTERN = re.compile(r"\b(bams?|modules?)\b", re.IGNORECASE)
+ENDPOINT_PATTERN = re.compile(r"\b(endpoints?|monitored systems?|systems? monitored|tests?)\b", re.IGNORECASE)
+
+BA_INTENT_SYSTEM_PROMPT = """You are a tool router for a monitoring assistant. The user will ask questions about business applications (BAs), business application modules (BAMs), and endpoints (systems monitored in ThousandEyes).
+                - If the user asks for a list of modules, return {"tool": "list_bams"}.
+                - If the user asks for a list of endpoints or monitored systems, return {"tool": "list_endpoints"}.
+                - If the user asks for a summary or count of endpoints, return {"tool": "summarize"}.
+                - If the intent is unclear or unsupported, return {"tool": "unknown"}.
+
+                BAs are business applications, BAMs are modules within a BA, and endpoints are systems where monitoring is set up in ThousandEyes.
+
+                Always return a JSON object with the key "tool"."""
+
+
+def classify_ba_intent(user_input):
+    """
+    Keyword classifier for BA level questions.
+
+    Returns:
+        str | None: One of BA_INTENTS, or None when the question matches
+        several intents (or none) and should go to the LLM instead.
+    """
+    summary = bool(SUMMARY_PATTERN.search(user_input))
+    bams = bool(BAM_PATTERN.search(user_input))
+    endpoints = bool(ENDPOINT_PATTERN.search(user_input))
+
+    if summary and not bams:
+        return "summarize"
+    if bams and not summary and not endpoints:
+        return "list_bams"
+    if endpoints and not summary and not bams:
+        return "list_endpoints"
+    return None
+
+
+def parse_intent_json(content):
+    """
+    Reads {"tool": ...} from a model reply, tolerating code fences or text around the JSON.
+    """
+    match = re.search(r"\{.*?\}", content or "", re.DOTALL)
+    if not match:
+        return "unknown"
+    try:
+        return json.loads(match.group(0)).get("tool", "unknown")
+    except ValueError:
+        return "unknown"
+
+
+def llm_classify_ba_intent(user_input, openai_client, app_key):
+    content = chat_completion_text(
+        openai_client,
+        app_key=app_key,
+        cache="ba_intent_router",
+        messages=[
+            {"role": "system", "content": BA_INTENT_SYSTEM_PROMPT},
+            {"role": "user", "content": user_input}
+        ]
+    )
+    return parse_intent_json(content)
+
+
+def route_ba_intent(user_input, openai_client, app_key):
+    """
+    Picks the BA helper for a question locally, falling back to the LLM router
+    only when the keyword classifier is unsure.
+    """
+    return classify_ba_intent(user_input) or llm_classify_ba_intent(user_input, openai_client, app_key)
@@ -0,0 +1,336 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from dotenv import load_dotenv
+from utils.instrumentation import timed, record_stage, record_tokens, register_collector
+
+load_dotenv()
+LLM_CACHE_BACKEND = os.getenv("LLM_CACHE_BACKEND", "memory")  # memory | disk
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", ".llm_cache.sqlite3")
+LLM_CACHE_TTL = float(os.getenv("LLM_CACHE_TTL", "3600"))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "1024"))
+
+
+def _normalize_message(message):
+    message = dict(message)
+    if isinstance(message.get("content"), str):
+        message["content"] = " ".join(message["content"].split())
+    return message
+
+
+def make_cache_key(model, messages, **kwargs):
+    """
+    Hashes everything that can change the completion: model, messages (with
+    whitespace collapsed), functions/tools and sampling parameters. The `user`
+    field only carries the app key, so it is left out.
+    """
+    kwargs.pop("user", None)
+    payload = {
+        "model": model,
+        "messages": [_normalize_message(m) for m in messages],
+        **kwargs,
+    }
+    encoded = json.dumps(payload, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()
+
+
+class MemoryBackend:
+    def __init__(self, max_entries=LLM_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        # tag -> {key: site} for the stored entries, pruned whenever an entry goes
+        self._tags = defaultdict(dict)
+        self._lock = threading.Lock()
+
+    def _drop(self, key):
+        _, _, tags = self._entries.pop(key)
+        for tag in tags:
+            keys = self._tags[tag]
+            keys.pop(key, None)
+            if not keys:
+                del self._tags[tag]
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value, _ = entry
+            if expires_at < time.time():
+                self._drop(key)
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl, tags=(), site="default"):
+        """
+        Stores a value and returns the number of entries evicted to make room.
+        """
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (time.time() + ttl, value, tuple(tags))
+            for tag in tags:
+                self._tags[tag][key] = site
+            evicted = 0
+            while len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)))
+                evicted += 1
+            return evicted
+
+    def delete(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+
+    def delete_tag(self, tag):
+        """
+        Deletes the entries stored with tag and returns their call sites, one per entry.
+        """
+        with self._lock:
+            keys = dict(self._tags.get(tag, {}))
+            for key in keys:
+                self._drop(key)
+            return list(keys.values())
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._tags.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class DiskBackend:
+    """
+    SQLite-backed cache so answers survive restarts and are shared by workers on one host.
+    """
+
+    def __init__(self, path=LLM_CACHE_PATH, max_entries=LLM_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS llm_cache ("
+            "key TEXT PRIMARY KEY, value TEXT, expires_at REAL, last_used REAL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS llm_cache_tags (tag TEXT, key TEXT, site TEXT, PRIMARY KEY (tag, key))"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS llm_cache_tags_key ON llm_cache_tags (key)")
+        self._conn.commit()
+
+    def _drop(self, keys):
+        keys = [(key,) for key in keys]
+        self._conn.executemany("DELETE FROM llm_cache WHERE key = ?", keys)
+        self._conn.executemany("DELETE FROM llm_cache_tags WHERE key = ?", keys)
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if row[1] < now:
+                self._drop([key])
+                self._conn.commit()
+                return None
+            self._conn.execute("UPDATE llm_cache SET last_used = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            return json.loads(row[0])
+
+    def set(self, key, value, ttl, tags=(), site="default"):
+        now = time.time()
+        with self._lock:
+            self._conn.execute("DELETE FROM llm_cache_tags WHERE key = ?", (key,))
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value, expires_at, last_used) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), now + ttl, now),
+            )
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO llm_cache_tags (tag, key, site) VALUES (?, ?, ?)",
+                [(tag, key, site) for tag in tags],
+            )
+            evicted = [row[0] for row in self._conn.execute(
+                "SELECT key FROM llm_cache ORDER BY last_used DESC LIMIT -1 OFFSET ?", (self.max_entries,)
+            )]
+            self._drop(evicted)
+            self._conn.commit()
+            return len(evicted)
+
+    def delete(self, key):
+        with self._lock:
+            self._drop([key])
+            self._conn.commit()
+
+    def delete_tag(self, tag):
+        with self._lock:
+            rows = self._conn.execute("SELECT key, site FROM llm_cache_tags WHERE tag = ?", (tag,)).fetchall()
+            self._drop([key for key, _ in rows])
+            self._conn.commit()
+            return [site for _, site in rows]
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM llm_cache")
+            self._conn.execute("DELETE FROM llm_cache_tags")
+            self._conn.commit()
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+
+
+class LLMResponseCache:
+    def __init__(self, backend, ttl=LLM_CACHE_TTL):
+        self.backend = backend
+        self.ttl = ttl
+        self._stats = defaultdict(lambda: {"hits": 0, "misses": 0, "evictions": 0, "invalidations": 0})
+        self._stats_lock = threading.Lock()
+
+    def _count(self, site, field, n=1):
+        with self._stats_lock:
+            self._stats[site][field] += n
+
+    def get(self, key, site="default"):
+        value = self.backend.get(key)
+        self._count(site, "hits" if value is not None else "misses")
+        return value
+
+    def set(self, key, value, ttl=None, site="default", tags=()):
+        """
+        Stores value; tags (e.g. the endpoint sysIds it was built from) are kept
+        with the entry by the backend, so they go when it is evicted or expires.
+        """
+        evicted = self.backend.set(key, value, self.ttl if ttl is None else ttl, tags=tags, site=site)
+        if evicted:
+            self._count(site, "evictions", evicted)
+
+    def invalidate_tag(self, tag):
+        """
+        Drops every entry stored with this tag; returns how many were dropped.
+        """
+        sites = self.backend.delete_tag(tag)
+        for site in sites:
+            self._count(site, "invalidations")
+        return len(sites)
+
+    def clear(self):
+        self.backend.clear()
+
+    def stats(self):
+        """
+        Returns per call-site counters, e.g. {"agent_mapping": {"hits": 3, "misses": 1, "evictions": 0}}.
+        """
+        with self._stats_lock:
+            return {site: dict(counters) for site, counters in self._stats.items()}
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_llm_cache():
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                if LLM_CACHE_BACKEND == "disk":
+                    backend = DiskBackend()
+                else:
+                    backend = MemoryBackend()
+                _cache = LLMResponseCache(backend)
+    return _cache
+
+
+def _cache_metrics():
+    for site, counters in get_llm_cache().stats().items():
+        for field, value in counters.items():
+            yield f"monitorease_llm_cache_{field}", {"site": site}, value
+
+
+register_collector(_cache_metrics)
+
+
+def _create_completion(openai_client, request, app_key, site):
+    with timed("llm", site=site):
+        response = openai_client.chat.completions.create(**request, user=json.dumps({"appkey": app_key}))
+    record_tokens(getattr(response, "usage", None), site)
+    return response
+
+
+def chat_completion_text(openai_client, messages, app_key, model="gpt-4o-mini", cache=None, cache_ttl=None,
+                         cache_tags=(), **kwargs):
+    """
+    Runs a chat completion and returns the message content.
+
+    Caching is opt-in per call site: pass cache="<site name>" to serve repeats of
+    the same model/messages/functions from the cache. The site name labels the
+    hit/miss counters in get_llm_cache().stats(). cache_tags (e.g. endpoint
+    sysIds the prompt was built from) let invalidate_tag() evict the answer when
+    that data changes.
+    """
+    request = {"model": model, "messages": messages, **kwargs}
+    site = cache or "uncached"
+    if not cache:
+        return _create_completion(openai_client, request, app_key, site).choices[0].message.content
+
+    llm_cache = get_llm_cache()
+    key = make_cache_key(**request)
+    content = llm_cache.get(key, site=cache)
+    if content is not None:
+        return content
+
+    response = _create_completion(openai_client, request, app_key, site)
+    content = response.choices[0].message.content
+    if content is not None:
+        llm_cache.set(key, content, ttl=cache_ttl, site=cache, tags=cache_tags)
+    return content
+
+
+def stream_completion_text(openai_client, messages, app_key, model="gpt-4o-mini", cache=None, cache_ttl=None,
+                           cache_tags=(), **kwargs):
+    """
+    Streaming counterpart of chat_completion_text(): yields content tokens as they
+    arrive. A cache hit is yielded as one piece; a miss is cached once the
+    stream has finished.
+    """
+    request = {"model": model, "messages": messages, **kwargs}
+    key = None
+    if cache:
+        llm_cache = get_llm_cache()
+        key = make_cache_key(**request)
+        content = llm_cache.get(key, site=cache)
+        if content is not None:
+            yield content
+            return
+
+    pieces = []
+    site = cache or "uncached"
+    started = time.perf_counter()
+    try:
+        for chunk in openai_client.chat.completions.create(
+            **request, stream=True, stream_options={"include_usage": True}, user=json.dumps({"appkey": app_key})
+        ):
+            # Usage comes in a final chunk with no choices
+            record_tokens(getattr(chunk, "usage", None), site)
+            # Azure sends a leading chunk with no choices carrying the content filter results
+            if not chunk.choices:
+                continue
+            token = chunk.choices[0].delta.content
+            if token:
+                pieces.append(token)
+                yield token
+    finally:
+        # Time to the last token, including time spent rendering between tokens
+        record_stage("llm", time.perf_counter() - started, site=site)
+
+    if key is not None and pieces:
+        llm_cache.set(key, "".join(pieces), ttl=cache_ttl, site=cache, tags=cache_tags)
@@ -0,0 +1,61 @@
+from types import SimpleNamespace
+
+
+class ChatStream:
+    """
+    Wraps a streamed chat completion that may answer in text, call tools, or both.
+
+    Iterating yields the text tokens (suitable for st.write_stream). The stream is
+    read ahead to the first text token on construction, so has_content tells the
+    caller whether to open a chat bubble at all. Tool call names and argument
+    fragments are accumulated by their index along the way and exposed as
+    tool_calls once the stream is exhausted. usage holds the token usage from the
+    final chunk when the request set stream_options={"include_usage": True}.
+    """
+
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._tool_calls = {}
+        self.usage = None
+        self._pending = self._advance()
+
+    def _advance(self):
+        for chunk in self._chunks:
+            if getattr(chunk, "usage", None):
+                self.usage = chunk.usage
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta
+            for tool_call in getattr(delta, "tool_calls", None) or []:
+                entry = self._tool_calls.setdefault(tool_call.index, {"id": None, "name": None, "arguments": []})
+                if tool_call.id:
+                    entry["id"] = tool_call.id
+                if tool_call.function and tool_call.function.name:
+                    entry["name"] = tool_call.function.name
+                if tool_call.function and tool_call.function.arguments:
+                    entry["arguments"].append(tool_call.function.arguments)
+            if delta.content:
+                return delta.content
+        return None
+
+    @property
+    def has_content(self):
+        return self._pending is not None
+
+    def __iter__(self):
+        while self._pending is not None:
+            token = self._pending
+            self._pending = self._advance()
+            yield token
+
+    def finish(self):
+        for _ in self:
+            pass
+        return self
+
+    @property
+    def tool_calls(self):
+        return [
+            SimpleNamespace(id=entry["id"], name=entry["name"], arguments="".join(entry["arguments"]))
+            for _, entry in sorted(self._tool_calls.items())
+        ]
@@ -0,0 +1,124 @@
+"""
+Declares the indexes the tools rely on and checks that their queries use them.
+
+    python -m utils.mongo_indexes ensure   # create missing indexes
+    python -m utils.mongo_indexes check    # explain() every hot query, exit 1 on COLLSCAN
+    python -m utils.mongo_indexes all      # both
+"""
+import sys
+from pymongo import ASCENDING, IndexModel
+from utils.mongo_loader import connect_mongo
+from utils.ba_queries import (
+    BA_COLLECTION, BAM_NAMES_PROJECTION, matched_endpoint_pipeline, ba_counts_pipeline
+)
+from utils.monitoring_config import MONITORING_COLLECTION, MONITORING_PROJECTION
+
+REQUIRED_INDEXES = {
+    BA_COLLECTION: [
+        [("baName", ASCENDING)],
+        [("endpoints.endpointSysId", ASCENDING)],
+        [("bams.endpoints.endpointSysId", ASCENDING)],
+    ],
+    MONITORING_COLLECTION: [
+        [("data.cmdbId", ASCENDING)],
+    ],
+    "clientIdToUserMapping": [
+        [("clientId", ASCENDING)],
+    ],
+}
+
+# Placeholder values are fine: the plan depends on the query shape, not the value
+SAMPLE_SYS_ID = "0" * 32
+HOT_QUERIES = [
+    ("fetch_ba_level_information", BA_COLLECTION, "find", {"filter": {"baName": "sample"}, "projection": BAM_NAMES_PROJECTION}),
+    ("fetch_ba_level_information (counts)", BA_COLLECTION, "aggregate", {"pipeline": ba_counts_pipeline("sample")}),
+    ("get_matched_endpoint", BA_COLLECTION, "aggregate", {"pipeline": matched_endpoint_pipeline(SAMPLE_SYS_ID)}),
+    ("review_monitor_arguments / update_monitor", MONITORING_COLLECTION, "find", {"filter": {"data.cmdbId": SAMPLE_SYS_ID}, "projection": MONITORING_PROJECTION}),
+    ("set_user_id_in_mongo", "clientIdToUserMapping", "find", {"filter": {"clientId": "monoh-dev-integration"}}),
+]
+
+
+class QueryPlanError(RuntimeError):
+    pass
+
+
+def ensure_indexes(db=None):
+    """
+    Creates the declared indexes that are missing.
+
+    Returns:
+        list: (collection, index name) for every index created.
+    """
+    db = db if db is not None else connect_mongo()
+    created = []
+    for collection_name, index_specs in REQUIRED_INDEXES.items():
+        collection = db[collection_name]
+        existing = {tuple(info["key"]) for info in collection.index_information().values()}
+        missing = [IndexModel(keys) for keys in index_specs if tuple(keys) not in existing]
+        if missing:
+            created += [(collection_name, name) for name in collection.create_indexes(missing)]
+    return created
+
+
+def _find_stages(plan, stage):
+    if isinstance(plan, dict):
+        if plan.get("stage") == stage:
+            return True
+        return any(_find_stages(value, stage) for value in plan.values())
+    if isinstance(plan, list):
+        return any(_find_stages(value, stage) for value in plan)
+    return False
+
+
+def explain_query(db, collection_name, kind, spec):
+    collection = db[collection_name]
+    if kind == "find":
+        return collection.find(spec["filter"], spec.get("projection")).explain()
+    return db.command("aggregate", collection_name, pipeline=spec["pipeline"], explain=True)
+
+
+def check_query_plans(db=None, strict=True):
+    """
+    Runs explain() on every hot query and reports which ones scan the whole collection.
+
+    Returns:
+        list: (query name, collection, uses COLLSCAN) per query.
+
+    Raises:
+        QueryPlanError: When strict and any query plan contains a COLLSCAN.
+    """
+    db = db if db is not None else connect_mongo()
+    report = [
+        (name, collection_name, _find_stages(explain_query(db, collection_name, kind, spec), "COLLSCAN"))
+        for name, collection_name, kind, spec in HOT_QUERIES
+    ]
+    scans = [f"{name} on {collection_name}" for name, collection_name, collscan in report if collscan]
+    if strict and scans:
+        raise QueryPlanError("COLLSCAN in query plan for: " + ", ".join(scans))
+    return report
+
+
+def main(argv):
+    command = argv[1] if len(argv) > 1 else "all"
+    if command not in ("ensure", "check", "all"):
+        print(__doc__)
+        return 2
+
+    if command in ("ensure", "all"):
+        created = ensure_indexes()
+        for collection_name, name in created:
+            print(f"created {collection_name}.{name}")
+        if not created:
+            print("all required indexes already exist")
+
+    if command in ("check", "all"):
+        report = check_query_plans(strict=False)
+        for name, collection_name, collscan in report:
+            print(f"{'COLLSCAN' if collscan else 'ok':<9}{collection_name:<32}{name}")
+        if any(collscan for _, _, collscan in report):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
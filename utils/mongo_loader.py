@@ -1,12 +1,75 @@
 from pymongo import MongoClient
 from dotenv import load_dotenv
+import atexit
 import os
+import threading
+from utils.instrumentation import MongoCommandTimer
 
 load_dotenv()
 more_mongo_uri = os.getenv("MORE_MONGO_URI")
+more_mongo_db = os.getenv("MORE_MONGO_DB", "monoh-dev")
+
+# Pool settings for the shared client, overridable per deployment
+MONGO_MAX_POOL_SIZE = int(os.getenv("MORE_MONGO_MAX_POOL_SIZE", "50"))
+MONGO_MIN_POOL_SIZE = int(os.getenv("MORE_MONGO_MIN_POOL_SIZE", "2"))
+MONGO_MAX_IDLE_TIME_MS = int(os.getenv("MORE_MONGO_MAX_IDLE_TIME_MS", "300000"))
+MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.getenv("MORE_MONGO_SERVER_SELECTION_TIMEOUT_MS", "5000"))
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_mongo_client():
+    """
+    Returns the process-wide MongoClient, creating it on first use.
+
+    MongoClient is thread-safe and keeps its own connection pool, so every tool
+    shares this one instance instead of paying the handshake on each call.
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = MongoClient(
+                    more_mongo_uri,
+                    maxPoolSize=MONGO_MAX_POOL_SIZE,
+                    minPoolSize=MONGO_MIN_POOL_SIZE,
+                    maxIdleTimeMS=MONGO_MAX_IDLE_TIME_MS,
+                    serverSelectionTimeoutMS=MONGO_SERVER_SELECTION_TIMEOUT_MS,
+                    appname="monitor-ease",
+                    event_listeners=[MongoCommandTimer()],
+                )
+    return _client
+
 
 def connect_mongo():
-    mongo_uri = more_mongo_uri
-    client = MongoClient(mongo_uri)
-    db = client["monoh-dev"]
-    return db
+    return get_mongo_client()[more_mongo_db]
+
+
+def get_collection(name):
+    return connect_mongo()[name]
+
+
+def ping_mongo():
+    """
+    Health check for the shared client.
+
+    Returns:
+        dict: {"status": "ok"} or {"status": "error", "message": ...}
+    """
+    try:
+        get_mongo_client().admin.command("ping")
+        return {"status": "ok"}
+    except Exception as e:
+        return {"status": "error", "message": str(e)}
+
+
+def close_mongo():
+    global _client
+    with _client_lock:
+        if _client is not None:
+            _client.close()
+            _client = None
+
+
+atexit.register(close_mongo)
@@ -0,0 +1,18 @@
+from utils.mongo_loader import get_collection
+
+MONITORING_COLLECTION = "assetsMonitoringConfiguration"
+MONITORING_PROJECTION = {
+    "_id": 0,
+    "data.cmdbId": 1,
+    "data.monitoringCriticality": 1,
+    "data.thousandEyesConfiguration": 1,
+}
+
+
+def find_existing_monitoring(endpoint_sysId):
+    """
+    Returns the stored monitoring data ({"cmdbId", "monitoringCriticality",
+    "thousandEyesConfiguration"}) for an endpoint, or {} when it is not monitored.
+    """
+    existing = get_collection(MONITORING_COLLECTION).find_one({"data.cmdbId": endpoint_sysId}, MONITORING_PROJECTION)
+    return (existing or {}).get("data", {})
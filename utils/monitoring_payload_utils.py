@@ -1,125 +1,46 @@
+DEFAULT_ALERT_RULES = [
+    "HTTP Server Availability 0%",
+    "HTTP Server Availability Below 50%",
+    "HTTP Server Availability Below 75%",
+    "HTTP Server Availability Below 99%",
+    "Latency above 2x stddev",
+    "Latency above 450ms",
+    "Packet Loss: >= 25%",
+    "SSL Certificate Expiry: 1 day",
+    "SSL Certificate Expiry: 30 days",
+    "SSL Certificate Expiry: 7 days",
+    "Transport Layer Availability 0%",
+    "Transport Layer Availability Below 50%",
+    "Transport Layer Availability Below 75%",
+    "Transport Layer Availability Below 99%"
+]
+
+_COMMON_DEFAULTS = {
+    "alertRules": DEFAULT_ALERT_RULES,
+    "agents": ["251041"],
+    "agentSelect": "Static",
+    "alertsEnabled": True,
+    "enabled": True
+}
+
+# Built once at import; get_default_config() hands out copies
+DEFAULT_CONFIGS = {
+    "HTTP": {
+        "type": "ThousandEyesHTTPConfiguration",
+        **_COMMON_DEFAULTS,
+        "bandwidthMeasurements": False,
+        "contentRegex": "SUCCESS",
+        "followRedirects": True
+    },
+    "WebTransaction": {"type": "ThousandEyesWebTransactionConfiguration", **_COMMON_DEFAULTS},
+    "Network": {"type": "ThousandEyesNetworkConfiguration", **_COMMON_DEFAULTS},
+    "DNS": {"type": "ThousandEyesDNSConfiguration", **_COMMON_DEFAULTS},
+    "FTTP": {"type": "ThousandEyesFTTPConfiguration", **_COMMON_DEFAULTS}
+}
+
 def get_default_config(test_type):
-    defaults = {
-        "HTTP": {
-            "type": "ThousandEyesHTTPConfiguration",
-            "alertRules": [
-                "HTTP Server Availability 0%",
-                "HTTP Server Availability Below 50%",
-                "HTTP Server Availability Below 75%",
-                "HTTP Server Availability Below 99%",
-                "Latency above 2x stddev",
-                "Latency above 450ms",
-                "Packet Loss: >= 25%",
-                "SSL Certificate Expiry: 1 day",
-                "SSL Certificate Expiry: 30 days",
-                "SSL Certificate Expiry: 7 days",
-                "Transport Layer Availability 0%",
-                "Transport Layer Availability Below 50%",
-                "Transport Layer Availability Below 75%",
-                "Transport Layer Availability Below 99%"
-            ],
-            "agents": ["251041"],
-            "agentSelect": "Static",
-            "alertsEnabled": True,
-            "enabled": True,
-            "bandwidthMeasurements": False,
-            "contentRegex": "SUCCESS",
-            "followRedirects": True
-        },
-        "WebTransaction": {
-            "type": "ThousandEyesWebTransactionConfiguration",
-            "alertRules": [
-                "HTTP Server Availability 0%",
-                "HTTP Server Availability Below 50%",
-                "HTTP Server Availability Below 75%",
-                "HTTP Server Availability Below 99%",
-                "Latency above 2x stddev",
-                "Latency above 450ms",
-                "Packet Loss: >= 25%",
-                "SSL Certificate Expiry: 1 day",
-                "SSL Certificate Expiry: 30 days",
-                "SSL Certificate Expiry: 7 days",
-                "Transport Layer Availability 0%",
-                "Transport Layer Availability Below 50%",
-                "Transport Layer Availability Below 75%",
-                "Transport Layer Availability Below 99%"
-            ],
-            "agents": ["251041"],
-            "agentSelect": "Static",
-            "alertsEnabled": True,
-            "enabled": True
-        },
-        "Network": {
-            "type": "ThousandEyesNetworkConfiguration",
-            "alertRules": [
-                "HTTP Server Availability 0%",
-                "HTTP Server Availability Below 50%",
-                "HTTP Server Availability Below 75%",
-                "HTTP Server Availability Below 99%",
-                "Latency above 2x stddev",
-                "Latency above 450ms",
-                "Packet Loss: >= 25%",
-                "SSL Certificate Expiry: 1 day",
-                "SSL Certificate Expiry: 30 days",
-                "SSL Certificate Expiry: 7 days",
-                "Transport Layer Availability 0%",
-                "Transport Layer Availability Below 50%",
-                "Transport Layer Availability Below 75%",
-                "Transport Layer Availability Below 99%"
-            ],
-            "agents": ["251041"],
-            "agentSelect": "Static",
-            "alertsEnabled": True,
-            "enabled": True
-        },
-        "DNS": {
-            "type": "ThousandEyesDNSConfiguration",
-            "alertRules": [
-                "HTTP Server Availability 0%",
-                "HTTP Server Availability Below 50%",
-                "HTTP Server Availability Below 75%",
-                "HTTP Server Availability Below 99%",
-                "Latency above 2x stddev",
-                "Latency above 450ms",
-                "Packet Loss: >= 25%",
-                "SSL Certificate Expiry: 1 day",
-                "SSL Certificate Expiry: 30 days",
-                "SSL Certificate Expiry: 7 days",
-                "Transport Layer Availability 0%",
-                "Transport Layer Availability Below 50%",
-                "Transport Layer Availability Below 75%",
-                "Transport Layer Availability Below 99%"
-            ],
-            "agents": ["251041"],
-            "agentSelect": "Static",
-            "alertsEnabled": True,
-            "enabled": True
-        },
-        "FTTP": {
-            "type": "ThousandEyesFTTPConfiguration",
-            "alertRules": [
-                "HTTP Server Availability 0%",
-                "HTTP Server Availability Below 50%",
-                "HTTP Server Availability Below 75%",
-                "HTTP Server Availability Below 99%",
-                "Latency above 2x stddev",
-                "Latency above 450ms",
-                "Packet Loss: >= 25%",
-                "SSL Certificate Expiry: 1 day",
-                "SSL Certificate Expiry: 30 days",
-                "SSL Certificate Expiry: 7 days",
-                "Transport Layer Availability 0%",
-                "Transport Layer Availability Below 50%",
-                "Transport Layer Availability Below 75%",
-                "Transport Layer Availability Below 99%"
-            ],
-            "agents": ["251041"],
-            "agentSelect": "Static",
-            "alertsEnabled": True,
-            "enabled": True
-        }
-    }
-    return defaults.get(test_type, {})
+    # Lists are copied too, so a caller editing its payload cannot change the shared defaults
+    return {k: list(v) if isinstance(v, list) else v for k, v in DEFAULT_CONFIGS.get(test_type, {}).items()}
 
 REQUIRED_CONFIG_FIELDS = {
     "HTTP": ["url", "interval", "httpTimeLimit"],
@@ -153,44 +74,39 @@ def validate_configuration(config, testType):
             f"{', '.join(missing_keys)}.\nExample:\n{example_text}"
         )
 
-def format_monitoring_payload(endpoint_sysId, monitoringCriticality, configurations, testType):
+# The fields each test type accepts from the user; the rest come from DEFAULT_CONFIGS
+CONFIG_FIELDS_BY_TYPE = {
+    "HTTP": ("interval", "url", "httpTimeLimit"),
+    "WebTransaction": ("interval", "url", "timeLimit"),
+    "FTTP": ("interval", "url", "fttpTimeLimit"),
+    "DNS": ("interval", "dnsServers", "domain"),
+    "Network": ("interval", "url")
+}
+
+def build_monitoring_configuration(configurations, testType):
     validate_configuration(configurations, testType)
-    default_config = get_default_config(testType)
-    filtered_config = configurations.copy()
 
     # Only keep the correct time limit field
-    if testType == "HTTP":
-        filtered_config = {
-            k: v for k, v in configurations.items() if k in ["interval", "url", "httpTimeLimit"]
-        }
-    elif testType == "WebTransaction":
-        filtered_config = {
-            k: v for k, v in configurations.items() if k in ["interval", "url", "timeLimit"]
-        }
-    elif testType == "FTTP":
-        filtered_config = {
-            k: v for k, v in configurations.items() if k in ["interval", "url", "fttpTimeLimit"]
-        }
-    elif testType == "DNS":
-        filtered_config = {
-            k: v for k, v in configurations.items() if k in ["interval", "dnsServers", "domain"]
-        }
-    elif testType == "Network":
-        filtered_config = {
-            k: v for k, v in configurations.items() if k in ["interval", "url"]
-        }
+    allowed = CONFIG_FIELDS_BY_TYPE.get(testType)
+    if allowed is None:
+        filtered_config = configurations.copy()
+    else:
+        filtered_config = {k: v for k, v in configurations.items() if k in allowed}
 
-    merged_config = {**default_config, **filtered_config}
+    return {**get_default_config(testType), **filtered_config}
 
+def format_monitoring_asset(sysIds, monitoringCriticality, monitoringConfiguration):
+    return {
+        "sysIds": list(sysIds),
+        "monitoringCriticality": monitoringCriticality,
+        "monitoringPlatform": "ThousandEyes",
+        "monitoringConfiguration": [monitoringConfiguration]
+    }
+
+def format_monitoring_payload(endpoint_sysId, monitoringCriticality, configurations, testType):
+    merged_config = build_monitoring_configuration(configurations, testType)
     return {
-        "assets": [
-            {
-                "sysIds": [endpoint_sysId],
-                "monitoringCriticality": monitoringCriticality,
-                "monitoringPlatform": "ThousandEyes",
-                "monitoringConfiguration": [merged_config]
-            }
-        ]
+        "assets": [format_monitoring_asset([endpoint_sysId], monitoringCriticality, merged_config)]
     }
 
 def format_get_assets_payload(monitoring_goal_ids, enabled):
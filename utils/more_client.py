@@ -0,0 +1,109 @@
+import os
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from dotenv import load_dotenv
+from utils.instrumentation import timed, record_payload
+
+load_dotenv()
+more_api_key = os.getenv("MORE_API_KEY")
+
+MORE_API_BASE_URL = os.getenv("MORE_API_BASE_URL", "https://more-api-dev.cisco.com/api/v1")
+MORE_POOL_SIZE = int(os.getenv("MORE_POOL_SIZE", "20"))
+MORE_CONNECT_TIMEOUT = float(os.getenv("MORE_CONNECT_TIMEOUT", "5"))
+MORE_READ_TIMEOUT = float(os.getenv("MORE_READ_TIMEOUT", "60"))
+MORE_MAX_RETRIES = int(os.getenv("MORE_MAX_RETRIES", "3"))
+MORE_RETRY_BACKOFF = float(os.getenv("MORE_RETRY_BACKOFF", "0.5"))
+
+# Only read-only calls are retried. MoRE's POST and PUT (updateMonitoring) each create a new
+# monitoring request, and DELETE is not documented as idempotent, so a retry could repeat the change
+RETRIED_METHODS = frozenset(["GET", "HEAD", "OPTIONS"])
+
+
+class MoreClient:
+    """
+    Thin wrapper around a pooled requests.Session for the MoRE API.
+
+    The session keeps TLS connections alive between calls, carries the auth and
+    content headers once, and retries read-only calls with exponential backoff.
+    """
+
+    def __init__(self, base_url=MORE_API_BASE_URL, api_key=more_api_key, pool_size=MORE_POOL_SIZE,
+                 timeout=(MORE_CONNECT_TIMEOUT, MORE_READ_TIMEOUT), max_retries=MORE_MAX_RETRIES,
+                 backoff_factor=MORE_RETRY_BACKOFF):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+
+        retry = Retry(
+            total=max_retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=(502, 503, 504),
+            allowed_methods=RETRIED_METHODS,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+
+        self.session = requests.Session()
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update({
+            "Content-Type": "application/json",
+            "Accept": "application/json",
+            "Accept-Encoding": "gzip, deflate",
+            "Authorization": "Bearer " + (api_key or ""),
+        })
+
+    def request(self, method, path, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        # Labelled by the first path segment; the rest carries ids
+        endpoint = path.lstrip("/").split("/")[0]
+        with timed("more", endpoint=endpoint):
+            response = self.session.request(method, f"{self.base_url}/{path.lstrip('/')}", **kwargs)
+        # Streamed bodies are not read here, so only their declared length is known
+        size = response.headers.get("Content-Length")
+        if size is None and not kwargs.get("stream"):
+            size = len(response.content)
+        record_payload(f"more:{endpoint}", int(size) if size is not None else None)
+        return response
+
+    def get(self, path, **kwargs):
+        return self.request("GET", path, **kwargs)
+
+    def post(self, path, **kwargs):
+        return self.request("POST", path, **kwargs)
+
+    def put(self, path, **kwargs):
+        return self.request("PUT", path, **kwargs)
+
+    def delete(self, path, **kwargs):
+        return self.request("DELETE", path, **kwargs)
+
+    def close(self):
+        self.session.close()
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_more_client():
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = MoreClient()
+    return _client
+
+
+def get_error_message(response):
+    """
+    Pulls the first errorDescription out of a MoRE error response.
+    """
+    try:
+        error_description = response.json().get("errorDescription", [])
+    except ValueError:
+        return response.text or f"HTTP {response.status_code}"
+    if isinstance(error_description, list) and error_description:
+        return error_description[0]
+    return str(error_description)
@@ -0,0 +1,120 @@
+"""
+Prunes documents before they are serialized into LLM prompts.
+
+Each tool that puts a document in front of the model has a relevance profile:
+fields it never needs (alert rule lists, audit metadata) are dropped unless the
+question asks about them, and allow-listed profiles keep only the named fields.
+Empty values are always dropped. The result is serialized as compact JSON, or as
+key=value lines with PROMPT_DATA_FORMAT=kv. Tokens saved compared with a plain
+json.dumps of the whole document are recorded per tool.
+"""
+import json
+import os
+import re
+from dotenv import load_dotenv
+from utils.context_manager import count_tokens
+from utils.instrumentation import increment, observe, TOKEN_BUCKETS
+
+load_dotenv()
+PROMPT_DATA_FORMAT = os.getenv("PROMPT_DATA_FORMAT", "json").lower()
+
+ALERT_QUESTION = re.compile(r"\balert", re.IGNORECASE)
+AGENT_QUESTION = re.compile(r"\bagent", re.IGNORECASE)
+TIME_QUESTION = re.compile(r"\b(when|date|time|created|updated|submitted|last)\b", re.IGNORECASE)
+AUDIT_FIELDS = ("_id", "__v", "createdAt", "updatedAt", "createdBy", "updatedBy", "lastModified", "modifiedBy")
+
+# keep: allow-list of field names (None keeps everything not dropped)
+# drop: field names left out unless the question matches asked[field]
+# keep_empty: fields kept even when empty, where "nothing" is the answer
+PROMPT_PROFILES = {
+    "fetch_endpoint_information": {
+        "keep": None,
+        "drop": ("alertRules", "agentSelect") + AUDIT_FIELDS,
+        "asked": {"alertRules": ALERT_QUESTION, "agentSelect": AGENT_QUESTION,
+                  **{field: TIME_QUESTION for field in AUDIT_FIELDS}},
+        "keep_empty": (),
+    },
+    "compare_endpoint_charges": {
+        "keep": ("endpointSysId", "testName", "interval", "timeLimit", "agents", "url", "monthlyConsumption"),
+        "drop": (),
+        "asked": {},
+        "keep_empty": (),
+    },
+    "fetch_newly_monitored_endpoint_configuration": {
+        "keep": None,
+        "drop": ("alertRules",) + AUDIT_FIELDS,
+        "asked": {"alertRules": ALERT_QUESTION, **{field: TIME_QUESTION for field in AUDIT_FIELDS}},
+        "keep_empty": ("errors",),
+    },
+}
+
+
+def _is_empty(value):
+    return value is None or value == "" or value == [] or value == {}
+
+
+def prune(data, profile, question=""):
+    """
+    Copy of data (dicts and lists, nested) with the profile's irrelevant and empty fields removed.
+    """
+    if isinstance(data, list):
+        items = [prune(item, profile, question) for item in data]
+        return [item for item in items if not _is_empty(item)]
+    if not isinstance(data, dict):
+        return data
+
+    pruned = {}
+    for key, value in data.items():
+        if key in profile["drop"]:
+            asked = profile["asked"].get(key)
+            if asked is None or not asked.search(question or ""):
+                continue
+        if isinstance(value, (dict, list)):
+            value = prune(value, profile, question)
+        elif profile["keep"] is not None and key not in profile["keep"]:
+            continue
+        if not _is_empty(value) or key in profile["keep_empty"]:
+            pruned[key] = value
+    return pruned
+
+
+def _key_value_lines(data, prefix=""):
+    if isinstance(data, dict):
+        for key, value in data.items():
+            yield from _key_value_lines(value, f"{prefix}.{key}" if prefix else key)
+    elif isinstance(data, list) and any(isinstance(item, (dict, list)) for item in data):
+        for i, item in enumerate(data):
+            yield from _key_value_lines(item, f"{prefix}[{i}]")
+    elif isinstance(data, list):
+        yield f"{prefix}={','.join(str(item) for item in data)}"
+    else:
+        yield f"{prefix}={data}"
+
+
+def serialize(data, data_format=PROMPT_DATA_FORMAT):
+    if data_format == "kv":
+        return "\n".join(_key_value_lines(data))
+    return json.dumps(data, separators=(",", ":"), ensure_ascii=False, default=str)
+
+
+def compact_for_prompt(data, tool, question="", data_format=PROMPT_DATA_FORMAT):
+    """
+    Prunes data with the tool's profile and serializes it for a prompt, recording the tokens saved.
+
+    Args:
+        data (dict | list): Document(s) the tool would put in the prompt.
+        tool (str): Key in PROMPT_PROFILES.
+        question (str): The user's question; fields it asks about are kept.
+
+    Returns:
+        str: Compact JSON, or key=value lines when data_format is "kv".
+    """
+    compact = serialize(prune(data, PROMPT_PROFILES[tool], question), data_format)
+
+    saved = count_tokens(json.dumps(data, default=str)) - count_tokens(compact)
+    increment("monitorease_prompt_tokens_saved_total", max(saved, 0), help_text="Prompt tokens saved by pruning", tool=tool)
+    observe(
+        "monitorease_prompt_tokens_saved", max(saved, 0), buckets=TOKEN_BUCKETS,
+        help_text="Prompt tokens saved by pruning per call", tool=tool
+    )
+    return compact
@@ -0,0 +1,181 @@
+"""
+Tracks submitted monitoring requests in the background and pushes their final
+status to the conversations that submitted them.
+
+One daemon thread polls monitoringRequests/{id}/status with exponential backoff
+and jitter. A request id is polled once however many conversations track it,
+and each conversation drains its own outbox of status messages.
+"""
+import os
+import random
+import threading
+import time
+from dotenv import load_dotenv
+from utils.more_client import get_more_client, get_error_message
+
+load_dotenv()
+REQUEST_TRACKER_INITIAL_DELAY = float(os.getenv("REQUEST_TRACKER_INITIAL_DELAY", "10"))
+REQUEST_TRACKER_MAX_DELAY = float(os.getenv("REQUEST_TRACKER_MAX_DELAY", "300"))
+REQUEST_TRACKER_TIMEOUT = float(os.getenv("REQUEST_TRACKER_TIMEOUT", "3600"))
+REQUEST_TRACKER_TERMINAL_STATUSES = {
+    status.strip().upper()
+    for status in os.getenv(
+        "REQUEST_TRACKER_TERMINAL_STATUSES", "COMPLETED,SUCCESS,FAILED,ERROR,PARTIALLY_COMPLETED,REJECTED,CANCELLED"
+    ).split(",")
+    if status.strip()
+}
+
+
+def _status_errors(payload):
+    errors = []
+    statuses = payload.get("assetsStatusInThousandEyes") or []
+    if isinstance(statuses, dict):
+        statuses = [statuses]
+    for asset_status in statuses:
+        if isinstance(asset_status, dict):
+            asset_errors = asset_status.get("errors") or []
+            errors += asset_errors if isinstance(asset_errors, list) else [asset_errors]
+    return errors
+
+
+def format_request_status(requestId, payload):
+    """
+    Chat message for a finished request, built straight from the status payload.
+    """
+    status = payload.get("status", "UNKNOWN")
+    errors = _status_errors(payload)
+    icon = "❌" if errors or status.upper() in ("FAILED", "ERROR", "REJECTED") else "✅"
+    message = f"{icon} Monitoring request `{requestId}` finished with status **{status}**."
+    if errors:
+        message += "\n\nErrors reported by ThousandEyes:\n" + "\n".join(f"- {error}" for error in errors)
+    else:
+        message += " No errors found in your request."
+    return message
+
+
+class RequestTracker:
+    def __init__(
+        self,
+        initial_delay=REQUEST_TRACKER_INITIAL_DELAY,
+        max_delay=REQUEST_TRACKER_MAX_DELAY,
+        timeout=REQUEST_TRACKER_TIMEOUT,
+    ):
+        self.initial_delay = initial_delay
+        self.max_delay = max_delay
+        self.timeout = timeout
+        # requestId -> {"subscribers", "started", "delay", "next_poll"}
+        self._requests = {}
+        # subscriber key (session + conversation) -> status messages not yet shown
+        self._outboxes = {}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+
+    def track(self, requestId, subscriber):
+        """
+        Starts polling requestId unless it is already tracked, and delivers its final status to subscriber.
+        """
+        if not requestId:
+            return
+        now = time.monotonic()
+        with self._lock:
+            request = self._requests.setdefault(requestId, {
+                "subscribers": set(),
+                "started": now,
+                "delay": self.initial_delay,
+                "next_poll": now + self.initial_delay,
+            })
+            request["subscribers"].add(subscriber)
+            self._outboxes.setdefault(subscriber, [])
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="request-tracker", daemon=True)
+                self._thread.start()
+        self._wakeup.set()
+
+    def pending(self, subscriber):
+        with self._lock:
+            return [requestId for requestId, request in self._requests.items() if subscriber in request["subscribers"]]
+
+    def drain(self, subscriber):
+        """
+        Returns and clears the status messages waiting for subscriber.
+        """
+        with self._lock:
+            messages = self._outboxes.get(subscriber, [])
+            if messages:
+                self._outboxes[subscriber] = []
+            return messages
+
+    def _deliver(self, requestId, message):
+        with self._lock:
+            request = self._requests.pop(requestId, None)
+            for subscriber in request["subscribers"] if request else ():
+                self._outboxes.setdefault(subscriber, []).append(message)
+
+    def _backoff(self, requestId):
+        with self._lock:
+            request = self._requests.get(requestId)
+            if request is None:
+                return
+            # Full jitter keeps polls for requests submitted together from lining up
+            request["next_poll"] = time.monotonic() + random.uniform(request["delay"] / 2, request["delay"])
+            request["delay"] = min(request["delay"] * 2, self.max_delay)
+
+    def poll(self, requestId):
+        """
+        Polls one request and either delivers its final status or schedules the next poll.
+        """
+        try:
+            response = get_more_client().get(f"monitoringRequests/{requestId}/status")
+            if response.status_code != 200:
+                raise RuntimeError(get_error_message(response))
+            payload = response.json()
+        except Exception as e:
+            print(f"Status poll for request {requestId} failed: {e}")
+            payload = None
+
+        status = str((payload or {}).get("status", "")).upper()
+        if status in REQUEST_TRACKER_TERMINAL_STATUSES:
+            self._deliver(requestId, format_request_status(requestId, payload))
+            return
+
+        with self._lock:
+            request = self._requests.get(requestId)
+            expired = request is not None and time.monotonic() - request["started"] > self.timeout
+        if expired:
+            self._deliver(
+                requestId,
+                f"⏳ Monitoring request `{requestId}` is still being processed. Ask me for its status later.",
+            )
+        else:
+            self._backoff(requestId)
+
+    def _run(self):
+        while True:
+            now = time.monotonic()
+            with self._lock:
+                if not self._requests:
+                    self._thread = None
+                    return
+                due = [requestId for requestId, request in self._requests.items() if request["next_poll"] <= now]
+                next_poll = min(request["next_poll"] for request in self._requests.values())
+
+            for requestId in due:
+                self.poll(requestId)
+
+            if not due:
+                self._wakeup.wait(max(next_poll - now, 0))
+                self._wakeup.clear()
+
+
+_tracker = None
+_tracker_lock = threading.Lock()
+
+
+def get_request_tracker():
+    global _tracker
+    if _tracker is None:
+        with _tracker_lock:
+            if _tracker is None:
+                _tracker = RequestTracker()
+    return _tracker